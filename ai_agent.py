@@ -1,14 +1,100 @@
+import asyncio
 import openai
-from typing import List, Dict, Any, Optional
+import hashlib
+import json
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from config import config
 from schemas import PartInfo, SupplierInfo, BenchmarkSummary
+from cache_store import SQLiteCache
+
+# Bump when the system prompt, analysis prompt or parsing changes so cached analyses are not reused
+PROMPT_VERSION = "1"
+
+# Sections pulled out of the model's answer into BenchmarkSummary fields
+SUMMARY_SECTIONS = {
+    "Supplier Comparison": "supplier_comparison",
+    "Geographic Risk Assessment": "geographic_risk_assessment",
+    "Strategic Recommendation": "strategic_recommendation",
+}
+
+# A line containing one of these words ends the current section
+SECTION_END_KEYWORDS = ['assessment', 'recommendation', 'consideration', 'summary']
+
+def _normalize(value: Any) -> Any:
+    """Round floats and strip strings so equivalent inputs fingerprint identically"""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+class SectionStreamParser:
+    """
+    Incremental counterpart of AIAgent._extract_section.
+
+    Feed completion tokens as they arrive; every time a section is closed by
+    the next section header, `feed` returns it so callers can use it before
+    the rest of the completion has been generated. The text produced for
+    each section is identical to running _extract_section on the full answer.
+    """
+
+    def __init__(self, section_names: List[str]):
+        self.section_names = section_names
+        self.sections: Dict[str, str] = {}
+        self._open: Dict[str, List[str]] = {}
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[Tuple[str, str]]:
+        """Consume a chunk of text, returning sections completed by it"""
+        self._buffer += delta
+        *lines, self._buffer = self._buffer.split('\n')
+        completed = []
+        for line in lines:
+            completed.extend(self._consume_line(line))
+        return completed
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Flush the last partial line and close every open section"""
+        completed = self._consume_line(self._buffer)
+        self._buffer = ""
+        for name in list(self._open):
+            completed.append(self._finish(name))
+        return completed
+
+    def _consume_line(self, line: str) -> List[Tuple[str, str]]:
+        completed = []
+        lowered = line.lower()
+        # Lines after a header belong to its section until an end keyword appears
+        for name in list(self._open):
+            if any(keyword in lowered for keyword in SECTION_END_KEYWORDS):
+                completed.append(self._finish(name))
+            else:
+                self._open[name].append(line)
+        # The first line mentioning a section name starts that section
+        for name in self.section_names:
+            if name not in self.sections and name not in self._open and name.lower() in lowered:
+                self._open[name] = []
+        return completed
+
+    def _finish(self, name: str) -> Tuple[str, str]:
+        self.sections[name] = '\n'.join(self._open.pop(name)).strip()
+        return name, self.sections[name]
 
 class AIAgent:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
+        self.client = openai.AsyncOpenAI(api_key=config.OPENAI_API_KEY)
         self.model = config.OPENAI_MODEL
+        self.cache = SQLiteCache(
+            "llm_analyses",
+            ttl=config.LLM_CACHE_TTL,
+            max_entries=config.LLM_CACHE_MAX_ENTRIES
+        ) if config.LLM_CACHE_ENABLED else None
     
-    def generate_benchmark_analysis(
+    async def generate_benchmark_analysis(
         self,
         part_info: PartInfo,
         suppliers: List[SupplierInfo]
@@ -16,52 +102,120 @@ class AIAgent:
         """
         Generate AI-powered benchmark analysis and recommendations.
         """
+        benchmark_summary = None
+        async for event, payload in self.stream_benchmark_analysis(part_info, suppliers):
+            if event == "benchmark_summary":
+                benchmark_summary = payload
+        return benchmark_summary
+    
+    async def stream_benchmark_analysis(
+        self,
+        part_info: PartInfo,
+        suppliers: List[SupplierInfo]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream the benchmark analysis as (event, payload) pairs:
+        "summary_delta" with each completion token, "summary_section" with
+        {"section", "content"} as soon as a section is complete, and finally
+        "benchmark_summary" with the structured BenchmarkSummary.
+        """
         
         # Prepare data for AI analysis
         analysis_data = self._prepare_analysis_data(part_info, suppliers)
         
         # Generate AI analysis
         prompt = self._create_analysis_prompt(analysis_data)
+        parser = SectionStreamParser(list(SUMMARY_SECTIONS))
+        cache_key = self._cache_key(analysis_data)
+        chunks = []
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are BENCHEXTRACT, an expert AI agent specializing in supplier negotiations and benchmarking. 
-                        Your role is to analyze supplier pricing data and provide strategic recommendations for cost optimization and risk mitigation.
-                        
-                        You should:
-                        1. Compare supplier prices objectively
-                        2. Identify cost-saving opportunities
-                        3. Assess supply chain risks
-                        4. Provide actionable recommendations
-                        5. Consider geographic and quality factors
-                        
-                        Be concise, professional, and data-driven in your analysis."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=1000,
-                temperature=0.3
-            )
+            # Unchanged inputs reuse the stored completion and skip OpenAI entirely
+            cached_response = await asyncio.to_thread(self.cache.get, cache_key) if self.cache else None
+            if cached_response:
+                deltas = self._replay(cached_response)
+            else:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self._build_messages(prompt),
+                    max_tokens=1000,
+                    temperature=0.3,
+                    stream=True
+                )
+                deltas = self._stream_deltas(stream)
+            
+            async for delta in deltas:
+                chunks.append(delta)
+                yield "summary_delta", delta
+                for name, content in parser.feed(delta):
+                    yield "summary_section", {"section": name, "content": content}
             
-            ai_response = response.choices[0].message.content
+            for name, content in parser.close():
+                yield "summary_section", {"section": name, "content": content}
+            
+            ai_response = "".join(chunks)
+            if ai_response and self.cache and not cached_response:
+                await asyncio.to_thread(self.cache.set, cache_key, ai_response)
             
             # Parse AI response and create structured summary
             if ai_response:
-                return self._parse_ai_response(ai_response, part_info, suppliers)
+                summary = self._parse_ai_response(ai_response, part_info, suppliers, parser.sections)
             else:
-                return self._generate_fallback_analysis(part_info, suppliers)
+                summary = self._generate_fallback_analysis(part_info, suppliers)
             
         except Exception as e:
             print(f"Error generating AI analysis: {e}")
             # Fallback to basic analysis
-            return self._generate_fallback_analysis(part_info, suppliers)
+            summary = self._generate_fallback_analysis(part_info, suppliers)
+        
+        yield "benchmark_summary", summary
+    
+    async def _stream_deltas(self, stream) -> AsyncIterator[str]:
+        """Non-empty content deltas of a streamed chat completion"""
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+    
+    async def _replay(self, cached_response: str) -> AsyncIterator[str]:
+        """Serve a cached completion through the same path as a live stream"""
+        yield cached_response
+    
+    def _cache_key(self, analysis_data: Dict[str, Any]) -> str:
+        """Fingerprint of the normalized analysis input, model and prompt version"""
+        fingerprint = json.dumps(
+            {
+                "analysis_data": _normalize(analysis_data),
+                "model": self.model,
+                "prompt_version": PROMPT_VERSION
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+    
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        """Chat messages for the analysis request"""
+        return [
+            {
+                "role": "system",
+                "content": """You are BENCHEXTRACT, an expert AI agent specializing in supplier negotiations and benchmarking. 
+                Your role is to analyze supplier pricing data and provide strategic recommendations for cost optimization and risk mitigation.
+                
+                You should:
+                1. Compare supplier prices objectively
+                2. Identify cost-saving opportunities
+                3. Assess supply chain risks
+                4. Provide actionable recommendations
+                5. Consider geographic and quality factors
+                
+                Be concise, professional, and data-driven in your analysis."""
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
     
     def _prepare_analysis_data(self, part_info: PartInfo, suppliers: List[SupplierInfo]) -> Dict[str, Any]:
         """Prepare structured data for AI analysis"""
@@ -168,8 +322,12 @@ class AIAgent:
         
         return "\n".join(formatted)
     
-    def _parse_ai_response(self, ai_response: str, part_info: PartInfo, suppliers: List[SupplierInfo]) -> BenchmarkSummary:
-        """Parse AI response and extract structured information"""
+    def _parse_ai_response(self, ai_response: str, part_info: PartInfo, suppliers: List[SupplierInfo], sections: Optional[Dict[str, str]] = None) -> BenchmarkSummary:
+        """
+        Parse AI response and extract structured information.
+        `sections` holds sections already extracted while streaming.
+        """
+        sections = sections or {}
         
         # Extract potential savings
         potential_savings = 0
@@ -184,9 +342,9 @@ class AIAgent:
         
         return BenchmarkSummary(
             part_info=part_info,
-            supplier_comparison=self._extract_section(ai_response, "Supplier Comparison"),
-            geographic_risk_assessment=self._extract_section(ai_response, "Geographic Risk Assessment"),
-            strategic_recommendation=self._extract_section(ai_response, "Strategic Recommendation"),
+            supplier_comparison=sections.get("Supplier Comparison") or self._extract_section(ai_response, "Supplier Comparison"),
+            geographic_risk_assessment=sections.get("Geographic Risk Assessment") or self._extract_section(ai_response, "Geographic Risk Assessment"),
+            strategic_recommendation=sections.get("Strategic Recommendation") or self._extract_section(ai_response, "Strategic Recommendation"),
             potential_savings=potential_savings,
             savings_percentage=savings_percentage
         )
@@ -207,7 +365,7 @@ class AIAgent:
             if section_start >= 0:
                 # Find next section or end
                 for i in range(section_start, len(lines)):
-                    if any(keyword in lines[i].lower() for keyword in ['assessment', 'recommendation', 'consideration', 'summary']):
+                    if any(keyword in lines[i].lower() for keyword in SECTION_END_KEYWORDS):
                         section_end = i
                         break
                 
@@ -0,0 +1,324 @@
+import asyncio
+from typing import List, Optional, Dict, Any, AsyncIterator, Union, Callable, Awaitable, Tuple, TypeVar
+from config import config
+from schemas import PartInfo, SupplierInfo, TechnicalSpec, BenchmarkSummary, PartAnalysisResponse, ErrorResponse
+from data_service import DataService
+from file_service import FileService
+from similar_parts import SimilarPartsNotReady
+from web_scraper import WebScraper
+from ai_agent import AIAgent
+
+T = TypeVar("T")
+
+# Progress callback: emit(event_name, payload), e.g. emit("part_info", PartInfo)
+EmitCallback = Callable[[str, Any], None]
+
+class AnalysisService:
+    """
+    Runs the analyze-part pipeline as a small dependency graph:
+
+        part_info ──────────► web_suppliers ─┐
+        technical_spec ──────────────────────┼──► benchmark_summary
+        panel_suppliers ─────────────────────┘
+
+    Independent stages start together, so latency is roughly the slowest
+    branch plus the LLM call. Supabase, web search and LLM stages are
+    awaited directly; blocking services run in a worker thread to keep the
+    event loop free for other requests.
+    """
+
+    def __init__(
+        self,
+        data_service: DataService,
+        file_service: FileService,
+        web_scraper: WebScraper,
+        ai_agent: AIAgent
+    ):
+        self.data_service = data_service
+        self.file_service = file_service
+        self.web_scraper = web_scraper
+        self.ai_agent = ai_agent
+
+    async def analyze_part(
+        self,
+        part_number: str,
+        prefetched: Optional[Dict[str, Any]] = None,
+        emit: Optional[EmitCallback] = None
+    ) -> PartAnalysisResponse:
+        """
+        Analyze a part and return the assembled PartAnalysisResponse.
+
+        `prefetched` carries the "part_info" / "panel_suppliers" looked up in
+        bulk by analyze_parts; when given, those Supabase stages are skipped.
+        `emit` is called as each stage completes: "part_info",
+        "technical_spec" / "technical_specs", "panel_suppliers", one "web_supplier" per web
+        result, then the LLM's "summary_delta" / "summary_section" stream
+        and "benchmark_summary".
+        """
+        part_info_task = asyncio.create_task(
+            self._emitting("part_info", self._get_part_info(part_number, prefetched), emit)
+        )
+        spec_task = asyncio.create_task(self._get_technical_specs(part_number, emit))
+        panel_task = asyncio.create_task(
+            self._emitting("panel_suppliers", self._get_panel_suppliers(part_number, prefetched), emit)
+        )
+        web_task = asyncio.create_task(self._get_web_suppliers(part_number, part_info_task, emit))
+
+        try:
+            part_info, technical_specs, panel_suppliers, web_suppliers = await asyncio.gather(
+                part_info_task, spec_task, panel_task, web_task
+            )
+        except BaseException:
+            for task in (part_info_task, spec_task, panel_task, web_task):
+                task.cancel()
+            raise
+
+        # Combine all suppliers
+        all_suppliers = panel_suppliers + web_suppliers
+
+        benchmark_summary = await self._get_benchmark_summary(part_info, all_suppliers, emit)
+
+        return PartAnalysisResponse(
+            benchmark_summary=benchmark_summary,
+            technical_spec=technical_specs[0] if technical_specs else None,
+            technical_specs=technical_specs,
+            suppliers=all_suppliers,
+            success=True,
+            message=f"Successfully analyzed part {part_number}"
+        )
+
+    async def stream_part_analysis(self, part_number: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Analyze a part, yielding (event, payload) pairs as stages complete and
+        finally ("result", PartAnalysisResponse). Errors propagate to the caller.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(
+            self.analyze_part(part_number, emit=lambda event, payload: events.put_nowait((event, payload)))
+        )
+        task.add_done_callback(lambda _: events.put_nowait(None))
+        try:
+            while (item := await events.get()) is not None:
+                yield item
+            yield "result", task.result()
+        finally:
+            task.cancel()
+
+    async def analyze_parts(self, part_numbers: List[str], concurrency: int) -> AsyncIterator[Union[PartAnalysisResponse, ErrorResponse]]:
+        """
+        Analyze many parts with at most `concurrency` analyses in flight,
+        yielding each result as soon as it finishes (completion order).
+
+        Part info and benchmark suppliers are looked up in bulk for every
+        BATCH_PREFETCH_SIZE parts. Queues are bounded, so only a few chunks
+        of work and results exist at any time however large the batch is.
+        """
+        part_numbers = [p.strip() for p in part_numbers if p and p.strip()]
+        concurrency = max(1, concurrency)
+        chunk_size = max(1, config.BATCH_PREFETCH_SIZE)
+        work: asyncio.Queue = asyncio.Queue(maxsize=max(concurrency, chunk_size))
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+        done = object()
+
+        async def feed():
+            for start in range(0, len(part_numbers), chunk_size):
+                chunk = part_numbers[start:start + chunk_size]
+                prefetched = await self._prefetch(chunk)
+                for part_number in chunk:
+                    await work.put((part_number, prefetched))
+            for _ in range(concurrency):
+                await work.put(done)
+
+        async def worker():
+            while True:
+                item = await work.get()
+                if item is done:
+                    return
+                part_number, prefetched = item
+                try:
+                    result = await self.analyze_part(part_number, self._prefetched_for(part_number, prefetched))
+                except Exception as e:
+                    print(f"Error analyzing part {part_number}: {e}")
+                    result = ErrorResponse(
+                        message=f"Error analyzing part {part_number}: {str(e)}",
+                        error_code="ANALYSIS_FAILED",
+                        part_number=part_number
+                    )
+                await results.put(result)
+
+        tasks = [asyncio.create_task(feed())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for _ in range(len(part_numbers)):
+                yield await results.get()
+        finally:
+            # Also reached when the client disconnects mid-stream
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _prefetch(self, part_numbers: List[str]) -> Optional[Dict[str, Any]]:
+        """Bulk-load part info and benchmark suppliers for one chunk of a batch"""
+        try:
+            parts_info, suppliers = await asyncio.gather(
+                self.data_service.get_parts_info(part_numbers),
+                self.data_service.get_benchmark_suppliers_bulk(part_numbers)
+            )
+            return {"part_info": parts_info, "panel_suppliers": suppliers}
+        except Exception as e:
+            # Fall back to per-part lookups for this chunk
+            print(f"Error prefetching batch data: {e}")
+            return None
+
+    def _prefetched_for(self, part_number: str, prefetched: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Slice one part's data out of a chunk prefetch"""
+        if prefetched is None:
+            return None
+        return {
+            "part_info": prefetched["part_info"].get(part_number),
+            "panel_suppliers": prefetched["panel_suppliers"].get(part_number, [])
+        }
+
+    async def _get_part_info(self, part_number: str, prefetched: Optional[Dict[str, Any]] = None) -> PartInfo:
+        """Stage 1: part information from MASTER_FILE (demo data when missing)"""
+        if prefetched is not None:
+            part_info = prefetched["part_info"]
+        else:
+            part_info = await self.data_service.get_part_info(part_number)
+        if not part_info:
+            # Create demo part info for testing when not found in database
+            part_info = PartInfo(
+                part_number=part_number,
+                part_name=f"Demo Part {part_number}",
+                material="Demo Material",
+                material2="Demo Material 2",
+                currency="EUR",
+                current_supplier="Demo Supplier GmbH",
+                current_price=4.36,
+                annual_volume=416580,
+                annual_total_spend=1816291
+            )
+        return part_info
+
+    async def _get_technical_specs(self, part_number: str, emit: Optional[EmitCallback] = None) -> List[TechnicalSpec]:
+        """Stage 2: technical specification files (emits the primary spec, then the full list)"""
+        technical_specs = await asyncio.to_thread(self.file_service.find_technical_specs, part_number)
+        if emit:
+            emit("technical_spec", technical_specs[0] if technical_specs else None)
+            emit("technical_specs", technical_specs)
+        return technical_specs
+
+    async def _get_panel_suppliers(self, part_number: str, prefetched: Optional[Dict[str, Any]] = None) -> List[SupplierInfo]:
+        """
+        Stage 3: benchmark suppliers. Parts without a PARTS_BENCHMARKS row
+        borrow the panel of their most similar benchmarked part, and only
+        then fall back to demo suppliers.
+        """
+        if prefetched is not None:
+            panel_suppliers = prefetched["panel_suppliers"]
+        else:
+            panel_suppliers = await self.data_service.get_benchmark_suppliers(part_number)
+        if not panel_suppliers:
+            panel_suppliers = await self._similar_part_suppliers(part_number)
+        if not panel_suppliers:
+            panel_suppliers = self._demo_panel_suppliers()
+        return panel_suppliers
+
+    async def _similar_part_suppliers(self, part_number: str) -> List[SupplierInfo]:
+        """Benchmark suppliers of the closest similar part that has any"""
+        try:
+            similar = await asyncio.to_thread(
+                self.file_service.find_similar_parts, part_number, config.SIMILAR_PARTS_FALLBACK_K
+            )
+            if not similar:
+                return []
+            suppliers_by_part = await self.data_service.get_benchmark_suppliers_bulk(
+                [s["part_number"] for s in similar]
+            )
+        except SimilarPartsNotReady:
+            # First build still running in the background; skip the fallback rather than wait
+            return []
+        except Exception as e:
+            print(f"Error finding similar part suppliers for {part_number}: {e}")
+            return []
+
+        for s in similar:
+            suppliers = suppliers_by_part.get(s["part_number"])
+            if suppliers:
+                note = f"Benchmark supplier for similar part {s['part_number']} (similarity {s['similarity']:.2f})"
+                return [
+                    supplier.model_copy(update={
+                        "is_current_supplier": False,
+                        "description": f"{supplier.description} - {note}" if supplier.description else note
+                    })
+                    for supplier in suppliers
+                ]
+        return []
+
+    async def _get_web_suppliers(
+        self,
+        part_number: str,
+        part_info_task: "asyncio.Task[PartInfo]",
+        emit: Optional[EmitCallback] = None
+    ) -> List[SupplierInfo]:
+        """Stage 4: web alternatives, which need the part name and material from stage 1"""
+        part_info = await part_info_task
+        return await self.web_scraper.search_alternative_suppliers(
+            part_number=part_number,
+            part_name=part_info.part_name,
+            material=part_info.material,
+            on_supplier=(lambda supplier: emit("web_supplier", supplier)) if emit else None
+        )
+
+    async def _get_benchmark_summary(
+        self,
+        part_info: PartInfo,
+        suppliers: List[SupplierInfo],
+        emit: Optional[EmitCallback] = None
+    ) -> BenchmarkSummary:
+        """Stage 5: LLM analysis, forwarding tokens and finished sections through `emit`"""
+        if not emit:
+            return await self.ai_agent.generate_benchmark_analysis(part_info=part_info, suppliers=suppliers)
+        benchmark_summary = None
+        async for event, payload in self.ai_agent.stream_benchmark_analysis(part_info, suppliers):
+            if event == "benchmark_summary":
+                benchmark_summary = payload
+            emit(event, payload)
+        return benchmark_summary
+
+    async def _emitting(self, event: str, stage: Awaitable[T], emit: Optional[EmitCallback]) -> T:
+        """Await a stage and report its result through `emit`"""
+        result = await stage
+        if emit:
+            emit(event, result)
+        return result
+
+    def _demo_panel_suppliers(self) -> List[SupplierInfo]:
+        """Demo panel suppliers used when PARTS_BENCHMARKS has no row for the part"""
+        return [
+            SupplierInfo(
+                supplier_number="SUP999",
+                supplier_name="Global Parts Ltd",
+                supplier_contact_name="John Smith",
+                supplier_contact_email="john@globalparts.com",
+                supplier_manufacturing_location="Munich, Germany",
+                website="https://globalparts.com",
+                description="Leading supplier of industrial components",
+                price=3.71,
+                currency="EUR",
+                is_panel_supplier=True,
+                is_current_supplier=False
+            ),
+            SupplierInfo(
+                supplier_number="SUP001",
+                supplier_name="Euro Components GmbH",
+                supplier_contact_name="Maria Schmidt",
+                supplier_contact_email="maria@eurocomponents.de",
+                supplier_manufacturing_location="Berlin, Germany",
+                website="https://eurocomponents.de",
+                description="Specialized in precision engineering",
+                price=4.15,
+                currency="EUR",
+                is_panel_supplier=True,
+                is_current_supplier=False
+            )
+        ]
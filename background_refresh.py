@@ -0,0 +1,61 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+class BackgroundRefresher(ABC):
+    """
+    Base of the in-process snapshots kept fresh by a background task
+    (e.g. SupplierCatalog).
+
+    Subclasses implement refresh(); start() runs it straight away and then
+    every `refresh_interval` seconds until stop(). A refresh that raises is
+    logged and kept in last_error, and the loop carries on. A subclass's
+    refresh() sets loaded_at when it succeeds.
+    """
+
+    refresh_label = "snapshot"  # What is refreshed, for log lines
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @abstractmethod
+    async def refresh(self) -> Any:
+        """Reload the snapshot once"""
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Refresh now and keep refreshing in the background"""
+        if not self.is_running:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error refreshing {self.refresh_label}: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    def refresh_status(self) -> Dict[str, Any]:
+        """Age, interval and last error, for the subclasses' status()"""
+        return {
+            "loaded_at": datetime.fromtimestamp(self.loaded_at, tz=timezone.utc).isoformat() if self.loaded_at else None,
+            "age_seconds": round(time.time() - self.loaded_at, 1) if self.loaded_at else None,
+            "refresh_interval_seconds": self.refresh_interval,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config import config
+from background_refresh import BackgroundRefresher
+from supabase_client import SupabaseClient, TableLoadError, _row_part_number, benchmark_supplier_columns, rows_to_columns
+
+# Descriptive PARTS_BENCHMARKS columns kept per part
+TEXT_COLUMNS = ["partname", "currency", "currentsuppliernumber", "currentsuppliername"]
+
+class BenchmarkIndex:
+    """
+    PARTS_BENCHMARKS in memory, one row per part, in two layouts:
+
+    - wide: parts x supplier columns price matrix (NaN where a supplier did
+      not quote), as used for portfolio savings
+    - long: one entry per quote (part, supplier, price), grouped by part for
+      part -> quotes and by supplier (cheapest first) for supplier -> parts,
+      each group found through an offsets array without scanning the table
+
+    Supplier columns are whatever the table has (see
+    BENCHMARK_SUPPLIER_COLUMN_PATTERN). Immutable once built.
+    """
+
+    def __init__(
+        self,
+        part_numbers: List[str],
+        supplier_columns: List[str],
+        prices: np.ndarray,
+        text: Dict[str, np.ndarray]
+    ):
+        self.part_numbers = part_numbers
+        self.supplier_columns = supplier_columns
+        self.prices = prices
+        self.text = text
+        self.rows = {part_number: i for i, part_number in enumerate(part_numbers)}
+        self.columns = {supplier: j for j, supplier in enumerate(supplier_columns)}
+        n, k = prices.shape
+
+        # Long format; np.nonzero walks the matrix row by row, so quotes come grouped by part
+        quoted = ~np.isnan(prices)
+        self.quote_part, self.quote_supplier = np.nonzero(quoted)
+        self.quote_price = prices[self.quote_part, self.quote_supplier]
+        self._part_offsets = np.concatenate([[0], np.cumsum(quoted.sum(axis=1))])
+        self._by_supplier = np.lexsort((self.quote_price, self.quote_supplier))
+        self._supplier_offsets = np.concatenate([[0], np.cumsum(np.bincount(self.quote_supplier, minlength=k))])
+
+        with np.errstate(invalid='ignore'):
+            positive = np.where(prices > 0, prices, np.nan)
+        self.best_price = np.fmin.reduce(positive, axis=1) if k else np.full(n, np.nan)
+        self.quote_count = quoted.sum(axis=1)
+
+        digest = hashlib.sha1("|".join(supplier_columns).encode('utf-8'))
+        digest.update("\n".join(part_numbers).encode('utf-8'))
+        digest.update(prices.tobytes())
+        for values in text.values():
+            digest.update(values.tobytes())
+        self.fingerprint = digest.hexdigest()
+
+    def __contains__(self, part_number: str) -> bool:
+        return part_number in self.rows
+
+    def count(self) -> int:
+        return len(self.part_numbers)
+
+    def quotes(self, part_number: str) -> List[Dict[str, Any]]:
+        """Every quote for a part, cheapest first ([] for unknown parts)"""
+        row = self.rows.get(part_number)
+        if row is None:
+            return []
+        entries = np.arange(self._part_offsets[row], self._part_offsets[row + 1])
+        entries = entries[np.argsort(self.quote_price[entries], kind='stable')]
+        return [
+            {"supplier_number": self.supplier_columns[int(self.quote_supplier[e])], "price": float(self.quote_price[e])}
+            for e in entries
+        ]
+
+    def benchmark_record(self, part_number: str) -> Optional[Dict[str, Any]]:
+        """The part's PARTS_BENCHMARKS row (quoted supplier columns only), or None"""
+        row = self.rows.get(part_number)
+        if row is None:
+            return None
+        record: Dict[str, Any] = {"partnumber": part_number}
+        record.update({name: str(values[row]) or None for name, values in self.text.items()})
+        for e in range(self._part_offsets[row], self._part_offsets[row + 1]):
+            record[self.supplier_columns[int(self.quote_supplier[e])]] = float(self.quote_price[e])
+        return record
+
+    def benchmark_records(self, part_numbers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Rows for several parts, keyed by part number; unknown parts are skipped"""
+        return {str(n): self.benchmark_record(str(n)) for n in part_numbers if n and str(n) in self.rows}
+
+    def supplier_quote_counts(self) -> Dict[str, int]:
+        """Number of parts each supplier column quoted"""
+        counts = np.diff(self._supplier_offsets)
+        return {supplier: int(counts[j]) for j, supplier in enumerate(self.supplier_columns)}
+
+    def supplier_parts(self, supplier_number: str, limit: int = 100, offset: int = 0) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        One page of the parts a supplier quoted, cheapest quote first, and
+        the number of them; None if the supplier has no price column.
+        """
+        column = self.columns.get(supplier_number)
+        if column is None:
+            return None
+        entries = self._by_supplier[self._supplier_offsets[column]:self._supplier_offsets[column + 1]]
+        page = []
+        for e in entries[offset:offset + limit]:
+            row = int(self.quote_part[e])
+            price = float(self.quote_price[e])
+            best_price = self.best_price[row]
+            current_supplier = str(self.text["currentsuppliernumber"][row]) or None
+            page.append({
+                "part_number": self.part_numbers[row],
+                "part_name": str(self.text["partname"][row]) or None,
+                "currency": str(self.text["currency"][row]) or None,
+                "price": price,
+                "best_price": None if np.isnan(best_price) else float(best_price),
+                "is_best_quote": bool(price == best_price),
+                "quote_count": int(self.quote_count[row]),
+                "current_supplier_number": current_supplier,
+                "is_current_supplier": current_supplier == supplier_number,
+            })
+        return page, len(entries)
+
+class BenchmarkIndexBuilder:
+    """
+    Converts PARTS_BENCHMARKS pages as they arrive; supplier columns are
+    discovered from the first row. build() keeps the first row of every part.
+    """
+
+    def __init__(self):
+        self.supplier_columns: Optional[List[str]] = None
+        self._part_numbers: List[str] = []
+        self._prices: List[np.ndarray] = []
+        self._text: Dict[str, List[np.ndarray]] = {name: [] for name in TEXT_COLUMNS}
+
+    def add(self, rows: List[Dict[str, Any]]):
+        """Convert one page of rows"""
+        if not rows:
+            return
+        if self.supplier_columns is None:
+            self.supplier_columns = benchmark_supplier_columns(rows[0])
+        columns = rows_to_columns(rows, {
+            **dict.fromkeys(TEXT_COLUMNS, str),
+            **dict.fromkeys(self.supplier_columns, np.float64)
+        })
+        prices = np.column_stack([columns[c] for c in self.supplier_columns]) if self.supplier_columns else np.zeros((len(rows), 0))
+        self._prices.append(prices)
+        for name in TEXT_COLUMNS:
+            self._text[name].append(columns[name])
+        self._part_numbers.extend(_row_part_number(row) for row in rows)
+
+    def build(self) -> BenchmarkIndex:
+        first_rows: Dict[str, int] = {}
+        for i, part_number in enumerate(self._part_numbers):
+            first_rows.setdefault(part_number, i)
+        keep = np.fromiter(first_rows.values(), dtype=np.int64, count=len(first_rows))
+        supplier_columns = self.supplier_columns or []
+        prices = np.concatenate(self._prices)[keep] if self._prices else np.zeros((0, len(supplier_columns)))
+        text = {
+            name: np.concatenate(chunks)[keep] if chunks else np.array([], dtype=str)
+            for name, chunks in self._text.items()
+        }
+        return BenchmarkIndex(list(first_rows), list(supplier_columns), np.ascontiguousarray(prices), text)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> BenchmarkIndex:
+        builder = cls()
+        builder.add(rows)
+        return builder.build()
+
+class PartsBenchmarks(BackgroundRefresher):
+    """
+    In-process BenchmarkIndex, loaded and refreshed like the SupplierCatalog:
+    PARTS_BENCHMARKS is streamed page by page, converted off the event loop
+    and swapped in; a failed refresh keeps the previous index, and an
+    unchanged table keeps the same object so results cached on it stay valid.
+    """
+
+    refresh_label = "PARTS_BENCHMARKS"
+
+    def __init__(self, supabase: SupabaseClient, refresh_interval: Optional[float] = None):
+        super().__init__(refresh_interval or config.BENCHMARKS_REFRESH_INTERVAL)
+        self.supabase = supabase
+        self.index: Optional[BenchmarkIndex] = None
+        self.load_seconds: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.index is not None
+
+    async def refresh(self) -> bool:
+        """Reload PARTS_BENCHMARKS; returns False (keeping the old index) on failure"""
+        async with self._refresh_lock:
+            start = time.perf_counter()
+            builder = BenchmarkIndexBuilder()
+            try:
+                async for page in self.supabase.iter_parts_benchmarks_pages():
+                    await asyncio.to_thread(builder.add, page)
+            except TableLoadError as e:
+                self.last_error = f"Failed to load PARTS_BENCHMARKS: {e}"
+                print(f"⚠️  {self.last_error} - keeping previous benchmark index")
+                return False
+            index = await asyncio.to_thread(builder.build)
+            self.load_seconds = time.perf_counter() - start
+            if self.index is None or self.index.fingerprint != index.fingerprint:
+                self.index = index
+            self.loaded_at = time.time()
+            self.last_error = None
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        index = self.index
+        return {
+            "loaded": self.is_loaded,
+            "part_count": index.count() if index else 0,
+            "quote_count": int(len(index.quote_price)) if index else 0,
+            "supplier_columns": index.supplier_columns if index else [],
+            "load_ms": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+            **self.refresh_status()
+        }
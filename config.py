@@ -10,17 +10,69 @@ class Config:
     # Supabase Configuration
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+    SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    SUPPLIER_CATALOG_REFRESH_INTERVAL = int(os.getenv("SUPPLIER_CATALOG_REFRESH_INTERVAL", "900"))
+    SUPABASE_PAGE_SIZE = int(os.getenv("SUPABASE_PAGE_SIZE", "1000"))
+    SUPABASE_PREFETCH_PAGES = int(os.getenv("SUPABASE_PREFETCH_PAGES", "4"))
+    MASTER_ANALYTICS_REFRESH_INTERVAL = int(os.getenv("MASTER_ANALYTICS_REFRESH_INTERVAL", "900"))
+    MASTER_ANALYTICS_YEAR = int(os.getenv("MASTER_ANALYTICS_YEAR", "0"))
+    BENCHMARKS_REFRESH_INTERVAL = int(os.getenv("BENCHMARKS_REFRESH_INTERVAL", "900"))
+    BENCHMARK_SUPPLIER_COLUMN_PATTERN = os.getenv("BENCHMARK_SUPPLIER_COLUMN_PATTERN", r"SUP\d+")
     
     # OpenAI Configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4")
     
+    # LLM Analysis Cache
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "True").lower() == "true"
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    
     # File Paths
     SPECS_DIRECTORY = os.getenv("SPECS_DIRECTORY", "./SPECS")
+    CACHE_DIRECTORY = os.getenv("CACHE_DIRECTORY", "./.cache")
+    SPEC_INDEX_PATH = os.getenv("SPEC_INDEX_PATH", os.path.join(CACHE_DIRECTORY, "spec_index.json"))
+    SPEC_INDEX_RESTAT_INTERVAL = float(os.getenv("SPEC_INDEX_RESTAT_INTERVAL", "30"))
+    SPEC_TEXT_CACHE_TTL = int(os.getenv("SPEC_TEXT_CACHE_TTL", str(365 * 24 * 3600)))
+    SPEC_TEXT_CACHE_MAX_ENTRIES = int(os.getenv("SPEC_TEXT_CACHE_MAX_ENTRIES", "200000"))
+    SPEC_ATTRIBUTES_PATH = os.getenv("SPEC_ATTRIBUTES_PATH", os.path.join(CACHE_DIRECTORY, "spec_attributes.npz"))
+    SIMILAR_PARTS_DIRECTORY = os.getenv("SIMILAR_PARTS_DIRECTORY", os.path.join(CACHE_DIRECTORY, "similar_parts"))
+    SIMILAR_PARTS_MAX_TERMS = int(os.getenv("SIMILAR_PARTS_MAX_TERMS", "256"))
+    SIMILAR_PARTS_TEXT_WEIGHT = float(os.getenv("SIMILAR_PARTS_TEXT_WEIGHT", "0.5"))
+    SIMILAR_PARTS_FALLBACK_K = int(os.getenv("SIMILAR_PARTS_FALLBACK_K", "5"))
+    SPEC_SEARCH_DIRECTORY = os.getenv("SPEC_SEARCH_DIRECTORY", os.path.join(CACHE_DIRECTORY, "spec_search"))
+    SPEC_SEARCH_MAX_SEGMENTS = int(os.getenv("SPEC_SEARCH_MAX_SEGMENTS", "8"))
+    SPEC_MAX_PAGES = int(os.getenv("SPEC_MAX_PAGES", "50"))
+    SPEC_INGEST_WORKERS = int(os.getenv("SPEC_INGEST_WORKERS", str(os.cpu_count() or 2)))
+    SPEC_INGEST_TIMEOUT = float(os.getenv("SPEC_INGEST_TIMEOUT", "60"))
+    SPEC_DOWNLOAD_CACHE_CONTROL = os.getenv("SPEC_DOWNLOAD_CACHE_CONTROL", "private, max-age=3600, must-revalidate")
+    SPEC_BUNDLE_MAX_PARTS = int(os.getenv("SPEC_BUNDLE_MAX_PARTS", "200"))
+    SPEC_BLOB_DIRECTORY = os.getenv("SPEC_BLOB_DIRECTORY", os.path.join(CACHE_DIRECTORY, "spec_blobs"))
+    SPEC_UPLOAD_MAX_BYTES = int(os.getenv("SPEC_UPLOAD_MAX_BYTES", str(100 * 1024 * 1024)))
+    SPEC_PART_NUMBER_PATTERN = os.getenv("SPEC_PART_NUMBER_PATTERN", r"(?<![A-Za-z0-9])[A-Z]{1,5}-\d+(?![0-9])")
+    
+    # Local Supabase Mirror ("supabase" reads go over the network, "mirror" reads the local SQLite copy)
+    DATA_SOURCE = os.getenv("DATA_SOURCE", "supabase").lower()
+    SUPABASE_MIRROR_PATH = os.getenv("SUPABASE_MIRROR_PATH", os.path.join(CACHE_DIRECTORY, "supabase_mirror.sqlite3"))
+    SUPABASE_MIRROR_SYNC_INTERVAL = int(os.getenv("SUPABASE_MIRROR_SYNC_INTERVAL", "300"))
+    SUPABASE_MIRROR_FULL_SYNC_INTERVAL = int(os.getenv("SUPABASE_MIRROR_FULL_SYNC_INTERVAL", str(24 * 3600)))
+    SUPABASE_MIRROR_WATERMARK_COLUMN = os.getenv("SUPABASE_MIRROR_WATERMARK_COLUMN", "updated_at")
     
     # Web Scraping Configuration
     MAX_ALTERNATIVE_SUPPLIERS = int(os.getenv("MAX_ALTERNATIVE_SUPPLIERS", "5"))
     WEB_SCRAPING_TIMEOUT = int(os.getenv("WEB_SCRAPING_TIMEOUT", "30"))
+    WEB_SEARCH_CONCURRENCY = int(os.getenv("WEB_SEARCH_CONCURRENCY", "4"))
+    WEB_SEARCH_CACHE_ENABLED = os.getenv("WEB_SEARCH_CACHE_ENABLED", "True").lower() == "true"
+    WEB_SEARCH_CACHE_TTL = int(os.getenv("WEB_SEARCH_CACHE_TTL", str(24 * 3600)))
+    WEB_SEARCH_NEGATIVE_CACHE_TTL = int(os.getenv("WEB_SEARCH_NEGATIVE_CACHE_TTL", "3600"))
+    WEB_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("WEB_SEARCH_CACHE_MAX_ENTRIES", "50000"))
+    
+    # Batch Analysis Configuration
+    BATCH_ANALYSIS_CONCURRENCY = int(os.getenv("BATCH_ANALYSIS_CONCURRENCY", "4"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+    BATCH_PREFETCH_SIZE = int(os.getenv("BATCH_PREFETCH_SIZE", "50"))
     
     # API Configuration
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from config import config
+
+# Settings that default to a path under CACHE_DIRECTORY
+CACHE_PATHS = {
+    "SPEC_INDEX_PATH": "spec_index.json",
+    "SPEC_ATTRIBUTES_PATH": "spec_attributes.npz",
+    "SIMILAR_PARTS_DIRECTORY": "similar_parts",
+    "SPEC_SEARCH_DIRECTORY": "spec_search",
+    "SPEC_BLOB_DIRECTORY": "spec_blobs",
+    "SUPABASE_MIRROR_PATH": "supabase_mirror.sqlite3",
+}
+
+@pytest.fixture(autouse=True)
+def isolated_cache_directory(tmp_path, monkeypatch):
+    """Keep SQLite caches and persisted indexes created by tests out of ./.cache"""
+    cache_directory = tmp_path / ".cache"
+    monkeypatch.setattr(config, "CACHE_DIRECTORY", str(cache_directory))
+    for name, default in CACHE_PATHS.items():
+        if hasattr(config, name):
+            monkeypatch.setattr(config, name, os.path.join(cache_directory, default))
+    return cache_directory
@@ -1,92 +1,143 @@
+import asyncio
 from typing import List, Optional, Dict, Any
 from schemas import PartInfo, SupplierInfo
 from supabase_client import SupabaseClient
+from supplier_catalog import SupplierCatalog
+from master_analytics import MasterFileAnalytics, MasterFileSnapshot
+from benchmark_index import PartsBenchmarks
 
 class DataService:
-    def __init__(self):
-        self.supabase = SupabaseClient()
+    def __init__(
+        self,
+        supabase: Optional[SupabaseClient] = None,
+        supplier_catalog: Optional[SupplierCatalog] = None,
+        master_analytics: Optional[MasterFileAnalytics] = None,
+        parts_benchmarks: Optional[PartsBenchmarks] = None
+    ):
+        self.supabase = supabase or SupabaseClient()
+        self.supplier_catalog = supplier_catalog
+        self.master_analytics = master_analytics
+        self.parts_benchmarks = parts_benchmarks
     
-    def get_part_info(self, part_number: str) -> Optional[PartInfo]:
+    def _master_snapshot(self) -> Optional[MasterFileSnapshot]:
+        """The loaded MASTER_FILE analytics snapshot, or None (query Supabase)"""
+        if self.master_analytics is not None:
+            return self.master_analytics.snapshot
+        return None
+    
+    def _supplier_lookup(self):
+        """In-memory supplier lookup once the catalog snapshot is loaded, else None (query Supabase)"""
+        if self.supplier_catalog is not None and self.supplier_catalog.is_loaded:
+            return self.supplier_catalog.get_many
+        return None
+    
+    def _benchmark_lookup(self):
+        """In-memory PARTS_BENCHMARKS lookup once the benchmark index is loaded, else None (query Supabase)"""
+        if self.parts_benchmarks is not None and self.parts_benchmarks.is_loaded:
+            return self.parts_benchmarks.index.benchmark_records
+        return None
+    
+    async def get_part_info(self, part_number: str) -> Optional[PartInfo]:
         """
-        Retrieve part information from MASTER_FILE table via Supabase.
+        Retrieve part information from the MASTER_FILE analytics snapshot, or
+        from the MASTER_FILE table via Supabase for parts not in it yet.
         """
-        master_record = self.supabase.get_part_info(part_number)
+        snapshot = self._master_snapshot()
+        if snapshot is not None and part_number in snapshot:
+            return snapshot.part_info(part_number)
+        
+        master_record = await self.supabase.get_part_info(part_number)
         
         if not master_record:
             return None
         
-        # Calculate annual volume for 2025
-        volume_columns_2025 = [
-            'voljan2025', 'volfeb2025', 'volmar2025', 'volapr2025',
-            'volmay2025', 'voljun2025', 'voljul2025', 'volaug2025',
-            'volsep2025', 'voloct2025', 'volnov2025', 'voldec2025'
-        ]
-        
-        annual_volume = sum(
-            master_record.get(col, 0) or 0 
-            for col in volume_columns_2025
-        )
-        
-        # Calculate average price for 2025
-        price_columns_2025 = [
-            'pricejan2025', 'pricefeb2025', 'pricemar2025', 'priceapr2025',
-            'pricemay2025', 'pricejun2025', 'pricejul2025', 'priceaug2025',
-            'pricesep2025', 'priceoct2025', 'pricenov2025', 'pricedec2025'
-        ]
-        
-        prices = [master_record.get(col) for col in price_columns_2025]
-        prices = [p for p in prices if p is not None]
-        current_price = sum(prices) / len(prices) if prices else 0
-        
-        annual_total_spend = annual_volume * current_price
+        return self._part_info_from_record(master_record)
+    
+    async def get_parts_info(self, part_numbers: List[str]) -> Dict[str, PartInfo]:
+        """
+        Retrieve part information for several parts: from the analytics
+        snapshot where possible, the rest with one MASTER_FILE query.
+        Parts that are not found are missing from the result.
+        """
+        parts: Dict[str, PartInfo] = {}
+        snapshot = self._master_snapshot()
+        if snapshot is not None:
+            parts = {n: snapshot.part_info(n) for n in part_numbers if n in snapshot}
+        missing = [n for n in part_numbers if n not in parts]
+        if missing:
+            master_records = await self.supabase.get_parts_info(missing)
+            parts.update({
+                part_number: self._part_info_from_record(record)
+                for part_number, record in master_records.items()
+            })
+        return parts
+    
+    async def get_part_analytics(self, part_number: str) -> Optional[Dict[str, Any]]:
+        """
+        Volume/price metrics and monthly series of a part (see
+        master_analytics.METRICS), computed from its MASTER_FILE row if the
+        snapshot does not have it.
+        """
+        snapshot = self._master_snapshot()
+        if snapshot is not None and part_number in snapshot:
+            return snapshot.get(part_number)
         
-        return PartInfo(
-            part_number=str(master_record.get('partnumber', '')),
-            part_name=str(master_record.get('partname', '')),
-            material=str(master_record.get('material', '')) if master_record.get('material') else None,
-            material2=str(master_record.get('material2', '')) if master_record.get('material2') else None,
-            currency=str(master_record.get('currency', '')),
-            current_supplier=str(master_record.get('suppliername', '')),
-            current_price=current_price,
-            annual_volume=annual_volume,
-            annual_total_spend=annual_total_spend
-        )
+        master_record = await self.supabase.get_part_info(part_number)
+        if not master_record:
+            return None
+        snapshot = self._single_row_snapshot(master_record)
+        return snapshot.get(snapshot.part_numbers[0])
     
-    def get_benchmark_suppliers(self, part_number: str) -> List[SupplierInfo]:
+    def _single_row_snapshot(self, master_record: Dict[str, Any]) -> MasterFileSnapshot:
+        """
+        Snapshot of one MASTER_FILE row, in the analytics year of the loaded
+        snapshot (the portfolio's latest year, not just this row's); the
+        configured year only applies until a snapshot is loaded.
+        """
+        snapshot = self._master_snapshot()
+        if snapshot is not None:
+            year = snapshot.year
+        else:
+            year = self.master_analytics.year if self.master_analytics is not None else 0
+        return MasterFileSnapshot.from_rows([master_record], year)
+    
+    def _part_info_from_record(self, master_record: Dict[str, Any]) -> PartInfo:
+        """
+        Build PartInfo from a MASTER_FILE row, with the same metrics as the
+        analytics snapshot.
+        """
+        snapshot = self._single_row_snapshot(master_record)
+        return snapshot.part_info(snapshot.part_numbers[0])
+    
+    async def get_benchmark_suppliers(self, part_number: str) -> List[SupplierInfo]:
         """
         Retrieve benchmark supplier information from PARTS_BENCHMARKS and SUPPLIER_PANEL_CATALOG via Supabase.
         """
-        suppliers_data = self.supabase.get_benchmark_suppliers(part_number)
-        suppliers = []
-        
-        for supplier_data in suppliers_data:
-            supplier = SupplierInfo(
-                supplier_number=str(supplier_data.get('suppliernumber', '')),
-                supplier_name=str(supplier_data.get('suppliername', '')),
-                supplier_contact_name=str(supplier_data.get('suppliercontactname', '')) if supplier_data.get('suppliercontactname') else None,
-                supplier_contact_email=str(supplier_data.get('suppliercontactemail', '')) if supplier_data.get('suppliercontactemail') else None,
-                supplier_manufacturing_location=str(supplier_data.get('suppliermanufacturinglocation', '')) if supplier_data.get('suppliermanufacturinglocation') else None,
-                website=str(supplier_data.get('website', '')) if supplier_data.get('website') else None,
-                description=str(supplier_data.get('description', '')) if supplier_data.get('description') else None,
-                price=supplier_data.get('price'),
-                currency=supplier_data.get('currency'),
-                is_current_supplier=supplier_data.get('is_current_supplier', False),
-                is_panel_supplier=supplier_data.get('is_panel_supplier', False)
-            )
-            suppliers.append(supplier)
-        
-        return suppliers
+        suppliers_data = await self.supabase.get_benchmark_suppliers(part_number, self._supplier_lookup(), self._benchmark_lookup())
+        return [self._supplier_info_from_record(supplier_data) for supplier_data in suppliers_data]
     
-    def get_all_suppliers_for_part(self, part_number: str) -> List[SupplierInfo]:
+    async def get_benchmark_suppliers_bulk(self, part_numbers: List[str]) -> Dict[str, List[SupplierInfo]]:
+        """
+        Retrieve benchmark suppliers for several parts with two bulk queries.
+        Parts without a PARTS_BENCHMARKS row are missing from the result.
+        """
+        suppliers_by_part = await self.supabase.get_benchmark_suppliers_bulk(part_numbers, self._supplier_lookup(), self._benchmark_lookup())
+        return {
+            part_number: [self._supplier_info_from_record(supplier_data) for supplier_data in suppliers_data]
+            for part_number, suppliers_data in suppliers_by_part.items()
+        }
+    
+    async def get_all_suppliers_for_part(self, part_number: str) -> List[SupplierInfo]:
         """
         Get all suppliers (current + benchmark) for a part.
         """
-        part_info = self.get_part_info(part_number)
+        part_info, suppliers = await asyncio.gather(
+            self.get_part_info(part_number),
+            self.get_benchmark_suppliers(part_number)
+        )
         if not part_info:
             return []
         
-        suppliers = self.get_benchmark_suppliers(part_number)
-        
         # Add current supplier if not already in the list
         current_supplier_exists = any(s.is_current_supplier for s in suppliers)
         if not current_supplier_exists and part_info:
@@ -100,15 +151,25 @@ class DataService:
         
         return suppliers
     
-    def get_supplier_details(self, supplier_number: str) -> Optional[SupplierInfo]:
+    async def get_supplier_details(self, supplier_number: str) -> Optional[SupplierInfo]:
         """
-        Get detailed supplier information from SUPPLIER_PANEL_CATALOG via Supabase.
+        Get detailed supplier information from the SUPPLIER_PANEL_CATALOG
+        snapshot (or via Supabase until the snapshot is loaded).
         """
-        supplier_data = self.supabase.get_supplier_details(supplier_number)
+        if self.supplier_catalog is not None and self.supplier_catalog.is_loaded:
+            supplier_data = self.supplier_catalog.get(supplier_number)
+        else:
+            supplier_data = await self.supabase.get_supplier_details(supplier_number)
         
         if not supplier_data:
             return None
         
+        return self._supplier_info_from_record(supplier_data, is_panel_supplier=True)
+    
+    def _supplier_info_from_record(self, supplier_data: Dict[str, Any], is_panel_supplier: Optional[bool] = None) -> SupplierInfo:
+        """
+        Build SupplierInfo from a SUPPLIER_PANEL_CATALOG row (optionally joined with benchmark fields).
+        """
         return SupplierInfo(
             supplier_number=str(supplier_data.get('suppliernumber', '')),
             supplier_name=str(supplier_data.get('suppliername', '')),
@@ -117,5 +178,8 @@ class DataService:
             supplier_manufacturing_location=str(supplier_data.get('suppliermanufacturinglocation', '')) if supplier_data.get('suppliermanufacturinglocation') else None,
             website=str(supplier_data.get('website', '')) if supplier_data.get('website') else None,
             description=str(supplier_data.get('description', '')) if supplier_data.get('description') else None,
-            is_panel_supplier=True
-        ) 
\ No newline at end of file
+            price=supplier_data.get('price'),
+            currency=supplier_data.get('currency'),
+            is_current_supplier=supplier_data.get('is_current_supplier', False),
+            is_panel_supplier=supplier_data.get('is_panel_supplier', False) if is_panel_supplier is None else is_panel_supplier
+        )
@@ -0,0 +1,166 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional, Tuple
+import anyio
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+from config import config
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiable(Exception):
+    """The Range header does not overlap the file"""
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    Strong ETag from the file's identity (size and nanosecond mtime). It is
+    the same in every worker and on every replica serving the same files, and
+    changes whenever the file is rewritten.
+    """
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+def _parse_http_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak: W/ prefixes are ignored)"""
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def is_not_modified(request_headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    """True if the client's cached copy is current; If-None-Match takes precedence over If-Modified-Since"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and int(mtime) <= since
+    return False
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte positions of a single "bytes=" range, or None to
+    serve the whole file (no header, a malformed one, or several ranges).
+    Raises RangeNotSatisfiable when the range starts past the end of the file.
+    """
+    if not header:
+        return None
+    match = _BYTE_RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    first = int(first)
+    if last != "" and int(last) < first:
+        return None  # "bytes=500-100" is invalid, ignore it
+    if first >= size:
+        raise RangeNotSatisfiable()
+    return first, size - 1 if last == "" else min(int(last), size - 1)
+
+def _if_range_matches(header: Optional[str], etag: str, mtime: float) -> bool:
+    """If-Range: a partial response is only allowed if the validator still matches exactly"""
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag  # Strong comparison; weak tags never match
+    since = _parse_http_date(header)
+    return since is not None and int(mtime) == since
+
+class RangeFileResponse(FileResponse):
+    """FileResponse that sends only bytes first..last of the file"""
+
+    def __init__(self, path: str, first: int, last: int, **kwargs):
+        super().__init__(path, **kwargs)
+        self.first = first
+        self.last = last
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        remaining = 0 if self.send_header_only else self.last - self.first + 1
+        if remaining > 0:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(self.first)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break  # File was truncated under us
+                    remaining -= len(chunk)
+                    if remaining > 0:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                    else:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": False})
+                        return await self._run_background()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        await self._run_background()
+
+    async def _run_background(self):
+        if self.background is not None:
+            await self.background()
+
+def conditional_file_response(
+    request_headers: Mapping[str, str],
+    path: str,
+    filename: str,
+    media_type: str,
+    method: str = "GET",
+    cache_control: Optional[str] = None
+) -> Response:
+    """
+    Serve a file with validators and partial content:
+
+    - ETag / Last-Modified on every response, 304 when If-None-Match or
+      If-Modified-Since shows the client's copy is current
+    - a single Range -> 206 with Content-Range (honouring If-Range),
+      416 when it is out of bounds; multiple ranges get the full file
+    - Cache-Control from SPEC_DOWNLOAD_CACHE_CONTROL
+    """
+    stat_result = os.stat(path)
+    size = stat_result.st_size
+    etag = file_etag(stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": cache_control or config.SPEC_DOWNLOAD_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if is_not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if _if_range_matches(request_headers.get("if-range"), etag, stat_result.st_mtime):
+        try:
+            byte_range = parse_range(request_headers.get("range"), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        first, last, status_code = 0, size - 1, 200
+    else:
+        first, last = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    headers["Content-Length"] = str(last - first + 1)
+    return RangeFileResponse(
+        path,
+        first,
+        last,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+        filename=filename,
+        method=method
+    )
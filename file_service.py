@@ -1,60 +1,356 @@
 import os
-import glob
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 from config import config
 from schemas import TechnicalSpec
+from spec_index import SpecIndex
+from spec_text_cache import get_spec_text_cache, read_spec_text, SPEC_EXTENSIONS
+from spec_ingest import get_spec_ingestor
+from spec_search import SpecSearchIndex, tokenize
+from similar_parts import SimilarPartsIndex, SimilarPartsNotReady, files_signature
+from spec_attributes import SpecAttributeTable
+from spec_store import SpecBlobStore
 
 class FileService:
     def __init__(self):
         self.specs_directory = Path(config.SPECS_DIRECTORY)
+        self.spec_index = SpecIndex(self.specs_directory)
+        self.spec_search = SpecSearchIndex()
+        self.spec_attributes = SpecAttributeTable()
+        self.similar_parts = SimilarPartsIndex()
+        self.spec_blobs = SpecBlobStore()
+        self._unextractable: Dict[str, Tuple[int, int]] = {}  # filename -> (size, mtime_ns) that failed extraction
+        self._similar_parts_lock = threading.Lock()  # held for a whole rebuild
+        self._similar_parts_schedule_lock = threading.Lock()
+        self._similar_parts_thread: Optional[threading.Thread] = None
     
     def find_technical_spec(self, part_number: str) -> Optional[TechnicalSpec]:
         """
         Find technical specification file for a given part number.
         Returns TechnicalSpec object if found, None otherwise.
         """
-        if not self.specs_directory.exists():
-            return None
+        specs = self.find_technical_specs(part_number)
+        
+        # Get the first matching file
+        return specs[0] if specs else None
+    
+    def find_technical_specs(self, part_number: str) -> List[TechnicalSpec]:
+        """
+        Find every technical specification file for a given part number
+        (exact part number match via the spec index, sorted by filename).
+        """
+        from urllib.parse import quote
         
-        # Search for files containing the part number
-        search_pattern = f"*{part_number}*"
-        matching_files = list(self.specs_directory.glob(search_pattern))
+        specs = []
+        for filename, file_size, _ in self.spec_index.files_for_part(part_number):
+            file_path = self.specs_directory / filename
+            
+            # Create download URL (relative to API base) - URL encode the filename
+            encoded_filename = quote(filename)
+            download_url = f"/api/files/download/{encoded_filename}"
+            
+            # Attach hash/keywords if the file was already ingested (never extracts here)
+            extracted = self.get_spec_metadata(file_path)
+            
+            specs.append(TechnicalSpec(
+                filename=filename,
+                file_path=str(file_path),
+                file_size=file_size,
+                file_type=file_path.suffix.lower(),
+                download_url=download_url,
+                sha256=extracted["sha256"] if extracted else None,
+                keywords=extracted["keywords"] if extracted else None
+            ))
         
-        if not matching_files:
+        return specs
+    
+    def get_spec_metadata(self, file_path: Path) -> Optional[Dict]:
+        """
+        Cached extraction ({"sha256", "keywords", "text"}) for a spec file,
+        or None if it has not been ingested yet (see spec_ingest.py).
+        "text" is None when only the keywords were extracted.
+        """
+        try:
+            return get_spec_text_cache().lookup(str(file_path), need_text=False)
+        except OSError:
+            return None
+    
+    def refresh_spec_search(self) -> Optional[Dict[str, int]]:
+        """
+        Bring the full-text search index up to date with SPECS_DIRECTORY:
+        new and changed specs are extracted (in the spec ingest process pool)
+        and indexed, removed ones are dropped. Returns None if nothing changed.
+        Specs the ingest pool failed to extract are not retried on every
+        search, only once they change on disk.
+        """
+        files = {
+            name: info for name, info in self.spec_index.files().items()
+            if Path(name).suffix.lower() in SPEC_EXTENSIONS and self._unextractable.get(name) != info
+        }
+        if self.spec_search.is_current(files):
             return None
         
-        # Get the first matching file
-        file_path = matching_files[0]
+        get_spec_ingestor().ingest_files([str(self.specs_directory / name) for name in sorted(files)])
+        stats = self.spec_search.sync(files, self._cached_text)
+        self._unextractable = {name: files[name] for name in self.spec_search.missing(files)}
+        print(f"Spec search index updated: {stats}")
+        return stats
+    
+    def _cached_text(self, filename: str) -> Optional[str]:
+        try:
+            cached = get_spec_text_cache().lookup(str(self.specs_directory / filename))
+            return cached["text"] if cached else None
+        except OSError:
+            return None
+    
+    def upload_filename(self, part_number: str, filename: str) -> Optional[str]:
+        """
+        Name an uploaded spec is stored under: the upload's filename, prefixed
+        with the part number if it does not contain it (so the spec index
+        maps it to the part). None if the filename or part number is invalid.
+        """
+        name = filename.strip()
+        if (
+            not name
+            or name != os.path.basename(name)
+            or name.startswith(".")
+            or Path(name).suffix.lower() not in SPEC_EXTENSIONS
+        ):
+            return None
+        if part_number not in self.spec_index.part_numbers_in(name):
+            name = f"{part_number} {name}"
+            if part_number not in self.spec_index.part_numbers_in(name):
+                return None
+        return name
+    
+    def add_uploaded_spec(self, filename: str, content_hash: str) -> Dict:
+        """
+        Publish a blob from the spec store as SPECS_DIRECTORY/<filename> and
+        add it to the spec index without a rescan. If the same content was
+        extracted before (e.g. a datasheet shared with another part), the
+        text cache entry is reused.
+        """
+        target = self.specs_directory / filename
+        self.spec_index.ensure_current()
+        link = self.spec_blobs.link(content_hash, target)
+        size, _ = self.spec_index.add_file(filename)
+        try:
+            text_cached = get_spec_text_cache().link(str(target), content_hash)
+        except OSError:
+            text_cached = False
+        return {"filename": filename, "size": size, "link": link, "text_cached": text_cached}
+    
+    def index_spec_file(self, filename: str) -> Dict[str, int]:
+        """
+        Add one new or replaced spec (already extracted into the text cache)
+        to the search index and, for drawings, the attribute table. Only that
+        file is read; other specs are checked by size/mtime only.
+        """
+        files = {
+            name: info for name, info in self.spec_index.files().items()
+            if Path(name).suffix.lower() in SPEC_EXTENSIONS
+        }
+        stats = self.spec_search.sync(files, self._cached_text)
+        if Path(filename).suffix.lower() == '.txt':
+            self.refresh_spec_attributes()
+        return stats
+    
+    def search_specs(self, query: str, limit: int = 10) -> Dict:
+        """
+        Ranked full-text search over spec files (BM25), with the part numbers,
+        download URL and a text snippet of each hit.
+        """
+        from urllib.parse import quote
         
-        # Get file information
-        file_size = file_path.stat().st_size
-        file_type = file_path.suffix.lower()
+        self.refresh_spec_search()
+        hits, total = self.spec_search.search(query, limit)
         
-        # Create download URL (relative to API base) - URL encode the filename
-        from urllib.parse import quote
-        encoded_filename = quote(file_path.name)
-        download_url = f"/api/files/download/{encoded_filename}"
+        text_cache = get_spec_text_cache()
+        results = []
+        for hit in hits:
+            filename = hit["filename"]
+            try:
+                cached = text_cache.lookup(str(self.specs_directory / filename))
+            except OSError:
+                cached = None
+            results.append({
+                **hit,
+                "part_numbers": self.spec_index.part_numbers_in(filename),
+                "download_url": f"/api/files/download/{quote(filename)}",
+                "snippet": self._snippet(cached["text"] if cached else "", hit["matched_terms"])
+            })
+        return {"results": results, "total_matches": total}
+    
+    def refresh_spec_attributes(self) -> SpecAttributeTable:
+        """
+        Bring the drawing attribute table up to date with the .txt drawings in
+        SPECS_DIRECTORY (only new or changed drawings are parsed) and return it.
+        """
+        files = {
+            name: info for name, info in self.spec_index.files().items()
+            if Path(name).suffix.lower() == '.txt' and self.spec_index.part_numbers_in(name)
+        }
+        if not self.spec_attributes.is_current(files):
+            parsed = self.spec_attributes.refresh(
+                files,
+                part_number_for=lambda name: self.spec_index.part_numbers_in(name)[0],
+                read_text=lambda name: read_spec_text(str(self.specs_directory / name))
+            )
+            print(f"Spec attribute table updated: {parsed} drawings parsed")
+        return self.spec_attributes
+    
+    def get_part_attributes(self, part_number: str) -> Optional[Dict]:
+        """Structured attributes parsed from a part's drawing, or None if it has none"""
+        return self.refresh_spec_attributes().get(part_number)
+    
+    def _similar_parts_files(self) -> Dict[str, Tuple[int, int]]:
+        return {
+            name: info for name, info in self.spec_index.files().items()
+            if Path(name).suffix.lower() in SPEC_EXTENSIONS and self.spec_index.part_numbers_in(name)
+        }
+    
+    def refresh_similar_parts(self) -> SimilarPartsIndex:
+        """
+        Rebuild the similar-parts matrix if any spec file changed since it was
+        built (spec text comes from the text cache, filled by the ingest pool).
+        Blocking and potentially slow; request handlers use
+        current_similar_parts(), which runs this in a background thread.
+        """
+        with self._similar_parts_lock:
+            files = self._similar_parts_files()
+            signature = files_signature(files)
+            if self.similar_parts.is_current(signature):
+                return self.similar_parts
+            # Another worker may have built it already, or be building it now
+            with self.similar_parts.build_lock():
+                self.similar_parts.reload()
+                if self.similar_parts.is_current(signature):
+                    return self.similar_parts
+                
+                attributes = self.refresh_spec_attributes()
+                paths = [str(self.specs_directory / name) for name in sorted(files)]
+                get_spec_ingestor().ingest_files(paths)
+                text_cache = get_spec_text_cache()
+                
+                part_terms: Dict[str, List[str]] = {}
+                for name, path in zip(sorted(files), paths):
+                    try:
+                        cached = text_cache.lookup(path)
+                    except OSError:
+                        cached = None
+                    terms = tokenize(cached["text"]) if cached and cached["text"] else []
+                    for part_number in self.spec_index.part_numbers_in(name):
+                        part_terms.setdefault(part_number, []).extend(terms)
+                
+                part_numbers = sorted(part_terms)
+                self.similar_parts.build(signature, part_numbers, [part_terms[p] for p in part_numbers], attributes)
+            print(f"Similar parts index rebuilt: {len(part_numbers)} parts")
+            return self.similar_parts
+    
+    def _refresh_similar_parts_in_background(self):
+        try:
+            self.refresh_similar_parts()
+        except Exception as e:
+            print(f"⚠️  Similar parts index rebuild failed: {e}")
+    
+    def schedule_similar_parts_refresh(self) -> bool:
+        """Start a background rebuild unless one is already running; returns True if one was started"""
+        with self._similar_parts_schedule_lock:
+            thread = self._similar_parts_thread
+            if thread is not None and thread.is_alive():
+                return False
+            thread = threading.Thread(
+                target=self._refresh_similar_parts_in_background, name="similar-parts-refresh", daemon=True
+            )
+            self._similar_parts_thread = thread
+            thread.start()
+            return True
+    
+    def current_similar_parts(self) -> SimilarPartsIndex:
+        """
+        The similar-parts index for the request path: never builds inline.
+        A stale index (specs changed since it was built) is served while a
+        background rebuild runs; raises SimilarPartsNotReady if no build
+        exists yet.
+        """
+        thread = self._similar_parts_thread
+        if thread is None or not thread.is_alive():
+            signature = files_signature(self._similar_parts_files())
+            if not self.similar_parts.is_current(signature):
+                self.similar_parts.reload()
+                if not self.similar_parts.is_current(signature):
+                    self.schedule_similar_parts_refresh()
+        if not self.similar_parts.is_built:
+            raise SimilarPartsNotReady("Similar parts index is being built")
+        return self.similar_parts
+    
+    def find_similar_parts(self, part_number: str, k: int = 10) -> Optional[List[Dict]]:
+        """
+        The k most similar parts by spec text and drawing attributes, with a
+        few attributes of each for display; None if the part has no specs.
+        Raises SimilarPartsNotReady until the first build has finished.
+        """
+        hits = self.current_similar_parts().similar(part_number, k)
+        if hits is None:
+            return None
         
-        return TechnicalSpec(
-            filename=file_path.name,
-            file_path=str(file_path),
-            file_size=file_size,
-            file_type=file_type,
-            download_url=download_url
-        )
+        results = []
+        for similar_part, score in hits:
+            attributes = self.spec_attributes.get(similar_part) or {}
+            results.append({
+                "part_number": similar_part,
+                "similarity": score,
+                "title": attributes.get("title"),
+                "material": attributes.get("material"),
+                "filler_type": attributes.get("filler_type"),
+                "filler_pct": attributes.get("filler_pct"),
+                "bounding_volume_cm3": attributes.get("bounding_volume_cm3")
+            })
+        return results
+    
+    def _snippet(self, text: str, terms: List[str], width: int = 160) -> str:
+        """Whitespace-collapsed excerpt around the first matched term"""
+        text = " ".join(text.split())
+        lowered = text.lower()
+        positions = [p for p in (lowered.find(term) for term in terms) if p >= 0]
+        start = max(0, min(positions) - width // 4) if positions else 0
+        excerpt = text[start:start + width]
+        return ("…" if start > 0 else "") + excerpt + ("…" if start + width < len(text) else "")
     
     def get_file_path(self, filename: str) -> Optional[Path]:
         """
         Get the full file path for a given filename.
         """
-        file_path = self.specs_directory / filename
+        file_path = Path(os.path.abspath(self.specs_directory / filename))
         
+        # Reject names that point outside the specs directory ("../config.py") and
+        # hidden entries (in-flight upload links, an old in-tree ".blobs" store);
+        # symlinks into the upload blob store are followed when the file is opened
+        if Path(os.path.abspath(self.specs_directory)) not in file_path.parents:
+            return None
+        if any(part.startswith(".") for part in Path(filename).parts):
+            return None
         if not file_path.exists() or not file_path.is_file():
             return None
         
         return file_path
     
+    def bundle_entries(self, part_numbers: List[str]) -> Tuple[List[Tuple[str, Path]], List[str]]:
+        """
+        Archive entries ("<part number>/<filename>", path) for every spec of
+        the given parts, plus the part numbers that have no spec files.
+        """
+        entries = []
+        missing = []
+        for part_number in dict.fromkeys(part_numbers):
+            files = self.spec_index.files_for_part(part_number)
+            if not files:
+                missing.append(part_number)
+            for filename, _, _ in files:
+                entries.append((f"{part_number}/{filename}", self.specs_directory / filename))
+        return entries, missing
+    
     def get_file_content(self, filename: str) -> Optional[bytes]:
         """
         Get file content as bytes for download.
@@ -75,17 +371,11 @@ class FileService:
         """
         List all available part numbers based on files in SPECS directory.
         """
-        if not self.specs_directory.exists():
-            return []
-        
         parts = []
-        for file_path in self.specs_directory.iterdir():
-            if file_path.is_file():
-                # Extract part number from filename
-                filename = file_path.name
-                # Look for PA-XXXXX pattern
-                if 'PA-' in filename:
-                    # Extract the part number
-                    parts.append(filename)
+        for filename in sorted(self.spec_index.filenames()):
+            # Look for PA-XXXXX pattern
+            if 'PA-' in filename:
+                # Extract the part number
+                parts.append(filename)
         
-        return parts 
\ No newline at end of file
+        return parts
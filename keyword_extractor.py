@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Single-pass keyword extraction for spec text.
+
+Every vocabulary term (materials, filler grades, processes, applications)
+is compiled into one regular expression whose alternations are factored
+as a trie, so each page is scanned once for all four fields. Labelled
+lines ("Material: PA66 15%GF") win over bare vocabulary hits elsewhere on
+the page, so a material mentioned in a note above the label does not
+shadow it. Pages are consumed as a stream and scanning stops after the
+first page on which every field is resolved; most specs resolve
+everything on page one, so later PDF pages are never extracted at all.
+
+Compare against the previous four-regex extractor on a spec directory with:
+
+    python keyword_extractor.py [SPECS_DIRECTORY]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+KEYWORD_FIELDS = ("material", "grade", "process", "application")
+
+# Polymer abbreviations are matched case-sensitively ("PC", not "pc")
+MATERIAL_CODES = [
+    "PA6", "PA66", "PA-6", "PA-66", "PA 6", "PA 66", "PA11", "PA12", "PA46", "PPA",
+    "PPS", "PBT", "PET", "POM", "PC", "PP", "ABS", "ASA", "SAN", "PEEK", "PEI",
+    "PSU", "PPSU", "LCP", "TPU", "TPE", "HDPE", "LDPE", "PE", "PMMA", "PVC",
+]
+# Generic and trade names are matched case-insensitively
+MATERIAL_NAMES = [
+    "Polyamide", "Polypropylene", "Polycarbonate", "Polyethylene", "Polyoxymethylene",
+    "Polyphenylene sulfide", "Nylon", "Acetal", "Celstran", "Celestran", "Celanese",
+    "Durethan", "Ultramid", "Zytel", "Ryton", "Fortron", "Delrin", "Makrolon", "Lexan",
+    "Pocan", "Hostaform", "Vestamid", "Grilamid", "Stanyl",
+]
+# Filler codes followed by a two-digit percentage, e.g. GF30, CF40, BKV35
+FILLER_CODES = ["GF", "CF", "GB", "MF", "MD", "BKV", "AKV"]
+PROCESSES = [
+    "injection molding", "injection moulding", "injection molded", "injection moulded",
+    "insert molding", "insert moulding", "insert molded", "insert moulded",
+    "overmolding", "overmoulding", "overmolded", "overmoulded",
+    "blow molding", "blow moulding", "blow molded", "blow moulded",
+    "compression molding", "compression moulding", "compression molded", "compression moulded",
+    "rotational molding", "rotational moulding", "rotationally molded", "rotationally moulded",
+    "thermoforming", "thermoformed", "extrusion", "extruded",
+]
+APPLICATIONS = [
+    "automotive", "electrical", "electronic", "connector", "housing", "enclosure",
+    "base", "module", "gear", "bearing", "bracket", "bushing", "clip", "cover", "sensor",
+]
+
+_FILLER_PERCENT = re.compile(r"(\d{1,2})\s*%\s*(glass|carbon|GF|CF)", re.I)
+# "- Material: PA66 15%GF", "Process = injection molded"; group 1 is the label, group 2 the value
+_LABELLED_LINE = re.compile(
+    r"^[^\w\n]*(material|grade|process|application)s?[ \t]*[:=][ \t]*([^\n]*)", re.I | re.M
+)
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation for `words`, factored by common prefix; spaces match any whitespace"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch != ""
+        ]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return build(trie)
+
+def _normalize_grade(match_text: str) -> str:
+    """'35% glass fibers' / '15% GF' -> 'GF35' / 'GF15'; filler codes are returned as written"""
+    percent = _FILLER_PERCENT.match(match_text)
+    if not percent:
+        return match_text
+    code = percent.group(2).upper()
+    return {"GLASS": "GF", "CARBON": "CF"}.get(code, code) + percent.group(1)
+
+class KeywordExtractor:
+    """
+    Compiled multi-pattern matcher. Per field, a hit under its own label
+    beats a hit in another labelled line, which beats a bare hit; ties go
+    to the first in reading order.
+    """
+
+    def __init__(
+        self,
+        material_codes: List[str] = MATERIAL_CODES,
+        material_names: List[str] = MATERIAL_NAMES,
+        filler_codes: List[str] = FILLER_CODES,
+        processes: List[str] = PROCESSES,
+        applications: List[str] = APPLICATIONS
+    ):
+        # The leading lookahead lets the regex engine skip non-alphanumeric positions cheaply
+        word_start, word_end = r"(?=[A-Za-z0-9])(?<![A-Za-z0-9])", r"(?![A-Za-z0-9])"
+        # Grades may run into a suffix ("BKV35H2.0"), so they only need to end on a non-digit
+        grade = (
+            f"(?:{_trie_pattern(filler_codes)})\\d{{2}}(?![0-9])"
+            r"|\d{1,2}\s*%\s*(?:GF|CF|(?i:(?:glass|carbon)\s*-?\s*fib(?:er|re)s?))" + word_end
+        )
+        self.pattern = re.compile(
+            word_start + "(?:"
+            f"(?P<material>(?:{_trie_pattern(material_codes)}|(?i:{_trie_pattern(material_names)})){word_end})"
+            f"|(?P<grade>{grade})"
+            f"|(?P<process>(?i:{_trie_pattern(processes)}){word_end})"
+            f"|(?P<application>(?i:{_trie_pattern(applications)}){word_end})"
+            ")"
+        )
+
+    def extract(self, text: str) -> Dict[str, str]:
+        return self.extract_from_pages([text])
+
+    def extract_from_pages(self, pages: Iterable[str]) -> Dict[str, str]:
+        """
+        Best match of each field across `pages`. A field is settled on the
+        first page that yields it, and no further pages are pulled once every
+        field is settled, so pass a lazy iterator to skip extracting the rest
+        of the document.
+        """
+        keywords = {field: "" for field in KEYWORD_FIELDS}
+        for page in pages:
+            for field, value in self._extract_page(page).items():
+                if not keywords[field]:
+                    keywords[field] = value
+            if all(keywords.values()):
+                break
+        return keywords
+
+    def _extract_page(self, page: str) -> Dict[str, str]:
+        # rank 0: under its own label, 1: in another labelled line, 2: bare
+        best: Dict[str, tuple] = {}
+
+        def offer(match: "re.Match", rank: int):
+            field = match.lastgroup
+            if field not in best or rank < best[field][0]:
+                value = match.group(field)
+                best[field] = (rank, _normalize_grade(value) if field == "grade" else value)
+
+        labelled_spans = []
+        for line in _LABELLED_LINE.finditer(page):
+            label = line.group(1).lower()
+            labelled_spans.append(line.span(2))
+            for match in self.pattern.finditer(line.group(2)):
+                offer(match, 0 if match.lastgroup == label else 1)
+            if len(best) == len(KEYWORD_FIELDS) and all(rank == 0 for rank, _ in best.values()):
+                break
+        if len(best) < len(KEYWORD_FIELDS):
+            for match in self.pattern.finditer(page):
+                if match.lastgroup in best:
+                    continue
+                if any(start <= match.start() < end for start, end in labelled_spans):
+                    continue
+                offer(match, 2)
+                if len(best) == len(KEYWORD_FIELDS):
+                    break
+        return {field: value for field, (_, value) in best.items()}
+
+_default_extractor: Optional[KeywordExtractor] = None
+
+def get_keyword_extractor() -> KeywordExtractor:
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = KeywordExtractor()
+    return _default_extractor
+
+def extract_keywords(text: str) -> Dict[str, str]:
+    """Material, grade, process and application found in spec text"""
+    return get_keyword_extractor().extract(text)
+
+def extract_keywords_from_pages(pages: Iterable[str]) -> Dict[str, str]:
+    """Like extract_keywords, reading pages lazily and stopping once every field is found"""
+    return get_keyword_extractor().extract_from_pages(pages)
+
+def _legacy_extract_keywords(text: str) -> Dict[str, str]:
+    """The previous four-regex extractor, kept as the benchmark baseline"""
+    keywords = {field: "" for field in KEYWORD_FIELDS}
+    material_match = re.search(r'(PPS|PA6|PA-6|Polyamide|Polypropylene|Polycarbonate|Celstran|Celanese|[A-Z]{2,10}-[A-Z0-9\-]+)', text)
+    if material_match:
+        keywords["material"] = material_match.group(0)
+    grade_match = re.search(r'([A-Z]{2,10}-[A-Z0-9\-]+|CF\d{2}|GF\d{2}|BKV\d{2})', text)
+    if grade_match:
+        keywords["grade"] = grade_match.group(0)
+    process_match = re.search(r'(injection molding|extrusion|blow molding|compression molding)', text, re.I)
+    if process_match:
+        keywords["process"] = process_match.group(0)
+    app_match = re.search(r'(automotive|electrical|connector|housing|base|module|gear|bearing)', text, re.I)
+    if app_match:
+        keywords["application"] = app_match.group(0)
+    return keywords
+
+def main():
+    # Imported here: spec_text_cache imports this module
+    from spec_text_cache import iter_spec_pages, SPEC_EXTENSIONS
+    from config import config
+
+    parser = argparse.ArgumentParser(description="Benchmark the keyword extractor against the previous implementation")
+    parser.add_argument("directory", nargs="?", default=config.SPECS_DIRECTORY, help="Spec directory to scan")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation (best time is reported)")
+    args = parser.parse_args()
+
+    directory = Path(args.directory)
+    if not directory.is_dir():
+        print(f"❌ Spec directory not found: {directory}")
+        sys.exit(1)
+    paths = sorted(str(p) for p in directory.iterdir() if p.is_file() and p.suffix.lower() in SPEC_EXTENSIONS)
+
+    def run_legacy():
+        # Old behaviour: join the text of every page, then run four searches
+        return [_legacy_extract_keywords(" ".join(iter_spec_pages(path, max_pages=0))) for path in paths]
+
+    def run_streaming():
+        pages_read = 0
+        results = []
+        for path in paths:
+            def counted(pages):
+                nonlocal pages_read
+                for page in pages:
+                    pages_read += 1
+                    yield page
+            results.append(extract_keywords_from_pages(counted(iter_spec_pages(path, max_pages=0))))
+        run_streaming.pages_read = pages_read
+        return results
+
+    timings = {}
+    outputs = {}
+    for name, run in (("legacy", run_legacy), ("streaming", run_streaming)):
+        best = None
+        for _ in range(max(1, args.repeat)):
+            start = time.perf_counter()
+            outputs[name] = run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+
+    total_pages = sum(1 for path in paths for _ in iter_spec_pages(path, max_pages=0))
+    resolved = {
+        name: sum(1 for keywords in result for field in KEYWORD_FIELDS if keywords[field])
+        for name, result in outputs.items()
+    }
+    print(f"{len(paths)} spec files, {total_pages} pages")
+    print(f"  legacy:    {timings['legacy'] * 1000:8.1f} ms, {resolved['legacy']} fields resolved, {total_pages} pages read")
+    print(
+        f"  streaming: {timings['streaming'] * 1000:8.1f} ms, {resolved['streaming']} fields resolved, "
+        f"{run_streaming.pages_read} pages read"
+    )
+    differing = sum(
+        1 for old, new in zip(outputs["legacy"], outputs["streaming"])
+        for field in KEYWORD_FIELDS if old[field] and old[field] != new[field]
+    )
+    print(f"  {differing} fields differ from legacy (see test_keyword_extractor_golden.json for the reviewed cases)")
+    if timings["streaming"] > 0:
+        print(f"  speedup:   {timings['legacy'] / timings['streaming']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,39 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Any
+from pydantic import BaseModel
 import os
+import json
+import time
+import asyncio
 import mimetypes
 
-from supabase_client import SupabaseClient
+from supabase_client import SupabaseClient, transport
 from data_service import DataService
+from supplier_catalog import SupplierCatalog
+from master_analytics import MasterFileAnalytics, METRICS
+from portfolio_savings import PortfolioSavings, SAVINGS_SORT_KEYS
+from benchmark_index import PartsBenchmarks
+from supabase_mirror import SupabaseMirror, MirrorSupabaseClient, MirrorSync
 from file_service import FileService
 from web_scraper import WebScraper
 from ai_agent import AIAgent
+from analysis_service import AnalysisService
+from spec_ingest import get_spec_ingestor
+from file_responses import conditional_file_response
+from spec_bundle import iter_zip_bundle
+from spec_store import SpecUploadEmpty, SpecUploadTooLarge
+from similar_parts import SimilarPartsNotReady
 from schemas import (
     PartAnalysisRequest, 
     PartAnalysisResponse, 
+    BatchAnalysisRequest,
     ErrorResponse,
     SupplierInfo,
     SearchAlternativesRequest,
+    SpecBundleRequest,
     PartInfo
 )
 from config import config
@@ -43,26 +60,95 @@ app.add_middleware(
         "*"  # Allow all origins (for development and production)
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control", "X-File-Name"],
-    expose_headers=["Content-Type", "Content-Disposition", "Content-Length"],
+    allow_methods=["GET", "HEAD", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=[
+        "Content-Type", "Authorization", "X-Requested-With", "Accept", "Origin", "Cache-Control", "X-File-Name",
+        "Range", "If-None-Match", "If-Modified-Since", "If-Range"
+    ],
+    expose_headers=[
+        "Content-Type", "Content-Disposition", "Content-Length",
+        "ETag", "Last-Modified", "Accept-Ranges", "Content-Range", "X-Missing-Parts"
+    ],
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
-# Initialize services
+# Initialize services (shared across requests; Supabase calls go through one pooled transport)
+remote_supabase = SupabaseClient()
+if config.DATA_SOURCE == "mirror":
+    # Reads come from the local mirror, which a background job keeps in sync with Supabase
+    supabase_mirror = SupabaseMirror()
+    supabase = MirrorSupabaseClient(supabase_mirror)
+    mirror_sync = MirrorSync(remote_supabase, supabase_mirror)
+else:
+    supabase_mirror = None
+    supabase = remote_supabase
+    mirror_sync = None
+supplier_catalog = SupplierCatalog(supabase)
+master_analytics = MasterFileAnalytics(supabase)
+parts_benchmarks = PartsBenchmarks(supabase)
+data_service = DataService(supabase, supplier_catalog, master_analytics, parts_benchmarks)
+portfolio_savings = PortfolioSavings(master_analytics, parts_benchmarks, supplier_catalog)
 file_service = FileService()
 web_scraper = WebScraper()
 ai_agent = AIAgent()
+analysis_service = AnalysisService(
+    data_service=data_service,
+    file_service=file_service,
+    web_scraper=web_scraper,
+    ai_agent=ai_agent
+)
+
+spec_search_warmup = None  # Keeps the startup refresh task referenced
+
+async def warm_spec_search():
+    try:
+        await asyncio.to_thread(file_service.refresh_spec_search)
+    except Exception as e:
+        print(f"⚠️  Spec search index refresh failed: {e}")
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
+    if mirror_sync is not None:
+        if config.SUPABASE_URL and config.SUPABASE_MIRROR_SYNC_INTERVAL > 0:
+            if not supabase_mirror.is_complete():
+                # First run: fill the mirror before the snapshots below load from it
+                await mirror_sync.sync()
+            mirror_sync.start()
+        else:
+            print("ℹ️  Supabase mirror sync disabled - serving the local mirror as is")
+    
     # Test Supabase connection
-    supabase = SupabaseClient()
-    if supabase.test_connection():
+    if await supabase.test_connection():
         print("✅ Supabase connection successful")
     else:
         print("⚠️  Supabase connection failed - some features may not work")
+    
+    # Load the supplier catalog snapshot and keep it fresh in the background
+    supplier_catalog.start()
+    
+    # Load MASTER_FILE into the analytics engine and keep it fresh in the background
+    master_analytics.start()
+    parts_benchmarks.start()
+    
+    # Build/refresh the spec full-text index in the background so the first search is fast
+    global spec_search_warmup
+    spec_search_warmup = asyncio.create_task(warm_spec_search())
+    
+    # Build the similar-parts matrix in a background thread; /similar answers 503 until it exists
+    file_service.schedule_similar_parts_refresh()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections on shutdown"""
+    if mirror_sync is not None:
+        await mirror_sync.stop()
+    await supplier_catalog.stop()
+    await master_analytics.stop()
+    await parts_benchmarks.stop()
+    await transport.aclose()
+    await web_scraper.aclose()
+    get_spec_ingestor().shutdown()
 
 # Global exception handler with CORS headers
 @app.exception_handler(HTTPException)
@@ -201,9 +287,8 @@ async def options_cors_debug():
 async def test_database_connection():
     """Test database connection via Supabase"""
     try:
-        supabase = SupabaseClient()
-        if supabase.test_connection():
-            tables = supabase.list_tables()
+        if await supabase.test_connection():
+            tables = await supabase.list_tables()
             return {
                 "success": True,
                 "message": "Database connection successful",
@@ -260,91 +345,13 @@ async def analyze_part(
     3. Retrieves benchmark supplier data
     4. Searches for alternative suppliers on the web
     5. Generates AI-powered analysis and recommendations
+    
+    Steps 1-3 run concurrently; step 4 waits only for step 1 and
+    step 5 waits for all of them (see AnalysisService).
     """
     
     try:
-        # Initialize data service
-        data_service = DataService()
-        
-        # Step 1: Get part information
-        part_info = data_service.get_part_info(request.part_number)
-        if not part_info:
-            # Create demo part info for testing when not found in database
-            part_info = PartInfo(
-                part_number=request.part_number,
-                part_name=f"Demo Part {request.part_number}",
-                material="Demo Material",
-                material2="Demo Material 2",
-                currency="EUR",
-                current_supplier="Demo Supplier GmbH",
-                current_price=4.36,
-                annual_volume=416580,
-                annual_total_spend=1816291
-            )
-        
-        # Step 2: Get technical specification file
-        technical_spec = file_service.find_technical_spec(request.part_number)
-        
-        # Step 3: Get benchmark suppliers
-        panel_suppliers = data_service.get_benchmark_suppliers(request.part_number)
-        
-        # Add demo suppliers if none found
-        if not panel_suppliers:
-            panel_suppliers = [
-                SupplierInfo(
-                    supplier_number="SUP999",
-                    supplier_name="Global Parts Ltd",
-                    supplier_contact_name="John Smith",
-                    supplier_contact_email="john@globalparts.com",
-                    supplier_manufacturing_location="Munich, Germany",
-                    website="https://globalparts.com",
-                    description="Leading supplier of industrial components",
-                    price=3.71,
-                    currency="EUR",
-                    is_panel_supplier=True,
-                    is_current_supplier=False
-                ),
-                SupplierInfo(
-                    supplier_number="SUP001",
-                    supplier_name="Euro Components GmbH",
-                    supplier_contact_name="Maria Schmidt",
-                    supplier_contact_email="maria@eurocomponents.de",
-                    supplier_manufacturing_location="Berlin, Germany",
-                    website="https://eurocomponents.de",
-                    description="Specialized in precision engineering",
-                    price=4.15,
-                    currency="EUR",
-                    is_panel_supplier=True,
-                    is_current_supplier=False
-                )
-            ]
-        
-        # Step 4: Search for web alternatives
-        web_suppliers = web_scraper.search_alternative_suppliers(
-            part_number=request.part_number,
-            part_name=part_info.part_name,
-            material=part_info.material
-        )
-        
-        # Combine all suppliers
-        all_suppliers = panel_suppliers + web_suppliers
-        
-        # Step 5: Generate AI analysis
-        benchmark_summary = ai_agent.generate_benchmark_analysis(
-            part_info=part_info,
-            suppliers=all_suppliers
-        )
-        
-        # Prepare response
-        response = PartAnalysisResponse(
-            benchmark_summary=benchmark_summary,
-            technical_spec=technical_spec,
-            suppliers=all_suppliers,
-            success=True,
-            message=f"Successfully analyzed part {request.part_number}"
-        )
-        
-        return response
+        return await analysis_service.analyze_part(request.part_number)
         
     except HTTPException:
         raise
@@ -355,6 +362,105 @@ async def analyze_part(
             detail=f"Internal server error: {str(e)}"
         )
 
+def _sse_event(event: str, payload: Any) -> str:
+    """Format one server-sent event with a JSON data field"""
+    if isinstance(payload, BaseModel):
+        data = payload.model_dump(mode="json")
+    elif isinstance(payload, list):
+        data = [item.model_dump(mode="json") if isinstance(item, BaseModel) else item for item in payload]
+    else:
+        data = payload
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.options("/api/analyze-part/stream")
+async def options_analyze_part_stream():
+    """Handle OPTIONS requests for the streaming analyze-part endpoint"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With, Cache-Control",
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/analyze-part/stream")
+async def analyze_part_stream(part_number: str):
+    """
+    Server-sent-events variant of /api/analyze-part.
+    
+    Emits events as each stage completes: part_info, technical_spec
+    (primary spec) and technical_specs (all specs), panel_suppliers, one web_supplier per web result, summary_delta for
+    each LLM token, summary_section as each analysis section completes,
+    benchmark_summary, and finally result with the full PartAnalysisResponse. A failure is
+    reported as an error event carrying an ErrorResponse.
+    """
+    async def event_stream():
+        try:
+            async for event, payload in analysis_service.stream_part_analysis(part_number):
+                yield _sse_event(event, payload)
+        except Exception as e:
+            print(f"Error analyzing part {part_number}: {e}")
+            yield _sse_event("error", ErrorResponse(
+                message=f"Internal server error: {str(e)}",
+                error_code="ANALYSIS_FAILED",
+                part_number=part_number
+            ))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.options("/api/analyze-parts")
+async def options_analyze_parts():
+    """Handle OPTIONS requests for analyze-parts endpoint"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With",
+            "Access-Control-Allow-Credentials": "true",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.post("/api/analyze-parts")
+async def analyze_parts(
+    request: BatchAnalysisRequest
+):
+    """
+    Analyze a batch of parts and stream the results as NDJSON.
+    
+    Each line is a PartAnalysisResponse (or an ErrorResponse with the
+    part_number for parts that failed), written as soon as that part
+    finishes, so lines arrive in completion order rather than request order.
+    """
+    if not request.part_numbers:
+        raise HTTPException(
+            status_code=400,
+            detail="part_numbers must not be empty"
+        )
+    
+    concurrency = min(
+        request.concurrency or config.BATCH_ANALYSIS_CONCURRENCY,
+        config.BATCH_MAX_CONCURRENCY
+    )
+    
+    async def ndjson_lines():
+        async for result in analysis_service.analyze_parts(request.part_numbers, concurrency):
+            yield result.model_dump_json() + "\n"
+    
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.options("/api/files/download/{filename:path}")
 async def options_download_file(filename: str):
     """Handle OPTIONS requests for file download"""
@@ -362,16 +468,21 @@ async def options_download_file(filename: str):
         content={},
         headers={
             "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Methods": "GET, HEAD, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Range, If-None-Match, If-Modified-Since, If-Range",
+            "Access-Control-Expose-Headers": "Content-Disposition, Content-Length, ETag, Last-Modified, Accept-Ranges, Content-Range",
             "Access-Control-Max-Age": "86400",
         }
     )
 
-@app.get("/api/files/download/{filename:path}")
-async def download_file(filename: str):
+@app.api_route("/api/files/download/{filename:path}", methods=["GET", "HEAD"])
+async def download_file(filename: str, request: Request):
     """
     Download technical specification file.
+    
+    Supports conditional requests (ETag / If-None-Match, If-Modified-Since -> 304)
+    and single byte ranges (Range -> 206) so browsers and PDF viewers can
+    revalidate cached copies and fetch pages on demand.
     """
     try:
         # URL decode the filename in case it contains spaces or special characters
@@ -392,10 +503,12 @@ async def download_file(filename: str):
             mime_type = "application/octet-stream"
         
         # Return the file directly from the SPECS directory
-        return FileResponse(
-            path=str(file_path),
+        return conditional_file_response(
+            request.headers,
+            str(file_path),
             filename=decoded_filename,
-            media_type=mime_type
+            media_type=mime_type,
+            method=request.method
         )
         
     except HTTPException:
@@ -407,6 +520,55 @@ async def download_file(filename: str):
             detail=f"Error downloading file: {str(e)}"
         )
 
+@app.options("/api/files/bundle")
+async def options_spec_bundle():
+    """Handle OPTIONS requests for the spec bundle endpoint"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With",
+            "Access-Control-Expose-Headers": "Content-Disposition, X-Missing-Parts",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.post("/api/files/bundle")
+async def download_spec_bundle(request: SpecBundleRequest):
+    """
+    Download every spec file of several parts as one ZIP archive.
+    
+    The archive is streamed while it is built (one folder per part), so it
+    never sits in memory or on disk. Part numbers without spec files are
+    listed in the X-Missing-Parts header.
+    """
+    part_numbers = [part_number.strip() for part_number in request.part_numbers if part_number.strip()]
+    if not part_numbers:
+        raise HTTPException(
+            status_code=400,
+            detail="part_numbers must not be empty"
+        )
+    if len(part_numbers) > config.SPEC_BUNDLE_MAX_PARTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.SPEC_BUNDLE_MAX_PARTS} part numbers per bundle"
+        )
+    
+    entries, missing = await asyncio.to_thread(file_service.bundle_entries, part_numbers)
+    if not entries:
+        raise HTTPException(
+            status_code=404,
+            detail="No technical specifications found for the requested parts"
+        )
+    
+    archive_name = f"specs-{time.strftime('%Y%m%d-%H%M%S')}.zip"
+    headers = {"Content-Disposition": f'attachment; filename="{archive_name}"', "Cache-Control": "no-store"}
+    if missing:
+        headers["X-Missing-Parts"] = ",".join(missing)
+    # A sync iterator: Starlette runs each step in the threadpool, so file reads never block the loop
+    return StreamingResponse(iter_zip_bundle(entries), media_type="application/zip", headers=headers)
+
 @app.options("/api/parts/available")
 async def options_available_parts():
     """Handle OPTIONS requests for available parts"""
@@ -439,6 +601,192 @@ async def get_available_parts():
             detail=f"Error retrieving available parts: {str(e)}"
         )
 
+@app.options("/api/specs/search")
+async def options_search_specs():
+    """Handle OPTIONS requests for spec search"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/specs/search")
+async def search_specs(q: str, limit: int = 10):
+    """
+    Full-text search over spec drawings and datasheets, ranked by BM25
+    (e.g. q="PA6 30% GF molded-in inserts").
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Query must not be empty")
+    try:
+        start = time.perf_counter()
+        found = await asyncio.to_thread(file_service.search_specs, q, max(1, min(limit, 100)))
+        return {
+            "success": True,
+            "query": q,
+            "results": found["results"],
+            "count": len(found["results"]),
+            "total_matches": found["total_matches"],
+            "took_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    except Exception as e:
+        print(f"Error searching specs: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching specs: {str(e)}"
+        )
+
+@app.options("/api/parts/{part_number}/attributes")
+async def options_part_attributes(part_number: str):
+    """Handle OPTIONS requests for part attributes"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/parts/{part_number}/attributes")
+async def get_part_attributes(part_number: str):
+    """
+    Structured attributes parsed from the part's dwg.txt drawing (dimensions,
+    bounding volume, material, filler, insert/hole counts, features).
+    """
+    attributes = await asyncio.to_thread(file_service.get_part_attributes, part_number)
+    if attributes is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No drawing found for part {part_number}"
+        )
+    return {
+        "success": True,
+        "part_number": part_number,
+        "attributes": attributes
+    }
+
+@app.options("/api/parts/{part_number}/specs/{filename}")
+async def options_upload_spec(part_number: str, filename: str):
+    """Handle OPTIONS requests for spec upload"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "PUT, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Content-Length, Authorization, X-Requested-With, X-File-Name",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.put("/api/parts/{part_number}/specs/{filename}")
+async def upload_spec(part_number: str, filename: str, request: Request):
+    """
+    Upload a spec file for a part; the request body is the raw file.
+    
+    The body is streamed to the content-addressed spec store while it is
+    hashed, so identical files are stored once and linked per part. The
+    part index, text cache, search index and attribute table are updated
+    for this file only.
+    """
+    from urllib.parse import quote
+    
+    spec_name = file_service.upload_filename(part_number, filename)
+    if spec_name is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid spec filename or part number: {filename}"
+        )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > config.SPEC_UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Spec files are limited to {config.SPEC_UPLOAD_MAX_BYTES} bytes"
+        )
+    
+    try:
+        content_hash, size, created = await file_service.spec_blobs.write_stream(request.stream())
+    except SpecUploadTooLarge:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Spec files are limited to {config.SPEC_UPLOAD_MAX_BYTES} bytes"
+        )
+    except SpecUploadEmpty:
+        raise HTTPException(
+            status_code=400,
+            detail="Empty upload"
+        )
+    
+    try:
+        stored = await asyncio.to_thread(file_service.add_uploaded_spec, spec_name, content_hash)
+    except OSError as e:
+        print(f"Error storing spec {spec_name}: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error storing spec: {str(e)}"
+        )
+    
+    # Extract in the ingest pool (a cache hit when the same content was uploaded before)
+    keywords = None
+    try:
+        extracted = await get_spec_ingestor().extract(str(file_service.specs_directory / spec_name))
+        keywords = extracted["keywords"]
+    except Exception as e:
+        print(f"Error extracting uploaded spec {spec_name}: {e}")
+    await asyncio.to_thread(file_service.index_spec_file, spec_name)
+    
+    return {
+        "success": True,
+        "part_number": part_number,
+        "filename": spec_name,
+        "sha256": content_hash,
+        "size": size,
+        "deduplicated": not created,
+        "link": stored["link"],
+        "download_url": f"/api/files/download/{quote(spec_name)}",
+        "keywords": keywords
+    }
+
+@app.options("/api/parts/{part_number}/similar")
+async def options_similar_parts(part_number: str):
+    """Handle OPTIONS requests for similar parts"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/parts/{part_number}/similar")
+async def get_similar_parts(part_number: str, k: int = 10):
+    """
+    Parts most similar to this one by spec text (TF-IDF) and drawing
+    attributes, ranked by cosine similarity.
+    """
+    try:
+        similar = await asyncio.to_thread(file_service.find_similar_parts, part_number, max(1, min(k, 100)))
+    except SimilarPartsNotReady as e:
+        raise HTTPException(status_code=503, detail=f"{e}, retry shortly")
+    if similar is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No specs found for part {part_number}"
+        )
+    return {
+        "success": True,
+        "part_number": part_number,
+        "similar": similar,
+        "count": len(similar)
+    }
+
 @app.options("/api/suppliers/{part_number}")
 async def options_suppliers_for_part(part_number: str):
     """Handle OPTIONS requests for suppliers endpoint"""
@@ -460,8 +808,7 @@ async def get_suppliers_for_part(
     Get all suppliers (current + benchmark) for a specific part.
     """
     try:
-        data_service = DataService()
-        suppliers = data_service.get_all_suppliers_for_part(part_number)
+        suppliers = await data_service.get_all_suppliers_for_part(part_number)
         
         return {
             "success": True,
@@ -497,8 +844,7 @@ async def get_supplier_details(
     Get detailed information for a specific supplier.
     """
     try:
-        data_service = DataService()
-        supplier = data_service.get_supplier_details(supplier_number)
+        supplier = await data_service.get_supplier_details(supplier_number)
         
         if not supplier:
             raise HTTPException(
@@ -519,6 +865,342 @@ async def get_supplier_details(
             detail=f"Error retrieving supplier details: {str(e)}"
         )
 
+@app.options("/api/supplier/{supplier_number}/parts")
+async def options_supplier_parts(supplier_number: str):
+    """Handle OPTIONS requests for supplier parts"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/supplier/{supplier_number}/parts")
+async def get_supplier_parts(supplier_number: str, limit: int = 100, offset: int = 0):
+    """
+    Parts a panel supplier quoted in PARTS_BENCHMARKS, cheapest quote first,
+    with each part's best quote. Served from the in-memory benchmark index.
+    """
+    index = parts_benchmarks.index
+    if index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Benchmark index not loaded yet: " + (parts_benchmarks.last_error or "loading")
+        )
+    result = index.supplier_parts(supplier_number, max(1, min(limit, 1000)), max(0, offset))
+    if result is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Supplier {supplier_number} has no price column in PARTS_BENCHMARKS"
+        )
+    parts, total = result
+    supplier = supplier_catalog.get(supplier_number) if supplier_catalog.is_loaded else None
+    return {
+        "success": True,
+        "supplier_number": supplier_number,
+        "supplier_name": supplier.get("suppliername") if supplier else None,
+        "parts": parts,
+        "count": len(parts),
+        "total": total
+    }
+
+@app.options("/api/supplier-catalog/status")
+async def options_supplier_catalog_status():
+    """Handle OPTIONS requests for supplier catalog status"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/supplier-catalog/status")
+async def get_supplier_catalog_status():
+    """
+    Report the in-memory supplier catalog snapshot (size, load time, age).
+    """
+    return {
+        "success": True,
+        "catalog": supplier_catalog.status()
+    }
+
+@app.options("/api/supplier-catalog/refresh")
+async def options_supplier_catalog_refresh():
+    """Handle OPTIONS requests for supplier catalog refresh"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.post("/api/supplier-catalog/refresh")
+async def refresh_supplier_catalog():
+    """
+    Reload the supplier catalog snapshot from Supabase now.
+    """
+    refreshed = await supplier_catalog.refresh()
+    if not refreshed:
+        raise HTTPException(
+            status_code=502,
+            detail="Error refreshing supplier catalog: Supabase request failed"
+        )
+    return {
+        "success": True,
+        "catalog": supplier_catalog.status()
+    }
+
+@app.options("/api/mirror/status")
+async def options_mirror_status():
+    """Handle OPTIONS requests for mirror status"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/mirror/status")
+async def get_mirror_status():
+    """
+    Report where reads come from and, with DATA_SOURCE=mirror, what the
+    local mirror holds and how its sync is doing.
+    """
+    return {
+        "success": True,
+        "data_source": config.DATA_SOURCE,
+        "mirror": await asyncio.to_thread(supabase_mirror.status) if supabase_mirror is not None else None,
+        "sync": mirror_sync.status() if mirror_sync is not None else None
+    }
+
+@app.options("/api/mirror/sync")
+async def options_mirror_sync():
+    """Handle OPTIONS requests for mirror sync"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "POST, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type, Authorization",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.post("/api/mirror/sync")
+async def sync_mirror(full: bool = False):
+    """
+    Sync the local mirror from Supabase now (incremental where possible;
+    `full=true` forces a full diff).
+    """
+    if mirror_sync is None:
+        raise HTTPException(status_code=404, detail="The local mirror is not enabled (DATA_SOURCE=mirror)")
+    if not config.SUPABASE_URL:
+        raise HTTPException(status_code=503, detail="SUPABASE_URL is not set; the mirror is served offline")
+    results = await mirror_sync.sync(full)
+    if any("error" in result for result in results):
+        raise HTTPException(status_code=502, detail=f"Error syncing mirror: {mirror_sync.last_error}")
+    return {
+        "success": True,
+        "tables": results
+    }
+
+@app.options("/api/parts/{part_number}/analytics")
+async def options_part_analytics(part_number: str):
+    """Handle OPTIONS requests for part analytics"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/parts/{part_number}/analytics")
+async def get_part_analytics(part_number: str):
+    """
+    Volume and price analytics of a part from MASTER_FILE: annual volume,
+    average and volume-weighted price, spend, YoY growth, rolling 3-month
+    volume and 12-month trends, plus the monthly series.
+    """
+    analytics = await data_service.get_part_analytics(part_number)
+    if analytics is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Part {part_number} not found in MASTER_FILE"
+        )
+    return {
+        "success": True,
+        "part_number": part_number,
+        "analytics": analytics
+    }
+
+def loaded_master_snapshot():
+    """The analytics snapshot, or a 503 while the first MASTER_FILE load is pending"""
+    snapshot = master_analytics.snapshot
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"MASTER_FILE analytics not loaded yet: {master_analytics.last_error or 'loading'}"
+        )
+    return snapshot
+
+@app.options("/api/portfolio/summary")
+async def options_portfolio_summary():
+    """Handle OPTIONS requests for portfolio summary"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/portfolio/summary")
+async def get_portfolio_summary(top: int = 10):
+    """
+    Portfolio totals per currency (spend, volume, YoY growth) and the parts
+    with the highest annual spend, from the MASTER_FILE analytics snapshot.
+    """
+    snapshot = loaded_master_snapshot()
+    return {
+        "success": True,
+        "summary": snapshot.summary(max(1, min(top, 100))),
+        "analytics": master_analytics.status()
+    }
+
+@app.options("/api/portfolio/parts")
+async def options_portfolio_parts():
+    """Handle OPTIONS requests for portfolio parts"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/portfolio/parts")
+async def get_portfolio_parts(
+    sort_by: str = "annual_spend",
+    descending: bool = True,
+    limit: int = 50,
+    offset: int = 0,
+    supplier: str = None,
+    material: str = None,
+    currency: str = None
+):
+    """
+    Every part with its analytics metrics, ranked by any metric and paged;
+    optionally filtered by supplier (name or number), material and currency.
+    """
+    if sort_by not in METRICS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort_by must be one of: {', '.join(METRICS)}"
+        )
+    snapshot = loaded_master_snapshot()
+    parts, total = snapshot.ranking(
+        sort_by,
+        descending,
+        max(1, min(limit, 500)),
+        max(0, offset),
+        supplier=supplier,
+        material=material,
+        currency=currency
+    )
+    return {
+        "success": True,
+        "year": snapshot.year,
+        "sort_by": sort_by,
+        "parts": parts,
+        "count": len(parts),
+        "total": total
+    }
+
+@app.options("/api/portfolio/opportunities")
+async def options_portfolio_opportunities():
+    """Handle OPTIONS requests for portfolio opportunities"""
+    return JSONResponse(
+        content={},
+        headers={
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Methods": "GET, OPTIONS",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Max-Age": "86400",
+        }
+    )
+
+@app.get("/api/portfolio/opportunities")
+async def get_portfolio_opportunities(
+    sort_by: str = "potential_savings",
+    limit: int = 100,
+    offset: int = 0,
+    min_savings: float = 0.0,
+    min_savings_percentage: float = None,
+    supplier: str = None,
+    material: str = None,
+    currency: str = None,
+    alternative_supplier: str = None
+):
+    """
+    Savings opportunities across the whole portfolio: every part priced
+    against its best PARTS_BENCHMARKS quote, ranked and paged. Served from a
+    cached result that is recomputed only when the underlying data changes.
+    """
+    if sort_by not in SAVINGS_SORT_KEYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort_by must be one of: {', '.join(SAVINGS_SORT_KEYS)}"
+        )
+    
+    start = time.perf_counter()
+    table = await asyncio.to_thread(portfolio_savings.table)
+    if table is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Portfolio data not loaded yet: " + (portfolio_savings.status()["last_error"] or "loading")
+        )
+    opportunities, total, totals_by_currency = table.opportunities(
+        sort_by,
+        max(1, min(limit, 1000)),
+        max(0, offset),
+        min_savings=min_savings,
+        min_savings_percentage=min_savings_percentage,
+        supplier=supplier,
+        material=material,
+        currency=currency,
+        alternative_supplier=alternative_supplier,
+        supplier_catalog=supplier_catalog
+    )
+    return {
+        "success": True,
+        "sort_by": sort_by,
+        "opportunities": opportunities,
+        "count": len(opportunities),
+        "total": total,
+        "totals_by_currency": totals_by_currency,
+        "status": portfolio_savings.status(),
+        "took_ms": round((time.perf_counter() - start) * 1000, 1)
+    }
+
 @app.options("/api/search-alternatives")
 async def options_search_alternatives():
     """Handle OPTIONS requests for search alternatives"""
@@ -540,7 +1222,7 @@ async def search_alternative_suppliers(
     Search for alternative suppliers on the web.
     """
     try:
-        suppliers = web_scraper.search_alternative_suppliers(
+        suppliers = await web_scraper.search_alternative_suppliers(
             part_number=request.part_number,
             part_name=request.part_name,
             material=request.material
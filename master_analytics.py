@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from config import config
+from background_refresh import BackgroundRefresher
+from schemas import PartInfo
+from supabase_client import SupabaseClient, TableLoadError, _row_part_number, rows_to_columns
+
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_SERIES_COLUMN = re.compile(r"^(vol|price)(" + "|".join(MONTHS) + r")(\d{4})$", re.I)
+
+# Descriptive columns kept per part (from its first MASTER_FILE row)
+TEXT_COLUMNS = ["partname", "material", "material2", "currency", "suppliername", "suppliernumber"]
+
+# Per-part metrics, one float64 array each (NaN where undefined)
+METRICS = [
+    "annual_volume",            # Volume in the analytics year
+    "previous_annual_volume",   # Volume in the year before
+    "volume_yoy_growth",        # annual / previous - 1
+    "average_price",            # Mean of the year's monthly prices
+    "volume_weighted_price",    # Year's spend / volume over priced months
+    "annual_spend",             # annual_volume x average_price (as PartInfo.annual_total_spend)
+    "actual_spend",             # Sum of monthly volume x monthly price
+    "last_price",               # Latest monthly price on record
+    "rolling_3m_volume",        # Volume of the last three months with data
+    "rolling_3m_yoy_growth",    # ... against the same three months a year earlier
+    "volume_trend_pct",         # Least-squares volume slope over the last 12 months, % of mean per month
+    "price_trend_pct",          # Same for price (months without a price are skipped)
+]
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if np.isnan(value) else round(float(value), 6)
+
+class MasterFileBuilder:
+    """
+    Turns MASTER_FILE pages into arrays as they arrive, so a bulk load never
+    holds more than one page of row dicts. The monthly columns are taken
+    from the first row seen; build() keeps the first row of every part.
+    """
+
+    def __init__(self):
+        self.series: Optional[List[Tuple[str, int, int, str]]] = None  # (kind, year, month, column name)
+        self.months: List[Tuple[int, int]] = []
+        self._part_numbers: List[str] = []
+        self._volumes: List[np.ndarray] = []
+        self._prices: List[np.ndarray] = []
+        self._text: Dict[str, List[np.ndarray]] = {name: [] for name in TEXT_COLUMNS}
+
+    def _discover_series(self, row: Dict[str, Any]):
+        self.series = []
+        for column in row:
+            match = _SERIES_COLUMN.match(column)
+            if match:
+                kind, month, column_year = match.groups()
+                self.series.append((kind.lower(), int(column_year), MONTHS.index(month.lower()), column))
+        years = sorted({column_year for _, column_year, _, _ in self.series})
+        self.months = [(y, m) for y in range(years[0], years[-1] + 1) for m in range(12)] if years else []
+
+    def add(self, rows: List[Dict[str, Any]]):
+        """Convert one page of rows"""
+        if not rows:
+            return
+        if self.series is None:
+            self._discover_series(rows[0])
+        first_year = self.months[0][0] if self.months else 0
+        columns = rows_to_columns(rows, {column: np.float64 for *_, column in self.series})
+        volumes = np.full((len(rows), len(self.months)), np.nan)
+        prices = np.full((len(rows), len(self.months)), np.nan)
+        for kind, column_year, month, column in self.series:
+            target = volumes if kind == "vol" else prices
+            target[:, (column_year - first_year) * 12 + month] = columns[column]
+        self._volumes.append(volumes)
+        self._prices.append(prices)
+        for name, values in rows_to_columns(rows, dict.fromkeys(TEXT_COLUMNS, str)).items():
+            self._text[name].append(values)
+        self._part_numbers.extend(_row_part_number(row) for row in rows)
+
+    def build(self, year: int = 0) -> "MasterFileSnapshot":
+        # First row per part, like the single-part lookup
+        first_rows: Dict[str, int] = {}
+        for i, part_number in enumerate(self._part_numbers):
+            first_rows.setdefault(part_number, i)
+        keep = np.fromiter(first_rows.values(), dtype=np.int64, count=len(first_rows))
+        m = len(self.months)
+
+        def stacked(chunks: List[np.ndarray]) -> np.ndarray:
+            return np.concatenate(chunks)[keep] if chunks else np.full((0, m), np.nan)
+
+        text = {
+            name: np.concatenate(chunks)[keep] if chunks else np.array([], dtype=str)
+            for name, chunks in self._text.items()
+        }
+        return MasterFileSnapshot(
+            list(first_rows), self.months, stacked(self._volumes), stacked(self._prices), text, year
+        )
+
+class MasterFileSnapshot:
+    """
+    One MASTER_FILE load as NumPy arrays: parts x months volume and price
+    matrices over a continuous monthly timeline (every volXXXyyyy /
+    priceXXXyyyy column found, NaN where a month has no column or value),
+    plus every metric in METRICS computed for all parts in one pass.
+    Immutable once built, so readers never need a lock. Built from rows
+    with from_rows(), or page by page with a MasterFileBuilder.
+    """
+
+    def __init__(
+        self,
+        part_numbers: List[str],
+        months: List[Tuple[int, int]],
+        volumes: np.ndarray,
+        prices: np.ndarray,
+        text: Dict[str, np.ndarray],
+        year: int = 0
+    ):
+        self.part_numbers = part_numbers
+        self.rows = {part_number: i for i, part_number in enumerate(self.part_numbers)}
+        self.months = months
+        self.first_year = months[0][0] if months else 0
+        self.volumes = volumes
+        self.prices = prices
+        self.text = text
+        # Case-folded copies for the ranking filters; materials as (distinct values, row -> value)
+        self._folded = {name: np.char.lower(values) for name, values in self.text.items()}
+        self._materials = [np.unique(self._folded[name], return_inverse=True) for name in ("material", "material2")]
+        self._currencies = np.unique(np.char.upper(self.text["currency"]), return_inverse=True)
+        self.year = self._analytics_year(year)
+        self.metrics = self._compute_metrics()
+        self.fingerprint = self._fingerprint()
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]], year: int = 0) -> "MasterFileSnapshot":
+        builder = MasterFileBuilder()
+        builder.add(rows)
+        return builder.build(year)
+
+    def _fingerprint(self) -> str:
+        """Content hash of the loaded data, so caches built on a snapshot can tell when it really changed"""
+        digest = hashlib.sha1(f"{self.year}|{self.first_year}|{len(self.months)}".encode('utf-8'))
+        digest.update("\n".join(self.part_numbers).encode('utf-8'))
+        digest.update(self.volumes.tobytes())
+        digest.update(self.prices.tobytes())
+        for values in self.text.values():
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def _analytics_year(self, year: int) -> int:
+        """The requested year, else the latest year with any price, else the latest year"""
+        month_years = np.array([y for y, _ in self.months], dtype=np.int64)
+        if year and year in month_years:
+            return year
+        priced = month_years[~np.isnan(self.prices).all(axis=0)] if len(self.part_numbers) else month_years[:0]
+        if len(priced):
+            return int(priced.max())
+        return int(month_years.max()) if len(month_years) else 0
+
+    def _compute_metrics(self) -> Dict[str, np.ndarray]:
+        n, m = self.volumes.shape
+        if m == 0:
+            return {name: np.full(n, np.nan) for name in METRICS}
+        volumes = np.nan_to_num(self.volumes)  # A missing monthly volume counts as 0
+        prices = self.prices
+        month_years = np.array([y for y, _ in self.months], dtype=np.int64)
+        current = month_years == self.year
+        metrics: Dict[str, np.ndarray] = {}
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            annual_volume = volumes[:, current].sum(axis=1)
+            previous = month_years == self.year - 1
+            previous_volume = volumes[:, previous].sum(axis=1) if previous.any() else np.full(n, np.nan)
+            metrics["annual_volume"] = annual_volume
+            metrics["previous_annual_volume"] = previous_volume
+            metrics["volume_yoy_growth"] = np.where(previous_volume > 0, annual_volume / previous_volume - 1.0, np.nan)
+
+            year_prices = prices[:, current]
+            year_volumes = volumes[:, current]
+            priced = ~np.isnan(year_prices)
+            price_count = priced.sum(axis=1)
+            average_price = np.where(price_count > 0, np.where(priced, year_prices, 0.0).sum(axis=1) / price_count, np.nan)
+            priced_spend = np.where(priced, year_prices * year_volumes, 0.0).sum(axis=1)
+            priced_volume = np.where(priced, year_volumes, 0.0).sum(axis=1)
+            metrics["average_price"] = average_price
+            metrics["volume_weighted_price"] = np.where(priced_volume > 0, priced_spend / priced_volume, np.nan)
+            metrics["annual_spend"] = annual_volume * average_price
+            metrics["actual_spend"] = np.where(price_count > 0, priced_spend, np.nan)
+
+            has_price = ~np.isnan(prices)
+            last_priced = m - 1 - np.argmax(has_price[:, ::-1], axis=1)
+            metrics["last_price"] = np.where(has_price.any(axis=1), prices[np.arange(n), last_priced], np.nan)
+
+            # Trailing windows end at the last month for which any part has a volume
+            with_data = np.flatnonzero(~np.isnan(self.volumes).all(axis=0)) if n else np.array([], dtype=np.int64)
+            last = int(with_data[-1]) if len(with_data) else m - 1
+            cumulative = np.concatenate([np.zeros((n, 1)), volumes.cumsum(axis=1)], axis=1)
+
+            def window_sum(end: int, length: int) -> np.ndarray:
+                if end - length + 1 < 0:
+                    return np.full(n, np.nan)
+                return cumulative[:, end + 1] - cumulative[:, end + 1 - length]
+
+            rolling = window_sum(last, 3)
+            rolling_previous = window_sum(last - 12, 3)
+            metrics["rolling_3m_volume"] = rolling
+            metrics["rolling_3m_yoy_growth"] = np.where(rolling_previous > 0, rolling / rolling_previous - 1.0, np.nan)
+
+            start = max(0, last - 11)
+            x = np.arange(last - start + 1, dtype=np.float64)
+            window_volumes = volumes[:, start:last + 1]
+            centered = x - x.mean()
+            denominator = (centered ** 2).sum()
+            slope = (window_volumes * centered).sum(axis=1) / denominator if denominator > 0 else np.full(n, np.nan)
+            mean_volume = window_volumes.mean(axis=1)
+            metrics["volume_trend_pct"] = np.where(mean_volume > 0, slope / mean_volume * 100.0, np.nan)
+
+            # Least squares over the priced months only
+            window_prices = prices[:, start:last + 1]
+            weights = ~np.isnan(window_prices)
+            values = np.where(weights, window_prices, 0.0)
+            count = weights.sum(axis=1)
+            sum_x = (weights * x).sum(axis=1)
+            sum_xx = (weights * x * x).sum(axis=1)
+            sum_y = values.sum(axis=1)
+            sum_xy = (values * x).sum(axis=1)
+            determinant = count * sum_xx - sum_x ** 2
+            price_slope = np.where(determinant > 0, (count * sum_xy - sum_x * sum_y) / determinant, np.nan)
+            mean_price = np.where(count > 0, sum_y / count, np.nan)
+            metrics["price_trend_pct"] = np.where((count >= 2) & (mean_price > 0), price_slope / mean_price * 100.0, np.nan)
+        return metrics
+
+    def __contains__(self, part_number: str) -> bool:
+        return part_number in self.rows
+
+    def count(self) -> int:
+        return len(self.part_numbers)
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        record: Dict[str, Any] = {"part_number": self.part_numbers[row]}
+        record.update({name: str(values[row]) or None for name, values in self.text.items()})
+        record.update({name: _nan_to_none(values[row]) for name, values in self.metrics.items()})
+        return record
+
+    def get(self, part_number: str) -> Optional[Dict[str, Any]]:
+        """Metrics and monthly series of one part, or None"""
+        row = self.rows.get(part_number)
+        if row is None:
+            return None
+        volumes = self.volumes[row]
+        cumulative = np.concatenate([[0.0], np.nan_to_num(volumes).cumsum()])
+        rolling = cumulative[3:] - cumulative[:-3]
+        record = self._record(row)
+        record["year"] = self.year
+        record["series"] = {
+            "months": [f"{y}-{m + 1:02d}" for y, m in self.months],
+            "volume": [_nan_to_none(v) for v in volumes],
+            "price": [_nan_to_none(p) for p in self.prices[row]],
+            "rolling_3m_volume": [None] * min(2, len(volumes)) + [float(v) for v in rolling]
+        }
+        return record
+
+    def part_info(self, part_number: str) -> Optional[PartInfo]:
+        """PartInfo from the precomputed arrays (price and spend 0 when the year has no prices)"""
+        row = self.rows.get(part_number)
+        if row is None:
+            return None
+        text = {name: str(values[row]) for name, values in self.text.items()}
+        average_price = float(np.nan_to_num(self.metrics["average_price"][row]))
+        annual_volume = float(self.metrics["annual_volume"][row])
+        return PartInfo(
+            part_number=part_number,
+            part_name=text["partname"],
+            material=text["material"] or None,
+            material2=text["material2"] or None,
+            currency=text["currency"],
+            current_supplier=text["suppliername"],
+            current_price=average_price,
+            annual_volume=annual_volume,
+            annual_total_spend=annual_volume * average_price
+        )
+
+    def filter_mask(self, supplier: Optional[str], material: Optional[str], currency: Optional[str]) -> np.ndarray:
+        """Rows whose current supplier (name or number), material or currency match; None/empty = no filter"""
+        folded = self._folded
+        mask = np.ones(len(self.part_numbers), dtype=bool)
+        if supplier:
+            wanted = supplier.lower()
+            mask &= (folded["suppliername"] == wanted) | (folded["suppliernumber"] == wanted)
+        if material:
+            # Substring match on material or material2, tested once per distinct value
+            wanted = material.lower()
+            matches = np.zeros(len(self.part_numbers), dtype=bool)
+            for values, inverse in self._materials:
+                matches |= np.array([wanted in value for value in values], dtype=bool)[inverse]
+            mask &= matches
+        if currency:
+            mask &= folded["currency"] == currency.lower()
+        return mask
+
+    def ranking(
+        self,
+        sort_by: str = "annual_spend",
+        descending: bool = True,
+        limit: int = 50,
+        offset: int = 0,
+        supplier: Optional[str] = None,
+        material: Optional[str] = None,
+        currency: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of parts ordered by a metric (undefined values last) and the number of matches"""
+        rows = np.flatnonzero(self.filter_mask(supplier, material, currency))
+        values = self.metrics[sort_by][rows]
+        order = np.argsort(-values if descending else values, kind='stable')  # NaN sorts last either way
+        page = rows[order[offset:offset + limit]]
+        return [self._record(int(row)) for row in page], len(rows)
+
+    def summary(self, top: int = 10) -> Dict[str, Any]:
+        """Portfolio totals per currency and the parts with the highest annual spend"""
+        currencies, inverse = self._currencies
+        groups = len(currencies)
+        parts = np.bincount(inverse, minlength=groups)
+        spend = np.bincount(inverse, weights=np.nan_to_num(self.metrics["annual_spend"]), minlength=groups)
+        volume = np.bincount(inverse, weights=self.metrics["annual_volume"], minlength=groups)
+        previous = np.bincount(inverse, weights=np.nan_to_num(self.metrics["previous_annual_volume"]), minlength=groups)
+        per_currency = {
+            str(currency) or "UNKNOWN": {
+                "parts": int(parts[i]),
+                "annual_spend": round(float(spend[i]), 2),
+                "annual_volume": float(volume[i]),
+                "previous_annual_volume": float(previous[i]),
+                "volume_yoy_growth": round(float(volume[i] / previous[i]) - 1.0, 6) if previous[i] > 0 else None
+            }
+            for i, currency in enumerate(currencies)
+        }
+        top_parts, _ = self.ranking("annual_spend", True, top)
+        return {
+            "year": self.year,
+            "months": [f"{y}-{m + 1:02d}" for y, m in (self.months[:1] + self.months[-1:])],
+            "part_count": self.count(),
+            "priced_parts": int((~np.isnan(self.metrics["average_price"])).sum()),
+            "totals_by_currency": per_currency,
+            "top_parts": top_parts
+        }
+
+class MasterFileAnalytics(BackgroundRefresher):
+    """
+    In-process MASTER_FILE analytics snapshot, loaded and refreshed like
+    the SupplierCatalog: the whole table is streamed page by page (with
+    prefetch), each page converted to arrays off the event loop, and the
+    finished MasterFileSnapshot swapped in; a failed refresh keeps the
+    previous snapshot.
+    """
+
+    refresh_label = "MASTER_FILE analytics"
+
+    def __init__(self, supabase: SupabaseClient, refresh_interval: Optional[float] = None, year: Optional[int] = None):
+        super().__init__(refresh_interval or config.MASTER_ANALYTICS_REFRESH_INTERVAL)
+        self.supabase = supabase
+        self.year = config.MASTER_ANALYTICS_YEAR if year is None else year
+        self.snapshot: Optional[MasterFileSnapshot] = None
+        self.load_seconds: Optional[float] = None
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.snapshot is not None
+
+    async def refresh(self) -> bool:
+        """Reload MASTER_FILE and rebuild every metric; returns False (keeping the old snapshot) on failure"""
+        async with self._refresh_lock:
+            start = time.perf_counter()
+            builder = MasterFileBuilder()
+            try:
+                async for page in self.supabase.iter_master_file_pages():
+                    await asyncio.to_thread(builder.add, page)
+            except TableLoadError as e:
+                self.last_error = f"Failed to load MASTER_FILE: {e}"
+                print(f"⚠️  {self.last_error} - keeping previous analytics snapshot")
+                return False
+            snapshot = await asyncio.to_thread(builder.build, self.year)
+            self.load_seconds = time.perf_counter() - start
+            # Keep the current object when nothing changed, so results cached on it stay valid
+            if self.snapshot is None or self.snapshot.fingerprint != snapshot.fingerprint:
+                self.snapshot = snapshot
+            self.loaded_at = time.time()
+            self.last_error = None
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot size and age for the portfolio endpoints"""
+        snapshot = self.snapshot
+        return {
+            "loaded": self.is_loaded,
+            "part_count": snapshot.count() if snapshot else 0,
+            "year": snapshot.year if snapshot else None,
+            "fingerprint": snapshot.fingerprint if snapshot else None,
+            "load_ms": round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+            **self.refresh_status()
+        }
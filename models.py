@@ -86,12 +86,13 @@ class PartsBenchmarks(Base):
     partname = Column(String(255))
     currency = Column(String(10))
     
-    # Benchmark supplier prices (example columns - adjust based on actual schema)
+    # Benchmark supplier prices, one column per panel supplier. The service
+    # does not rely on this list: it discovers every column matching
+    # BENCHMARK_SUPPLIER_COLUMN_PATTERN at runtime.
     SUP999 = Column(Float)
     SUP001 = Column(Float)
     SUP017 = Column(Float)
     SUP012 = Column(Float)
-    # Add more supplier columns as needed
 
 class SupplierPanelCatalog(Base):
     __tablename__ = "SUPPLIER_PANEL_CATALOG"
@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from benchmark_index import BenchmarkIndex, PartsBenchmarks
+from master_analytics import MasterFileAnalytics, MasterFileSnapshot
+from supplier_catalog import SupplierCatalog
+
+SAVINGS_SORT_KEYS = ["potential_savings", "savings_percentage", "annual_spend", "annual_volume"]
+
+class SavingsTable:
+    """
+    Savings of every benchmarked part against its best quote, computed as
+    arrays from one MASTER_FILE snapshot and one PARTS_BENCHMARKS index:
+
+        potential_savings  = (current price - best quote) x annual volume
+        savings_percentage = (current price - best quote) / current price x 100
+
+    with current price and annual volume as in PartInfo, and the best quote
+    the lowest positive supplier price (the same rule as the per-part analysis).
+    """
+
+    def __init__(self, master: MasterFileSnapshot, benchmarks: BenchmarkIndex):
+        self.master = master
+        self.benchmarks = benchmarks
+        self.key = (master.fingerprint, benchmarks.fingerprint)
+        start = time.perf_counter()
+
+        master_rows = np.array([master.rows.get(p, -1) for p in benchmarks.part_numbers], dtype=np.int64)
+        quotes = benchmarks.prices
+        with np.errstate(invalid='ignore'):
+            quotes = np.where(quotes > 0, quotes, np.nan)
+        quoted = ~np.isnan(quotes).all(axis=1) if quotes.shape[1] else np.zeros(len(master_rows), dtype=bool)
+        rows = np.flatnonzero((master_rows >= 0) & quoted)
+
+        self.master_rows = master_rows[rows]
+        self.benchmark_rows = rows
+        quotes = quotes[rows]
+        self.best_column = np.nanargmin(quotes, axis=1) if len(rows) else np.zeros(0, dtype=np.int64)
+        self.best_price = quotes[np.arange(len(rows)), self.best_column]
+        self.quote_count = (~np.isnan(quotes)).sum(axis=1)
+
+        self.current_price = np.nan_to_num(master.metrics["average_price"][self.master_rows])
+        self.annual_volume = master.metrics["annual_volume"][self.master_rows]
+        self.annual_spend = self.current_price * self.annual_volume
+        difference = self.current_price - self.best_price
+        self.values = {
+            "potential_savings": difference * self.annual_volume,
+            "savings_percentage": np.where(
+                self.current_price > 0, difference / np.where(self.current_price > 0, self.current_price, 1.0) * 100.0, np.nan
+            ),
+            "annual_spend": self.annual_spend,
+            "annual_volume": self.annual_volume,
+        }
+        self.computed_at = time.time()
+        self.compute_seconds = time.perf_counter() - start
+
+    def count(self) -> int:
+        return len(self.master_rows)
+
+    def _record(self, i: int, supplier_catalog: Optional[SupplierCatalog]) -> Dict[str, Any]:
+        master, row = self.master, int(self.master_rows[i])
+        best_supplier = self.benchmarks.supplier_columns[int(self.best_column[i])]
+        details = supplier_catalog.get(best_supplier) if supplier_catalog is not None and supplier_catalog.is_loaded else None
+        percentage = self.values["savings_percentage"][i]
+        return {
+            "part_number": master.part_numbers[row],
+            "part_name": str(master.text["partname"][row]) or None,
+            "material": str(master.text["material"][row]) or None,
+            "currency": str(master.text["currency"][row]) or None,
+            "current_supplier": str(master.text["suppliername"][row]) or None,
+            "current_price": round(float(self.current_price[i]), 6),
+            "annual_volume": float(self.annual_volume[i]),
+            "annual_spend": round(float(self.annual_spend[i]), 2),
+            "best_price": round(float(self.best_price[i]), 6),
+            "best_supplier_number": best_supplier,
+            "best_supplier_name": details.get("suppliername") if details else None,
+            "quote_count": int(self.quote_count[i]),
+            "potential_savings": round(float(self.values["potential_savings"][i]), 2),
+            "savings_percentage": None if np.isnan(percentage) else round(float(percentage), 4),
+        }
+
+    def opportunities(
+        self,
+        sort_by: str = "potential_savings",
+        limit: int = 100,
+        offset: int = 0,
+        min_savings: float = 0.0,
+        min_savings_percentage: Optional[float] = None,
+        supplier: Optional[str] = None,
+        material: Optional[str] = None,
+        currency: Optional[str] = None,
+        alternative_supplier: Optional[str] = None,
+        supplier_catalog: Optional[SupplierCatalog] = None
+    ) -> Tuple[List[Dict[str, Any]], int, Dict[str, Dict[str, float]]]:
+        """
+        One page of parts whose savings exceed `min_savings`, best first by
+        `sort_by`, the number of matches and the matches' totals per currency.
+        """
+        savings = self.values["potential_savings"]
+        mask = savings > min_savings
+        if min_savings_percentage is not None:
+            with np.errstate(invalid='ignore'):
+                mask &= self.values["savings_percentage"] >= min_savings_percentage
+        if supplier or material or currency:
+            mask &= self.master.filter_mask(supplier, material, currency)[self.master_rows]
+        if alternative_supplier:
+            columns = np.array(self.benchmarks.supplier_columns, dtype=str)
+            mask &= columns[self.best_column] == alternative_supplier
+        rows = np.flatnonzero(mask)
+
+        order = np.argsort(-self.values[sort_by][rows], kind='stable')  # NaN sorts last
+        page = [self._record(int(i), supplier_catalog) for i in rows[order[offset:offset + limit]]]
+
+        currencies, inverse = np.unique(np.char.upper(self.master.text["currency"][self.master_rows[rows]]), return_inverse=True)
+        totals = np.bincount(inverse, weights=savings[rows], minlength=len(currencies))
+        spend = np.bincount(inverse, weights=self.annual_spend[rows], minlength=len(currencies))
+        parts = np.bincount(inverse, minlength=len(currencies))
+        totals_by_currency = {
+            str(currency) or "UNKNOWN": {
+                "parts": int(parts[i]),
+                "potential_savings": round(float(totals[i]), 2),
+                "annual_spend": round(float(spend[i]), 2)
+            }
+            for i, currency in enumerate(currencies)
+        }
+        return page, len(rows), totals_by_currency
+
+class PortfolioSavings:
+    """
+    Cached portfolio savings over the MASTER_FILE analytics snapshot and the
+    PARTS_BENCHMARKS index (each loaded and refreshed in the background by
+    its owner). The SavingsTable is computed on first use and reused until
+    either data set actually changes (both carry a content fingerprint).
+    """
+
+    def __init__(
+        self,
+        master_analytics: MasterFileAnalytics,
+        benchmarks: PartsBenchmarks,
+        supplier_catalog: Optional[SupplierCatalog] = None
+    ):
+        self.master_analytics = master_analytics
+        self.benchmarks = benchmarks
+        self.supplier_catalog = supplier_catalog
+        self._table: Optional[SavingsTable] = None
+        self._table_lock = threading.Lock()
+
+    def table(self) -> Optional[SavingsTable]:
+        """The savings table for the current data (recomputed only after a change), or None before both loads"""
+        master, benchmarks = self.master_analytics.snapshot, self.benchmarks.index
+        if master is None or benchmarks is None:
+            return None
+        table = self._table
+        if table is not None and table.key == (master.fingerprint, benchmarks.fingerprint):
+            return table
+        with self._table_lock:
+            table = self._table
+            if table is None or table.key != (master.fingerprint, benchmarks.fingerprint):
+                table = SavingsTable(master, benchmarks)
+                self._table = table
+                print(f"Portfolio savings computed: {table.count()} parts in {table.compute_seconds * 1000:.1f} ms")
+            return table
+
+    def status(self) -> Dict[str, Any]:
+        table, benchmarks = self._table, self.benchmarks.index
+        return {
+            "benchmarks_loaded": benchmarks is not None,
+            "benchmark_parts": benchmarks.count() if benchmarks else 0,
+            "master_file_loaded": self.master_analytics.is_loaded,
+            "parts_with_quotes": table.count() if table else None,
+            "computed_at": datetime.fromtimestamp(table.computed_at, tz=timezone.utc).isoformat() if table else None,
+            "compute_ms": round(table.compute_seconds * 1000, 1) if table else None,
+            "last_error": self.benchmarks.last_error or self.master_analytics.last_error
+        }
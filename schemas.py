@@ -5,6 +5,13 @@ from datetime import datetime
 class PartAnalysisRequest(BaseModel):
     part_number: str
 
+class BatchAnalysisRequest(BaseModel):
+    part_numbers: List[str]
+    concurrency: Optional[int] = None
+
+class SpecBundleRequest(BaseModel):
+    part_numbers: List[str]
+
 class SearchAlternativesRequest(BaseModel):
     part_number: str
     part_name: str
@@ -49,10 +56,13 @@ class TechnicalSpec(BaseModel):
     file_size: int
     file_type: str
     download_url: str
+    sha256: Optional[str] = None
+    keywords: Optional[Dict[str, str]] = None
 
 class PartAnalysisResponse(BaseModel):
     benchmark_summary: BenchmarkSummary
     technical_spec: Optional[TechnicalSpec] = None
+    technical_specs: List[TechnicalSpec] = []
     suppliers: List[SupplierInfo]
     success: bool
     message: str
@@ -60,4 +70,5 @@ class PartAnalysisResponse(BaseModel):
 class ErrorResponse(BaseModel):
     success: bool = False
     message: str
-    error_code: Optional[str] = None 
\ No newline at end of file
+    error_code: Optional[str] = None
+    part_number: Optional[str] = None 
\ No newline at end of file
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config import config
+from spec_attributes import SpecAttributeTable
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+INDEX_VERSION = 2
+
+# Numeric drawing attributes and how they are scaled before standardization
+NUMERIC_ATTRIBUTES = [
+    ("length_mm", np.log1p),
+    ("width_mm", np.log1p),
+    ("height_mm", np.log1p),
+    ("bounding_volume_cm3", np.log1p),
+    ("wall_thickness_mm", np.log1p),
+    ("filler_pct", None),
+    ("insert_count", np.log1p),
+    ("threaded_count", np.log1p),
+    ("hole_count", np.log1p),
+    ("rib_count", np.log1p),
+    ("max_thread_m", None),
+]
+CATEGORICAL_ATTRIBUTES = ["material", "filler_type"]
+
+class SimilarPartsNotReady(Exception):
+    """The similar-parts matrix has not been built yet (a build is running in the background)"""
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+def files_signature(files: Dict[str, Tuple[int, int]]) -> str:
+    """Fingerprint of a set of spec files (names, sizes and mtimes)"""
+    digest = hashlib.sha1()
+    for name in sorted(files):
+        size, mtime_ns = files[name]
+        digest.update(f"{name}|{size}|{mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+class SimilarPartsIndex:
+    """
+    Nearest-neighbour index over parts, one L2-normalized row per part:
+
+    - TF-IDF of the part's spec text over the SIMILAR_PARTS_MAX_TERMS most
+      informative terms
+    - drawing attributes: standardized dimensions, volume, filler and feature
+      counts, plus one-hot material, filler type and feature flags
+
+    The two blocks are normalized separately and weighted by
+    SIMILAR_PARTS_TEXT_WEIGHT, so cosine similarity is a single float32
+    matrix-vector product. Each build is saved as its own matrix-<id>.npy
+    and published by atomically replacing meta.json, which names the
+    matrix file, so a reader never pairs one build's matrix with another's
+    part list. Matrices are memory-mapped, so uvicorn workers share one copy.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_terms: Optional[int] = None, text_weight: Optional[float] = None):
+        self.directory = Path(directory or config.SIMILAR_PARTS_DIRECTORY)
+        self.max_terms = max_terms or config.SIMILAR_PARTS_MAX_TERMS
+        self.text_weight = config.SIMILAR_PARTS_TEXT_WEIGHT if text_weight is None else text_weight
+        self._lock = threading.Lock()
+        self.signature: Optional[str] = None
+        # (matrix, part numbers, part number -> row), swapped as one unit so queries never mix builds
+        self._index: Tuple[np.ndarray, List[str], Dict[str, int]] = (np.zeros((0, 0), dtype=np.float32), [], {})
+        self._load()
+
+    def is_current(self, signature: str) -> bool:
+        return self.signature == signature
+
+    @property
+    def is_built(self) -> bool:
+        return self.signature is not None
+
+    @contextmanager
+    def build_lock(self):
+        """Serialize builds across uvicorn workers (callers reload() and re-check inside)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "lock", 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def build(
+        self,
+        signature: str,
+        part_numbers: List[str],
+        part_terms: List[List[str]],
+        attributes: SpecAttributeTable
+    ):
+        """Recompute every part vector and persist the matrix"""
+        with self._lock:
+            text_block = self._text_block(part_terms)
+            attribute_block = self._attribute_block(part_numbers, attributes)
+            matrix = np.hstack([
+                text_block * math.sqrt(self.text_weight),
+                attribute_block * math.sqrt(1.0 - self.text_weight)
+            ]).astype(np.float32)
+            self._index = (
+                _normalize_rows(matrix),
+                list(part_numbers),
+                {part_number: i for i, part_number in enumerate(part_numbers)}
+            )
+            self.signature = signature
+            self._save()
+
+    def _text_block(self, part_terms: List[List[str]]) -> np.ndarray:
+        """Row-normalized sublinear TF-IDF over a capped vocabulary"""
+        n = len(part_terms)
+        counts = [Counter(terms) for terms in part_terms]
+        df = Counter(term for c in counts for term in c)
+        # Terms shared by at least two parts but not by nearly all of them carry the signal
+        candidates = [(d, term) for term, d in df.items() if d >= 2 and d <= max(2, 0.8 * n)]
+        vocabulary = [term for _, term in sorted(candidates, key=lambda c: (-c[0], c[1]))[:self.max_terms]]
+        term_ids = {term: i for i, term in enumerate(vocabulary)}
+        idf = np.array([math.log((1 + n) / (1 + df[term])) + 1.0 for term in vocabulary], dtype=np.float32)
+
+        block = np.zeros((n, len(vocabulary)), dtype=np.float32)
+        for row, c in enumerate(counts):
+            for term, tf in c.items():
+                column = term_ids.get(term)
+                if column is not None:
+                    block[row, column] = 1.0 + math.log(tf)
+        return _normalize_rows(block * idf)
+
+    def _attribute_block(self, part_numbers: List[str], attributes: SpecAttributeTable) -> np.ndarray:
+        """Standardized numeric attributes plus one-hot categories and feature flags"""
+        rows = np.array([
+            -1 if (row := attributes.row_index(part_number)) is None else row
+            for part_number in part_numbers
+        ], dtype=np.int64)
+        present = rows >= 0
+        gather = np.where(present, rows, 0)
+        columns = attributes.columns
+
+        blocks = []
+        if len(columns["filename"]):
+            numeric = np.full((len(part_numbers), len(NUMERIC_ATTRIBUTES)), np.nan, dtype=np.float64)
+            for i, (name, transform) in enumerate(NUMERIC_ATTRIBUTES):
+                values = columns[name][gather].astype(np.float64)
+                numeric[present, i] = (transform(values) if transform else values)[present]
+            # Columns no drawing states are all-NaN; they standardize to 0 below
+            with np.errstate(invalid='ignore'), warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                mean = np.nanmean(numeric, axis=0) if present.any() else np.zeros(numeric.shape[1])
+                std = np.nanstd(numeric, axis=0) if present.any() else np.ones(numeric.shape[1])
+            standardized = (numeric - mean) / np.where(std > 0, std, 1.0)
+            blocks.append(np.nan_to_num(standardized, nan=0.0))
+
+            for name in CATEGORICAL_ATTRIBUTES:
+                values = np.where(present, columns[name][gather], "")
+                categories, inverse = np.unique(values, return_inverse=True)
+                one_hot = np.zeros((len(part_numbers), len(categories)))
+                one_hot[np.arange(len(part_numbers)), inverse] = 1.0
+                one_hot[:, categories == ""] = 0.0
+                blocks.append(one_hot)
+
+            blocks.append(np.where(present[:, None], attributes.features[gather], False).astype(np.float64))
+
+        if not blocks:
+            return np.zeros((len(part_numbers), 0), dtype=np.float32)
+        block = np.hstack(blocks)
+        block[~present] = 0.0
+        return _normalize_rows(block.astype(np.float32))
+
+    def similar(self, part_number: str, k: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """
+        The k parts most similar to `part_number` as (part number, cosine
+        similarity), best first; None if the part is not indexed.
+        """
+        matrix, part_numbers, rows = self._index
+        row = rows.get(part_number)
+        if row is None:
+            return None
+        scores = matrix @ matrix[row]
+        scores[row] = -np.inf
+        k = min(k, len(scores) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(part_numbers[i], round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+    def reload(self):
+        """Pick up a matrix another worker has built in the meantime"""
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.directory / "meta.json", 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                return
+            matrix = np.load(self.directory / meta["matrix"], mmap_mode='r')
+        except (OSError, ValueError, KeyError):
+            return
+        if matrix.shape[0] != len(meta["part_numbers"]):
+            return
+        part_numbers = meta["part_numbers"]
+        self._index = (matrix, part_numbers, {part_number: i for i, part_number in enumerate(part_numbers)})
+        self.signature = meta["signature"]
+
+    def _save(self):
+        matrix, part_numbers, _ = self._index
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            matrix_name = f"matrix-{time.time_ns()}-{os.getpid()}.npy"
+            tmp_matrix = self.directory / (matrix_name + ".tmp.npy")
+            np.save(tmp_matrix, matrix)
+            os.replace(tmp_matrix, self.directory / matrix_name)
+            tmp_meta = self.directory / "meta.json.tmp"
+            with open(tmp_meta, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "signature": self.signature,
+                    "matrix": matrix_name,
+                    "part_numbers": part_numbers
+                }, f)
+            os.replace(tmp_meta, self.directory / "meta.json")
+        except OSError as e:
+            print(f"Error saving similar parts index: {e}")
+            return
+        # Older builds are no longer referenced; workers that still map one keep working on POSIX
+        for path in self.directory.glob("matrix*.npy"):
+            if path.name != matrix_name:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
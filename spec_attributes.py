@@ -0,0 +1,296 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from config import config
+from keyword_extractor import get_keyword_extractor
+
+TABLE_VERSION = 3
+
+# Boolean feature columns, detected anywhere in the drawing body
+FEATURE_PATTERNS: Dict[str, str] = {
+    "threaded": r"\bthread|\bM\d+(?:\.\d+)?\b",
+    "molded_in_inserts": r"\binsert",
+    "snap_fit": r"\bsnap|\blatch|\bclip",
+    "living_hinge": r"living hinge",
+    "hinge": r"\bhinge",
+    "ribs": r"\brib",
+    "overmold": r"overmold",
+    "draft": r"\bdraft",
+    "lattice": r"\blattice",
+    "weld": r"\bweld",
+    "channel": r"\bchannel",
+    "fins": r"\bfins?\b",
+    "lens": r"\blens",
+    "seal": r"\bseal",
+    "press_fit": r"press-?fit",
+}
+FEATURES = list(FEATURE_PATTERNS)
+_FEATURE_RES = [re.compile(pattern, re.I) for pattern in FEATURE_PATTERNS.values()]
+
+_NUM = r"(\d+(?:\.\d+)?)"
+_BOX = re.compile(_NUM + r"\s*x\s*" + _NUM + r"\s*x\s*" + _NUM + r"\s*mm", re.I)
+_OUTER_DIAMETER = re.compile(r"\bOD:\s*" + _NUM + r"\s*mm")
+_HEIGHT = re.compile(r"\bHeight:\s*" + _NUM + r"\s*mm", re.I)
+_LENGTH = re.compile(_NUM + r"\s*mm\s+length", re.I)
+_DIAMETER = re.compile(_NUM + r"\s*mm\s+diameter", re.I)
+_THICKNESS = re.compile(r"\b(?:wall\s+)?thickness:\s*" + _NUM + r"\s*mm", re.I)
+_MATERIAL = re.compile(r"Material:\s*(.+)", re.I)
+_FILLER_PERCENT = re.compile(r"(\d{1,2})\s*%\s*(GF|CF|glass|carbon)", re.I)
+_COUNTED_ITEM = re.compile(r"^(\d+)\s*x\s+(\S.*)$", re.I)
+_THREAD_SIZE = re.compile(r"\bM" + _NUM + r"\b")
+_TITLE = re.compile(r"^[A-Za-z][A-Za-z0-9 ,/&()\-]*$")
+
+# (name, dtype, missing value) of each scalar column; floats use NaN for "not stated".
+# Text columns hold Python strings (object arrays), so no value is ever cut to a fixed width.
+COLUMNS: List[Tuple[str, Any, Any]] = [
+    ("part_number", object, ""),
+    ("filename", object, ""),
+    ("source_size", "int64", 0),
+    ("source_mtime_ns", "int64", 0),
+    ("title", object, ""),
+    ("length_mm", "float32", np.nan),
+    ("width_mm", "float32", np.nan),
+    ("height_mm", "float32", np.nan),
+    ("bounding_volume_cm3", "float32", np.nan),
+    ("wall_thickness_mm", "float32", np.nan),
+    ("material", object, ""),
+    ("material_raw", object, ""),
+    ("filler_type", object, ""),
+    ("filler_pct", "float32", np.nan),
+    ("insert_count", "int32", 0),
+    ("threaded_count", "int32", 0),
+    ("hole_count", "int32", 0),
+    ("rib_count", "int32", 0),
+    ("max_thread_m", "float32", np.nan),
+]
+
+def parse_drawing(text: str) -> Dict[str, Any]:
+    """
+    Typed attributes of one dwg.txt drawing: bounding box (mm) and volume
+    (cm³), wall thickness, base material and filler, counts of inserts,
+    threaded features, holes and ribs, largest metric thread and feature flags.
+    Anything the drawing does not state is left NaN / empty / 0.
+    """
+    attributes: Dict[str, Any] = {name: missing for name, _, missing in COLUMNS}
+    lines = [line.strip() for line in text.splitlines()]
+    items = [line.lstrip("-").strip() for line in lines if line.startswith("-")]
+
+    # Title: the last plain-text line before the dimensions block
+    dims_at = next((i for i, line in enumerate(lines) if line.upper().startswith("DIMENSIONS")), len(lines))
+    for line in reversed(lines[:dims_at]):
+        if _TITLE.match(line) and not _MATERIAL.match(line):
+            attributes["title"] = line
+            break
+
+    box = _BOX.search(text)
+    if box:
+        attributes["length_mm"], attributes["width_mm"], attributes["height_mm"] = (float(v) for v in box.groups())
+    else:
+        outer = _OUTER_DIAMETER.search(text)
+        length = _LENGTH.search(text)
+        if outer:
+            attributes["length_mm"] = attributes["width_mm"] = float(outer.group(1))
+            height = _HEIGHT.search(text) or _THICKNESS.search(text)
+            if height:
+                attributes["height_mm"] = float(height.group(1))
+        elif length:
+            attributes["length_mm"] = float(length.group(1))
+            diameter = _DIAMETER.search(text)
+            if diameter:
+                attributes["width_mm"] = attributes["height_mm"] = float(diameter.group(1))
+    dims = [attributes["length_mm"], attributes["width_mm"], attributes["height_mm"]]
+    if not any(np.isnan(dims)):
+        attributes["bounding_volume_cm3"] = dims[0] * dims[1] * dims[2] / 1000.0
+
+    thickness = _THICKNESS.search(text)
+    if thickness:
+        attributes["wall_thickness_mm"] = float(thickness.group(1))
+
+    material_line = next((m.group(1).strip() for m in map(_MATERIAL.search, lines) if m), "")
+    if not material_line:
+        # Some drawings only carry the material under the title (e.g. "PA66 15%GF")
+        material_line = next((line for line in lines if line and get_keyword_extractor().extract(line)["material"]), "")
+    if material_line:
+        attributes["material_raw"] = material_line
+        attributes["material"] = get_keyword_extractor().extract(material_line)["material"].replace(" ", "").replace("-", "")
+        filler = _FILLER_PERCENT.search(material_line)
+        lowered = material_line.lower()
+        if filler:
+            kind = filler.group(2).upper()
+            attributes["filler_type"] = {"GLASS": "GF", "CARBON": "CF"}.get(kind, kind)
+            attributes["filler_pct"] = float(filler.group(1))
+        elif "carbon" in lowered:
+            attributes["filler_type"] = "CF"  # Filled, amount not stated
+        elif "glass" in lowered:
+            attributes["filler_type"] = "GF"
+        else:
+            attributes["filler_pct"] = 0.0
+
+    threads = [float(m) for m in _THREAD_SIZE.findall(text)]
+    if threads:
+        attributes["max_thread_m"] = max(threads)
+    for item in items:
+        counted = _COUNTED_ITEM.match(item)
+        if not counted:
+            continue
+        count, description = int(counted.group(1)), counted.group(2).lower()
+        if "insert" in description:
+            attributes["insert_count"] += count
+        if "thread" in description or _THREAD_SIZE.search(counted.group(2)):
+            attributes["threaded_count"] += count
+        if "hole" in description:
+            attributes["hole_count"] += count
+        if "rib" in description:
+            attributes["rib_count"] += count
+
+    # Feature flags come from the drawing body, not the title ("Handle Insert" has no inserts)
+    body = "\n".join(line for line in lines if line != attributes["title"])
+    attributes["features"] = [name for name, pattern in zip(FEATURES, _FEATURE_RES) if pattern.search(body)]
+    return attributes
+
+class SpecAttributeTable:
+    """
+    Columnar per-part attribute table parsed from the dwg.txt drawings.
+
+    Each attribute is one NumPy array (one row per drawing) and the feature
+    flags are a boolean matrix with a column per FEATURES entry, so analytics
+    and similarity queries work on whole columns. The table is persisted as
+    an .npz next to the spec index; a refresh re-parses only drawings whose
+    size or mtime changed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or config.SPEC_ATTRIBUTES_PATH)
+        self._lock = threading.Lock()
+        self.columns: Dict[str, np.ndarray] = self._empty_columns(0)
+        self.features = np.zeros((0, len(FEATURES)), dtype=bool)
+        self._rows: Dict[str, int] = {}
+        self._load()
+
+    @staticmethod
+    def _empty_columns(n: int) -> Dict[str, np.ndarray]:
+        return {name: np.full(n, missing, dtype=dtype) for name, dtype, missing in COLUMNS}
+
+    def count(self) -> int:
+        return len(self.features)
+
+    def is_current(self, files: Dict[str, Tuple[int, int]]) -> bool:
+        """True if the table holds exactly these drawings at these (size, mtime_ns)"""
+        columns = self.columns
+        if len(columns["filename"]) != len(files):
+            return False
+        return all(
+            files.get(str(name)) == (int(size), int(mtime))
+            for name, size, mtime in zip(columns["filename"], columns["source_size"], columns["source_mtime_ns"])
+        )
+
+    def refresh(
+        self,
+        files: Dict[str, Tuple[int, int]],
+        part_number_for: Callable[[str], Optional[str]],
+        read_text: Callable[[str], str]
+    ) -> int:
+        """
+        Rebuild the table for `files` ({drawing filename: (size, mtime_ns)}),
+        re-parsing only new or changed drawings. Returns the number parsed.
+        """
+        with self._lock:
+            old = self.columns
+            old_rows = {str(name): i for i, name in enumerate(old["filename"])}
+            filenames = sorted(files)
+            columns = self._empty_columns(len(filenames))
+            features = np.zeros((len(filenames), len(FEATURES)), dtype=bool)
+            parsed = 0
+            for row, filename in enumerate(filenames):
+                size, mtime_ns = files[filename]
+                old_row = old_rows.get(filename)
+                if (
+                    old_row is not None
+                    and int(old["source_size"][old_row]) == size
+                    and int(old["source_mtime_ns"][old_row]) == mtime_ns
+                ):
+                    for name in columns:
+                        columns[name][row] = old[name][old_row]
+                    features[row] = self.features[old_row]
+                    continue
+                try:
+                    attributes = parse_drawing(read_text(filename))
+                except (OSError, UnicodeError) as e:
+                    print(f"Error parsing drawing {filename}: {e}")
+                    attributes = {name: missing for name, _, missing in COLUMNS}
+                    attributes["features"] = []
+                attributes.update(
+                    part_number=part_number_for(filename) or "",
+                    filename=filename,
+                    source_size=size,
+                    source_mtime_ns=mtime_ns
+                )
+                for name in columns:
+                    columns[name][row] = attributes[name]
+                features[row] = [name in attributes["features"] for name in FEATURES]
+                parsed += 1
+
+            self.columns = columns
+            self.features = features
+            self._rows = self._index_rows(columns)
+            self._save()
+            return parsed
+
+    @staticmethod
+    def _index_rows(columns: Dict[str, np.ndarray]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        for i, part_number in enumerate(columns["part_number"]):
+            if part_number:
+                rows.setdefault(str(part_number), i)  # First drawing (by filename) wins
+        return rows
+
+    def row_index(self, part_number: str) -> Optional[int]:
+        return self._rows.get(part_number)
+
+    def get(self, part_number: str) -> Optional[Dict[str, Any]]:
+        """One part's attributes as plain Python values (NaN -> None)"""
+        row = self._rows.get(part_number)
+        if row is None:
+            return None
+        record: Dict[str, Any] = {}
+        for name, array in self.columns.items():
+            value = array[row]
+            value = value.item() if isinstance(value, np.generic) else value
+            record[name] = None if isinstance(value, float) and np.isnan(value) else value
+        record["features"] = [name for name, flag in zip(FEATURES, self.features[row]) if flag]
+        return record
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if int(data["version"]) != TABLE_VERSION or list(data["feature_names"]) != FEATURES:
+                    return
+                columns = {name: data[f"col_{name}"].astype(dtype) for name, dtype, _ in COLUMNS}
+                features = data["features"].astype(bool)
+        except (OSError, KeyError, ValueError):
+            return
+        self.columns = columns
+        self.features = features
+        self._rows = self._index_rows(columns)
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp.npz")
+            np.savez(
+                tmp_path,
+                version=np.int32(TABLE_VERSION),
+                feature_names=np.array(FEATURES),
+                features=self.features,
+                # Text columns are saved as unicode arrays sized to their longest value
+                **{
+                    f"col_{name}": np.array(array.tolist(), dtype=str) if array.dtype == object else array
+                    for name, array in self.columns.items()
+                }
+            )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving spec attribute table: {e}")
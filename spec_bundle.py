@@ -0,0 +1,71 @@
+import io
+import os
+import zipfile
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+# Formats that are already compressed; deflating them again costs CPU for nothing
+STORED_EXTENSIONS = {".pdf", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".docx", ".xlsx"}
+
+CHUNK_SIZE = 64 * 1024
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only, non-seekable sink for ZipFile. zipfile then writes each
+    entry's sizes and CRC in a trailing data descriptor instead of seeking
+    back, so the archive can be emitted front to back as it is built.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def drain(self) -> bytes:
+        """Bytes written since the last drain"""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip_bundle(entries: Iterable[Tuple[str, Path]], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream a ZIP archive of `entries` ((name in archive, path on disk)).
+
+    Files are read and compressed chunk by chunk and every chunk is yielded
+    as soon as it is written, so memory stays at a few chunks whatever the
+    bundle size and nothing touches disk. Files that disappeared since the
+    entries were resolved are skipped.
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(stream, mode='w', allowZip64=True) as archive:
+        for arcname, path in entries:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                source = open(path, 'rb')
+            except OSError as e:
+                print(f"Skipping {arcname} in spec bundle: {e}")
+                continue
+            with source:
+                stored = os.path.splitext(arcname)[1].lower() in STORED_EXTENSIONS
+                info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                with archive.open(info, mode='w') as target:
+                    while chunk := source.read(chunk_size):
+                        target.write(chunk)
+                        data = stream.drain()
+                        if data:
+                            yield data
+            data = stream.drain()
+            if data:
+                yield data
+    # Central directory
+    yield stream.drain()
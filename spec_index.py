@@ -0,0 +1,205 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from config import config
+
+INDEX_VERSION = 1
+
+class SpecIndexChanges:
+    """Files added, modified and removed by one index refresh"""
+
+    def __init__(self, added: List[str], modified: List[str], removed: List[str]):
+        self.added = added
+        self.modified = modified
+        self.removed = removed
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.modified or self.removed)
+
+class SpecIndex:
+    """
+    Part number -> spec files index over SPECS_DIRECTORY.
+
+    Filenames are scanned once and the part numbers they contain are
+    extracted with SPEC_PART_NUMBER_PATTERN, so lookups are exact dict hits
+    ("PA-1017" no longer matches "PA-10170"). The directory's mtime is
+    checked on each lookup, so additions, removals and renames are picked up
+    at once. Overwriting a file in place leaves the directory mtime alone,
+    so every file is also re-stat'ed once per `restat_interval` seconds
+    (SPEC_INDEX_RESTAT_INTERVAL) by a background thread, never on the
+    lookup itself, and content changes show up shortly after. The index is
+    persisted to SPEC_INDEX_PATH so a restart with an unchanged directory
+    needs no scan at all.
+    """
+
+    def __init__(self, specs_directory: Path, index_path: Optional[str] = None, pattern: Optional[str] = None, restat_interval: Optional[float] = None):
+        self.specs_directory = specs_directory
+        self.index_path = Path(index_path or config.SPEC_INDEX_PATH)
+        self.pattern = re.compile(pattern or config.SPEC_PART_NUMBER_PATTERN)
+        self.restat_interval = config.SPEC_INDEX_RESTAT_INTERVAL if restat_interval is None else restat_interval
+        self._lock = threading.Lock()
+        self._last_scan: Optional[float] = None  # time.monotonic() of the last full scan (or load)
+        self._restat_thread: Optional[threading.Thread] = None
+        self._dir_mtime_ns: Optional[int] = None
+        self._files: Dict[str, Tuple[int, int]] = {}  # filename -> (size, mtime_ns)
+        self._parts: Dict[str, List[str]] = {}  # part number -> sorted filenames
+        self._load()
+
+    def part_numbers_in(self, filename: str) -> List[str]:
+        """Part numbers mentioned in a spec filename"""
+        return list(dict.fromkeys(self.pattern.findall(Path(filename).stem)))
+
+    def files_for_part(self, part_number: str) -> List[Tuple[str, int, int]]:
+        """(filename, size, mtime_ns) of every spec for the part, sorted by filename"""
+        self.ensure_current()
+        files = self._files
+        return [(name, *files[name]) for name in self._parts.get(part_number, []) if name in files]
+
+    def filenames(self) -> List[str]:
+        """All indexed filenames"""
+        self.ensure_current()
+        return list(self._files)
+
+    def files(self) -> Dict[str, Tuple[int, int]]:
+        """Snapshot of every indexed file: filename -> (size, mtime_ns)"""
+        self.ensure_current()
+        return dict(self._files)
+
+    def file_info(self, filename: str) -> Optional[Tuple[int, int]]:
+        """(size, mtime_ns) of an indexed file"""
+        self.ensure_current()
+        return self._files.get(filename)
+
+    def ensure_current(self) -> Optional[SpecIndexChanges]:
+        """
+        Rescan if the directory changed since the last scan; returns what
+        changed. If only the re-stat interval has elapsed, the rescan runs
+        in a background thread and None is returned straight away.
+        """
+        try:
+            dir_mtime_ns = self.specs_directory.stat().st_mtime_ns
+        except OSError:
+            dir_mtime_ns = None
+        if dir_mtime_ns != self._dir_mtime_ns or (dir_mtime_ns is None and self._files) or self._last_scan is None:
+            return self.rescan()
+        if time.monotonic() - self._last_scan >= self.restat_interval:
+            self._schedule_restat()
+        return None
+
+    def _schedule_restat(self):
+        """Start a background rescan unless one is already running"""
+        with self._lock:
+            thread = self._restat_thread
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self._restat_in_background, name="spec-index-restat", daemon=True)
+            self._restat_thread = thread
+            thread.start()
+
+    def _restat_in_background(self):
+        try:
+            self.rescan()
+        except OSError as e:
+            print(f"⚠️  Spec index re-stat failed: {e}")
+
+    def rescan(self) -> SpecIndexChanges:
+        """Scan the directory, swap in the new index and persist it"""
+        with self._lock:
+            try:
+                dir_mtime_ns = self.specs_directory.stat().st_mtime_ns
+            except OSError:
+                dir_mtime_ns = None
+
+            files: Dict[str, Tuple[int, int]] = {}
+            if dir_mtime_ns is not None:
+                with os.scandir(self.specs_directory) as entries:
+                    for entry in entries:
+                        # Dotfiles are not specs (e.g. upload links being moved into place)
+                        if entry.is_file() and not entry.name.startswith("."):
+                            stat = entry.stat()
+                            files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+            old_files = self._files
+            changes = SpecIndexChanges(
+                added=sorted(name for name in files if name not in old_files),
+                modified=sorted(name for name in files if name in old_files and old_files[name] != files[name]),
+                removed=sorted(name for name in old_files if name not in files)
+            )
+
+            self._last_scan = time.monotonic()
+            if not changes and dir_mtime_ns == self._dir_mtime_ns:
+                return changes
+            self._files = files
+            self._parts = self._build_parts(files)
+            self._dir_mtime_ns = dir_mtime_ns
+            self._save()
+            return changes
+
+    def add_file(self, filename: str) -> Tuple[int, int]:
+        """
+        Index one file just written into the directory (e.g. an upload)
+        without rescanning it; call ensure_current() before writing the file
+        so earlier changes are not skipped. Returns the file's (size, mtime_ns).
+        """
+        with self._lock:
+            stat = (self.specs_directory / filename).stat()
+            files = dict(self._files)
+            files[filename] = (stat.st_size, stat.st_mtime_ns)
+            parts = dict(self._parts)
+            for part_number in self.part_numbers_in(filename):
+                names = parts.get(part_number, [])
+                if filename not in names:
+                    parts[part_number] = sorted(names + [filename])
+            self._files = files
+            self._parts = parts
+            # The directory mtime now reflects this write; adopting it avoids a rescan
+            self._dir_mtime_ns = self.specs_directory.stat().st_mtime_ns
+            self._save()
+            return files[filename]
+
+    def _build_parts(self, files: Dict[str, Tuple[int, int]]) -> Dict[str, List[str]]:
+        parts: Dict[str, List[str]] = {}
+        for name in sorted(files):
+            for part_number in self.part_numbers_in(name):
+                parts.setdefault(part_number, []).append(name)
+        return parts
+
+    def _load(self):
+        """Load the persisted index if it was built for this directory and pattern"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (
+            data.get("version") != INDEX_VERSION
+            or data.get("directory") != str(self.specs_directory.resolve())
+            or data.get("pattern") != self.pattern.pattern
+        ):
+            return
+        self._files = {name: (info[0], info[1]) for name, info in data.get("files", {}).items()}
+        self._parts = data.get("parts", {})
+        self._dir_mtime_ns = data.get("dir_mtime_ns")
+        # Counts as a scan: the directory mtime check still catches additions and removals
+        self._last_scan = time.monotonic()
+
+    def _save(self):
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix(self.index_path.suffix + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": INDEX_VERSION,
+                    "directory": str(self.specs_directory.resolve()),
+                    "pattern": self.pattern.pattern,
+                    "dir_mtime_ns": self._dir_mtime_ns,
+                    "files": self._files,
+                    "parts": self._parts
+                }, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Error saving spec index: {e}")
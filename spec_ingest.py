@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Parallel text extraction for spec files.
+
+PDF parsing is pure-Python CPU work, so threads cannot overlap it. Spec
+files are instead extracted in a bounded pool of worker processes, each
+file under a wall-clock timeout and a page limit, and the results are
+recorded in the SpecTextCache by the parent process.
+
+Ingest a whole directory using every core with:
+
+    python spec_ingest.py [SPECS_DIRECTORY] [--workers N] [--timeout S] [--max-pages P]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Any, Set
+from config import config
+from spec_text_cache import get_spec_text_cache, extract_spec_content, file_sha256, SPEC_EXTENSIONS
+
+class SpecExtractionTimeout(Exception):
+    """A spec file took longer than the per-file timeout to extract"""
+
+def _raise_timeout(signum, frame):
+    raise SpecExtractionTimeout()
+
+def extract_spec(spec_path: str, max_pages: int, timeout: float, keywords_only: bool = False) -> Dict[str, Any]:
+    """
+    Worker-process entry point: hash a spec file and extract its text and
+    keywords (keywords only, stopping at the first page that resolves them
+    all, when `keywords_only`). Raises SpecExtractionTimeout if it runs past `timeout` seconds
+    (enforced with SIGALRM where the platform has it).
+    """
+    use_alarm = timeout > 0 and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        content_hash = file_sha256(spec_path)
+        return {"sha256": content_hash, **extract_spec_content(spec_path, keywords_only, max_pages)}
+    except SpecExtractionTimeout:
+        raise SpecExtractionTimeout(f"{os.path.basename(spec_path)} timed out after {timeout:g}s")
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+class SpecIngestor:
+    """
+    Process pool for spec text extraction.
+
+    The pool is started on first use with the "spawn" start method, so
+    workers never inherit the API's event loop, sockets or SQLite handles;
+    they only read files and return results, and every cache write happens
+    in the calling process.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None, max_pages: Optional[int] = None):
+        self.max_workers = max(1, max_workers or config.SPEC_INGEST_WORKERS)
+        self.timeout = config.SPEC_INGEST_TIMEOUT if timeout is None else timeout
+        self.max_pages = config.SPEC_MAX_PAGES if max_pages is None else max_pages
+        self.cache = get_spec_text_cache()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _submit(self, spec_path: str, keywords_only: bool = False) -> Future:
+        args = (extract_spec, spec_path, self.max_pages, self.timeout, keywords_only)
+        try:
+            return self._get_pool().submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed by the OS); start a fresh pool
+            self._pool = None
+            return self._get_pool().submit(*args)
+
+    def _store(self, spec_path: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.cache.store(spec_path, result["sha256"], result["text"], result["keywords"])
+        return result
+
+    async def extract(self, spec_path: str, keywords_only: bool = False) -> Dict[str, Any]:
+        """
+        Text, keywords and sha256 of a spec file: served from the cache, or
+        extracted in the pool without blocking the event loop. With
+        keywords_only, "text" may be None.
+        """
+        cached = await asyncio.to_thread(self.cache.lookup, spec_path, not keywords_only)
+        if cached is not None:
+            return cached
+        future = self._submit(spec_path, keywords_only)
+        # Parent-side guard for platforms where the worker cannot enforce the timeout itself
+        wait_timeout = self.timeout + 5 if self.timeout > 0 else None
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=wait_timeout)
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+        return await asyncio.to_thread(self._store, spec_path, result)
+
+    def ingest_files(self, paths: Iterable[str]) -> Dict[str, int]:
+        """Extract every uncached spec file, keeping at most two files per worker in flight"""
+        stats = {"files": 0, "cached": 0, "extracted": 0, "failed": 0}
+        max_in_flight = self.max_workers * 2
+        in_flight: Dict[Future, str] = {}
+
+        def drain(done: Set[Future]):
+            for future in done:
+                spec_path = in_flight.pop(future)
+                try:
+                    self._store(spec_path, future.result())
+                    stats["extracted"] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"Error extracting {os.path.basename(spec_path)}: {e}")
+
+        for spec_path in paths:
+            if os.path.splitext(spec_path)[1].lower() not in SPEC_EXTENSIONS:
+                continue
+            stats["files"] += 1
+            try:
+                if self.cache.lookup(spec_path) is not None:
+                    stats["cached"] += 1
+                    continue
+            except OSError as e:
+                stats["failed"] += 1
+                print(f"Error reading {os.path.basename(spec_path)}: {e}")
+                continue
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                drain(done)
+            in_flight[self._submit(spec_path)] = spec_path
+
+        if in_flight:
+            done, _ = wait(in_flight)
+            drain(done)
+        return stats
+
+    def ingest_directory(self, directory: str) -> Dict[str, int]:
+        """Extract every uncached spec file in a directory"""
+        paths: List[str] = sorted(
+            str(path) for path in Path(directory).iterdir() if path.is_file()
+        )
+        return self.ingest_files(paths)
+
+    def shutdown(self):
+        """Stop the worker processes (called on app shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+_spec_ingestor: Optional[SpecIngestor] = None
+
+def get_spec_ingestor() -> SpecIngestor:
+    """Process-wide SpecIngestor (the pool starts on first extraction)"""
+    global _spec_ingestor
+    if _spec_ingestor is None:
+        _spec_ingestor = SpecIngestor()
+    return _spec_ingestor
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract spec text/keywords in parallel into the spec text cache")
+    parser.add_argument("directory", nargs="?", default=config.SPECS_DIRECTORY, help="Spec directory to ingest")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=config.SPEC_INGEST_TIMEOUT, help="Per-file timeout in seconds (0 = none)")
+    parser.add_argument("--max-pages", type=int, default=config.SPEC_MAX_PAGES, help="PDF pages read per file (0 = all)")
+    args = parser.parse_args()
+
+    if not Path(args.directory).is_dir():
+        print(f"❌ Spec directory not found: {args.directory}")
+        sys.exit(1)
+
+    ingestor = SpecIngestor(max_workers=args.workers, timeout=args.timeout, max_pages=args.max_pages)
+    start = time.time()
+    try:
+        stats = ingestor.ingest_directory(args.directory)
+    finally:
+        ingestor.shutdown()
+    print(
+        f"✅ {stats['files']} spec files with {ingestor.max_workers} workers: "
+        f"{stats['extracted']} extracted, {stats['cached']} already cached, "
+        f"{stats['failed']} failed ({time.time() - start:.1f}s)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+INDEX_VERSION = 1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Matched terms are tracked as a per-document bitmask
+MAX_QUERY_TERMS = 63
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to "
+    "was were what which with".split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_FILLER_PERCENT = re.compile(r"(\d{1,2})\s*%\s*(gf|cf|glass|carbon)")
+_POLYAMIDE = re.compile(r"(?<![a-z0-9])pa\s*-?\s*(6|66|11|12|46)(?![0-9])")
+
+def _stem(token: str) -> str:
+    """Light suffix stripping so "inserts"/"insert" and "molded"/"molding" meet"""
+    if not token.isalpha():
+        return token
+    for suffix in ("ings", "ing", "ed", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3 and not token.endswith("ss"):
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased, lightly stemmed terms of a text. Filler contents are also
+    emitted in code form ("30% GF" / "30% glass fibers" -> "gf30") and
+    polyamide grades without separators ("PA 6" -> "pa6"), so queries and
+    drawings written either way match.
+    """
+    lowered = text.lower()
+    terms = [_stem(token) for token in _TOKEN.findall(lowered) if token not in STOPWORDS]
+    for amount, filler in _FILLER_PERCENT.findall(lowered):
+        terms.append({"glass": "gf", "carbon": "cf"}.get(filler, filler) + amount)
+    for grade in _POLYAMIDE.findall(lowered):
+        terms.append("pa" + grade)
+    return terms
+
+class _Segment:
+    """
+    One immutable index segment on disk, as NumPy arrays opened with mmap:
+
+    - offsets.npy   int64[n_terms + 1]  postings range of each term
+    - doc_ids.npy   int32[n_postings]   segment-local document ids
+    - tfs.npy       float32[n_postings] term frequencies
+    - doc_len.npy   int32[n_docs]       document lengths in terms
+    - meta.json     sorted terms and document filenames
+    """
+
+    def __init__(self, path: Path):
+        self.id = path.name
+        with open(path / "meta.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.filenames: List[str] = meta["filenames"]
+        self.term_ids: Dict[str, int] = {term: i for i, term in enumerate(meta["terms"])}
+        self.offsets = np.load(path / "offsets.npy", mmap_mode='r')
+        self.doc_ids = np.load(path / "doc_ids.npy", mmap_mode='r')
+        self.tfs = np.load(path / "tfs.npy", mmap_mode='r')
+        self.doc_len = np.load(path / "doc_len.npy", mmap_mode='r')
+        self.live = np.ones(len(self.filenames), dtype=bool)
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return None
+        start, end = int(self.offsets[term_id]), int(self.offsets[term_id + 1])
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    @staticmethod
+    def write(path: Path, documents: Dict[str, List[str]]):
+        """Build a segment from {filename: terms} into `path` (written to a temp dir, then renamed)"""
+        filenames = sorted(documents)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len = np.zeros(len(filenames), dtype=np.int32)
+        for doc_id, filename in enumerate(filenames):
+            counts = Counter(documents[filename])
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids = np.empty(sum(len(p) for p in postings.values()), dtype=np.int32)
+        tfs = np.empty(len(doc_ids), dtype=np.float32)
+        position = 0
+        for i, term in enumerate(terms):
+            entries = postings[term]
+            doc_ids[position:position + len(entries)] = [doc_id for doc_id, _ in entries]
+            tfs[position:position + len(entries)] = [tf for _, tf in entries]
+            position += len(entries)
+            offsets[i + 1] = position
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        np.save(tmp_path / "offsets.npy", offsets)
+        np.save(tmp_path / "doc_ids.npy", doc_ids)
+        np.save(tmp_path / "tfs.npy", tfs)
+        np.save(tmp_path / "doc_len.npy", doc_len)
+        with open(tmp_path / "meta.json", 'w', encoding='utf-8') as f:
+            json.dump({"terms": terms, "filenames": filenames}, f)
+        os.rename(tmp_path, path)
+
+class SpecSearchIndex:
+    """
+    BM25 full-text index over spec file text, stored as immutable segments
+    of memory-mapped NumPy arrays plus a small JSON manifest.
+
+    Every uvicorn worker maps the same files, so the OS page cache holds one
+    copy. Updates are incremental: changed and new files go into a fresh
+    segment, the manifest points each filename at the segment holding its
+    current version (older copies become dead), and once there are more than
+    SPEC_SEARCH_MAX_SEGMENTS segments everything is merged into one. Writers
+    serialize on a lock file; readers notice a new manifest by its mtime and
+    remap.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_segments: Optional[int] = None):
+        self.directory = Path(directory or config.SPEC_SEARCH_DIRECTORY)
+        self.max_segments = max_segments or config.SPEC_SEARCH_MAX_SEGMENTS
+        self.manifest_path = self.directory / "manifest.json"
+        self._lock = threading.RLock()
+        self._manifest_mtime_ns: Optional[int] = None
+        self._docs: Dict[str, List] = {}  # filename -> [size, mtime_ns, segment id]
+        self._segments: List[_Segment] = []
+        self._live_docs = 0
+        self._avg_doc_len = 0.0
+
+    @contextmanager
+    def _write_lock(self):
+        """Serialize writers within this process and across worker processes"""
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / "lock", 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get("version") == INDEX_VERSION:
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "segments": [], "docs": {}}
+
+    def _reload_if_changed(self):
+        """Remap segments when another process (or this one) published a new manifest"""
+        try:
+            mtime_ns = self.manifest_path.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns == self._manifest_mtime_ns:
+            return
+        with self._lock:
+            manifest = self._read_manifest()
+            docs = manifest["docs"]
+            segments = []
+            for segment_id in manifest["segments"]:
+                try:
+                    segment = _Segment(self.directory / segment_id)
+                except (OSError, ValueError) as e:
+                    print(f"Error opening spec search segment {segment_id}: {e}")
+                    continue
+                segment.live = np.array(
+                    [docs.get(name, [None, None, None])[2] == segment.id for name in segment.filenames],
+                    dtype=bool
+                )
+                segments.append(segment)
+            live_lengths = [segment.doc_len[segment.live] for segment in segments]
+            total_length = sum(int(lengths.sum()) for lengths in live_lengths)
+            self._live_docs = sum(len(lengths) for lengths in live_lengths)
+            self._avg_doc_len = total_length / self._live_docs if self._live_docs else 0.0
+            self._docs = docs
+            self._segments = segments
+            self._manifest_mtime_ns = mtime_ns
+
+    def is_current(self, files: Dict[str, Tuple[int, int]]) -> bool:
+        """True if the index holds exactly these files at these (size, mtime_ns)"""
+        self._reload_if_changed()
+        docs = self._docs
+        return len(docs) == len(files) and all(
+            name in docs and tuple(docs[name][:2]) == tuple(info) for name, info in files.items()
+        )
+
+    def missing(self, files: Dict[str, Tuple[int, int]]) -> List[str]:
+        """Filenames in `files` that are not indexed at their current (size, mtime_ns)"""
+        self._reload_if_changed()
+        docs = self._docs
+        return sorted(name for name, info in files.items() if name not in docs or tuple(docs[name][:2]) != tuple(info))
+
+    def sync(self, files: Dict[str, Tuple[int, int]], text_for: Callable[[str], Optional[str]]) -> Dict[str, int]:
+        """
+        Bring the index in line with `files` ({filename: (size, mtime_ns)}),
+        reading the text of new or changed files through `text_for`.
+        Idempotent: files already indexed at the same size/mtime are skipped.
+        Files whose text is not available yet (`text_for` returns None) are
+        left pending, so a later sync indexes them.
+        """
+        with self._write_lock():
+            manifest = self._read_manifest()
+            docs: Dict[str, List] = manifest["docs"]
+            changed = sorted(
+                name for name, info in files.items()
+                if name not in docs or tuple(docs[name][:2]) != tuple(info)
+            )
+            removed = [name for name in docs if name not in files]
+            documents: Dict[str, List[str]] = {}
+            for name in changed:
+                text = text_for(name)
+                if text is not None:
+                    documents[name] = tokenize(text)
+            stats = {
+                "indexed": len(documents),
+                "pending": len(changed) - len(documents),
+                "removed": len(removed),
+                "merged": 0
+            }
+            if not documents and not removed:
+                return stats
+
+            for name in removed:
+                del docs[name]
+            segments: List[str] = list(manifest["segments"])
+            if documents:
+                segment_id = f"seg-{time.time_ns()}-{os.getpid()}"
+                _Segment.write(self.directory / segment_id, documents)
+                segments.append(segment_id)
+                for name in documents:
+                    docs[name] = [files[name][0], files[name][1], segment_id]
+
+            live_segments = {info[2] for info in docs.values()}
+            if len(live_segments) > self.max_segments:
+                # Merge every live document into one segment, from the postings already on disk
+                segment_id = f"seg-{time.time_ns()}-{os.getpid()}"
+                documents = self._live_documents(docs, live_segments)
+                _Segment.write(self.directory / segment_id, documents)
+                for info in docs.values():
+                    info[2] = segment_id
+                segments, live_segments = [segment_id], {segment_id}
+                stats["merged"] = len(documents)
+
+            manifest = {
+                "version": INDEX_VERSION,
+                "segments": [s for s in segments if s in live_segments],
+                "docs": docs
+            }
+            tmp_path = self.manifest_path.with_suffix(".json.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            os.replace(tmp_path, self.manifest_path)
+
+            # Drop dead segments. Readers that still map them keep working on
+            # POSIX; on Windows the delete fails and is retried on the next sync.
+            for path in self.directory.glob("seg-*"):
+                if path.name not in live_segments:
+                    shutil.rmtree(path, ignore_errors=True)
+            self._manifest_mtime_ns = None
+            self._reload_if_changed()
+            return stats
+
+    def _live_documents(self, docs: Dict[str, List], segment_ids: Iterable[str]) -> Dict[str, List[str]]:
+        """Terms of every live document, rebuilt from the postings of its segment"""
+        documents: Dict[str, List[str]] = {}
+        for segment_id in segment_ids:
+            segment = _Segment(self.directory / segment_id)
+            live = [docs.get(name, [None, None, None])[2] == segment_id for name in segment.filenames]
+            for doc_id, name in enumerate(segment.filenames):
+                if live[doc_id]:
+                    documents[name] = []
+            for term, term_id in segment.term_ids.items():
+                start, end = int(segment.offsets[term_id]), int(segment.offsets[term_id + 1])
+                for doc_id, tf in zip(segment.doc_ids[start:end].tolist(), segment.tfs[start:end].tolist()):
+                    if live[doc_id]:
+                        documents[segment.filenames[doc_id]].extend([term] * int(tf))
+        return documents
+
+    def search(self, query: str, limit: int = 10) -> Tuple[List[Dict], int]:
+        """
+        BM25-ranked documents for a free-text query: ([{"filename", "score",
+        "matched_terms"}], total number of matching documents)
+        """
+        self._reload_if_changed()
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        segments, live_docs, avg_doc_len = self._segments, self._live_docs, self._avg_doc_len
+        if not terms or not live_docs:
+            return [], 0
+
+        # Exact document frequencies over live documents
+        term_postings = []
+        for term in terms:
+            per_segment = []
+            df = 0
+            for segment in segments:
+                postings = segment.postings(term)
+                if postings is None:
+                    continue
+                doc_ids, tfs = postings
+                live = segment.live[doc_ids]
+                if live.any():
+                    per_segment.append((segment, doc_ids[live], tfs[live]))
+                    df += int(live.sum())
+            if df:
+                term_postings.append((term, df, per_segment))
+
+        scores = {segment.id: np.zeros(len(segment.filenames), dtype=np.float32) for segment in segments}
+        matched = {segment.id: np.zeros(len(segment.filenames), dtype=np.int64) for segment in segments}
+        for term_index, (term, df, per_segment) in enumerate(term_postings):
+            idf = math.log(1.0 + (live_docs - df + 0.5) / (df + 0.5))
+            for segment, doc_ids, tfs in per_segment:
+                doc_len = segment.doc_len[doc_ids]
+                norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_len / avg_doc_len)
+                scores[segment.id][doc_ids] += idf * tfs * (BM25_K1 + 1.0) / (tfs + norm)
+                matched[segment.id][doc_ids] |= 1 << term_index
+
+        candidates: List[Tuple[float, str, int]] = []
+        total = 0
+        for segment in segments:
+            segment_scores = scores[segment.id]
+            hits = np.flatnonzero(segment_scores > 0)
+            total += len(hits)
+            if len(hits) > limit:
+                hits = hits[np.argpartition(-segment_scores[hits], limit - 1)[:limit]]
+            candidates.extend(
+                (float(segment_scores[i]), segment.filenames[i], int(matched[segment.id][i])) for i in hits
+            )
+
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        results = [
+            {
+                "filename": filename,
+                "score": round(score, 4),
+                "matched_terms": [term for i, (term, _, _) in enumerate(term_postings) if mask >> i & 1]
+            }
+            for score, filename, mask in candidates[:limit]
+        ]
+        return results, total
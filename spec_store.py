@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+import aiofiles
+from config import config
+
+# Blobs are shared by every name linked to them, so nobody may write to one in place
+BLOB_MODE = 0o444
+
+class SpecUploadTooLarge(Exception):
+    """The upload exceeded SPEC_UPLOAD_MAX_BYTES"""
+
+class SpecUploadEmpty(Exception):
+    """The upload had no content"""
+
+class SpecBlobStore:
+    """
+    Content-addressed store for uploaded spec files.
+
+    Each distinct file is kept once as blobs/<sha256[:2]>/<sha256> and
+    appears in SPECS_DIRECTORY as a hard link (a symlink where hard links
+    are not possible), so a datasheet shared by many parts costs its bytes
+    once. Blobs are made read-only, so the names sharing one cannot be
+    edited in place; replacing a spec swaps the link (os.replace of a new
+    file), which leaves every other name untouched. The store must live
+    outside SPECS_DIRECTORY so downloads cannot reach it.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.directory = Path(directory or config.SPEC_BLOB_DIRECTORY)
+        self.max_bytes = config.SPEC_UPLOAD_MAX_BYTES if max_bytes is None else max_bytes
+
+    def blob_path(self, content_hash: str) -> Path:
+        return self.directory / content_hash[:2] / content_hash
+
+    async def write_stream(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int, bool]:
+        """
+        Write a byte stream into the store while hashing it, one chunk at a
+        time. Returns (sha256, size, created); created is False when the
+        content was already stored and the new copy was discarded.
+        Raises SpecUploadTooLarge past max_bytes and SpecUploadEmpty for an
+        empty body; nothing is stored in either case. File system calls run
+        off the event loop.
+        """
+        tmp_dir = self.directory / "tmp"
+        await asyncio.to_thread(tmp_dir.mkdir, parents=True, exist_ok=True)
+        tmp_path = tmp_dir / uuid.uuid4().hex
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if self.max_bytes and size > self.max_bytes:
+                        raise SpecUploadTooLarge(f"Upload exceeds {self.max_bytes} bytes")
+                    digest.update(chunk)
+                    await f.write(chunk)
+            if size == 0:
+                raise SpecUploadEmpty("Empty upload")
+            content_hash = digest.hexdigest()
+            created = await asyncio.to_thread(self._publish, tmp_path, content_hash)
+            return content_hash, size, created
+        finally:
+            await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+
+    def _publish(self, tmp_path: Path, content_hash: str) -> bool:
+        """Move a finished upload into place as a read-only blob; False if that content is already stored"""
+        blob_path = self.blob_path(content_hash)
+        if blob_path.exists():
+            return False
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(tmp_path, BLOB_MODE)
+        os.replace(tmp_path, blob_path)
+        return True
+
+    def link(self, content_hash: str, target: Path) -> str:
+        """
+        Point `target` at a stored blob, atomically replacing any existing
+        file. Returns "hardlink" or "symlink".
+        """
+        blob_path = self.blob_path(content_hash)
+        tmp_target = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(blob_path, tmp_target)
+            kind = "hardlink"
+        except OSError:
+            # Different filesystem, or hard links not supported
+            os.symlink(os.path.abspath(blob_path), tmp_target)
+            kind = "symlink"
+        try:
+            os.replace(tmp_target, target)
+        except OSError:
+            tmp_target.unlink(missing_ok=True)
+            raise
+        return kind
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of text and keywords extracted from spec files.
+
+Entries are keyed by file identity (path, size, mtime) and by content
+hash, so an unchanged file is never opened again and a copied or touched
+file with the same content reuses the earlier extraction.
+
+Pre-warm the cache for a whole directory with:
+
+    python spec_text_cache.py [SPECS_DIRECTORY]
+
+(single process; spec_ingest.py does the same across all cores).
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Any
+import PyPDF2
+from config import config
+from cache_store import SQLiteCache
+from keyword_extractor import extract_keywords, extract_keywords_from_pages, KEYWORD_FIELDS
+
+# Bump when text or keyword extraction changes so stale entries are re-extracted
+EXTRACTOR_VERSION = "4"
+
+SPEC_EXTENSIONS = ('.txt', '.pdf')
+
+def empty_keywords() -> Dict[str, str]:
+    return {field: "" for field in KEYWORD_FIELDS}
+
+def iter_spec_pages(spec_path: str, max_pages: Optional[int] = None) -> Iterator[str]:
+    """
+    Text of a .txt or .pdf spec, one page at a time (a .txt file is one page;
+    other file types yield nothing). PDFs stop after `max_pages` pages, and
+    pages are only extracted as they are consumed.
+    """
+    max_pages = config.SPEC_MAX_PAGES if max_pages is None else max_pages
+    ext = os.path.splitext(spec_path)[1].lower()
+    if ext == '.txt':
+        with open(spec_path, 'r', encoding='utf-8', errors='ignore') as f:
+            yield f.read()
+    elif ext == '.pdf':
+        with open(spec_path, 'rb') as f:
+            reader = PyPDF2.PdfReader(f)
+            pages = reader.pages[:max_pages] if max_pages > 0 else reader.pages
+            for page in pages:
+                yield page.extract_text() or ''
+
+def read_spec_text(spec_path: str, max_pages: Optional[int] = None) -> str:
+    """Plain text of a .txt or .pdf spec ("" for other file types); PDFs stop after `max_pages` pages"""
+    return " ".join(iter_spec_pages(spec_path, max_pages))
+
+def extract_spec_content(spec_path: str, keywords_only: bool = False, max_pages: Optional[int] = None) -> Dict[str, Any]:
+    """
+    {"text", "keywords"} of a spec file. keywords_only stops reading pages as
+    soon as every keyword field is resolved and returns text None.
+    """
+    if keywords_only:
+        return {"text": None, "keywords": extract_keywords_from_pages(iter_spec_pages(spec_path, max_pages))}
+    text = read_spec_text(spec_path, max_pages)
+    return {"text": text, "keywords": extract_keywords(text)}
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class SpecTextCache:
+    """
+    Two-level sidecar cache:
+
+    - identity (absolute path, size, mtime_ns) -> content hash
+    - content hash -> {"text", "keywords"}
+
+    A lookup for an unchanged file is a stat plus one SQLite read. Callers
+    that only need keywords can skip the full text: the keyword scan stops
+    at the first page where every field is resolved and the entry is stored
+    with text None, to be completed when the full text is first needed.
+    """
+
+    def __init__(self):
+        self.identities = SQLiteCache(
+            "spec_identity",
+            ttl=config.SPEC_TEXT_CACHE_TTL,
+            max_entries=config.SPEC_TEXT_CACHE_MAX_ENTRIES
+        )
+        self.contents = SQLiteCache(
+            "spec_text",
+            ttl=config.SPEC_TEXT_CACHE_TTL,
+            max_entries=config.SPEC_TEXT_CACHE_MAX_ENTRIES
+        )
+
+    def _identity_key(self, spec_path: str) -> str:
+        stat = os.stat(spec_path)
+        return f"{os.path.abspath(spec_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+    def lookup(self, spec_path: str, need_text: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Cached {"text", "keywords", "sha256"} without touching the file contents,
+        or None. With need_text=False a keywords-only entry (text None) is a hit.
+        """
+        content_hash = self.identities.get(self._identity_key(spec_path))
+        if content_hash is None:
+            return None
+        entry = self.contents.get(f"{EXTRACTOR_VERSION}:{content_hash}")
+        if entry is None or (need_text and entry.get("text") is None):
+            return None
+        return {**entry, "sha256": content_hash}
+
+    def store(self, spec_path: str, content_hash: str, text: Optional[str], keywords: Dict[str, str]):
+        """Record an extraction made elsewhere (e.g. by a worker process); text None = keywords only"""
+        content_key = f"{EXTRACTOR_VERSION}:{content_hash}"
+        existing = self.contents.get(content_key) if text is None else None
+        if existing is None or existing.get("text") is None:
+            self.contents.set(content_key, {"text": text, "keywords": keywords})
+        self.identities.set(self._identity_key(spec_path), content_hash)
+
+    def link(self, spec_path: str, content_hash: str, need_text: bool = True) -> bool:
+        """
+        Attach a file whose content hash is already known to an existing
+        extraction of the same content. Returns False if that content was
+        never extracted (or only its keywords were, when need_text).
+        """
+        entry = self.contents.get(f"{EXTRACTOR_VERSION}:{content_hash}")
+        if entry is None or (need_text and entry.get("text") is None):
+            return False
+        self.identities.set(self._identity_key(spec_path), content_hash)
+        return True
+
+    def get(self, spec_path: str, need_text: bool = True) -> Dict[str, Any]:
+        """
+        Text and keywords for a spec file, extracting (and caching) them on a miss.
+        With need_text=False only the pages needed to resolve the keywords are
+        read and "text" may be None. Raises OSError if the file cannot be read.
+        """
+        cached = self.lookup(spec_path, need_text)
+        if cached is not None:
+            return cached
+
+        content_hash = file_sha256(spec_path)
+        entry = self.contents.get(f"{EXTRACTOR_VERSION}:{content_hash}")
+        if entry is None or (need_text and entry.get("text") is None):
+            entry = extract_spec_content(spec_path, keywords_only=not need_text)
+        self.store(spec_path, content_hash, entry["text"], entry["keywords"])
+        return {**entry, "sha256": content_hash}
+
+    def warm(self, directory: str) -> Dict[str, int]:
+        """Extract every spec in a directory that is not cached yet"""
+        stats = {"files": 0, "cached": 0, "extracted": 0, "failed": 0}
+        for path in sorted(Path(directory).iterdir()):
+            if not path.is_file() or path.suffix.lower() not in SPEC_EXTENSIONS:
+                continue
+            stats["files"] += 1
+            try:
+                if self.lookup(str(path)) is not None:
+                    stats["cached"] += 1
+                else:
+                    self.get(str(path))
+                    stats["extracted"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"Error extracting {path.name}: {e}")
+        return stats
+
+_spec_text_cache: Optional[SpecTextCache] = None
+
+def get_spec_text_cache() -> SpecTextCache:
+    """Process-wide SpecTextCache (opened on first use)"""
+    global _spec_text_cache
+    if _spec_text_cache is None:
+        _spec_text_cache = SpecTextCache()
+    return _spec_text_cache
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the spec text/keyword cache")
+    parser.add_argument("directory", nargs="?", default=config.SPECS_DIRECTORY, help="Spec directory to scan")
+    args = parser.parse_args()
+
+    if not Path(args.directory).is_dir():
+        print(f"❌ Spec directory not found: {args.directory}")
+        sys.exit(1)
+
+    start = time.time()
+    stats = get_spec_text_cache().warm(args.directory)
+    print(
+        f"✅ {stats['files']} spec files: {stats['extracted']} extracted, "
+        f"{stats['cached']} already cached, {stats['failed']} failed "
+        f"({time.time() - start:.1f}s)"
+    )
+
+if __name__ == "__main__":
+    main()
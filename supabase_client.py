@@ -1,139 +1,456 @@
-import requests
-from typing import List, Dict, Any, Optional
+import asyncio
+import re
+import httpx
+import numpy as np
+from collections import deque
+from typing import List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Deque, Tuple, TypeVar
 from config import config
 import json
 
-class SupabaseClient:
-    def __init__(self):
-        self.supabase_url = config.SUPABASE_URL
-        self.supabase_key = config.SUPABASE_ANON_KEY
+T = TypeVar("T")
+
+class PostgrestTransport:
+    """
+    Shared, keep-alive connection pool for Supabase's PostgREST API.
+
+    One transport serves the whole app, so repeated queries reuse open
+    connections instead of paying a TLS handshake each time. httpx async
+    clients are bound to the event loop that created them, so the pool is
+    (re)created lazily for the running loop; in the API that is a single
+    pool per worker.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None
+    ):
+        self.base_url = f"{base_url or config.SUPABASE_URL or ''}/rest/v1"
+        self.api_key = api_key or config.SUPABASE_ANON_KEY
+        self.pool_size = pool_size or config.SUPABASE_POOL_SIZE
+        self.timeout = timeout or config.SUPABASE_TIMEOUT
+        self.connect_timeout = connect_timeout or config.SUPABASE_CONNECT_TIMEOUT
         self.headers = {
-            'apikey': self.supabase_key,
-            'Authorization': f'Bearer {self.supabase_key}',
+            'apikey': self.api_key or '',
+            'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
-    
-    def _make_request(self, method: str, endpoint: str, data: Dict | None = None) -> Dict:
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+            self._loop = loop
+        return self._client
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Dict | None = None,
+        timeout: Optional[float] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """Send a request through the shared pool; `timeout` overrides the default per call"""
+        client = self._get_client()
+        kwargs: Dict[str, Any] = {}
+        if data is not None:
+            kwargs['json'] = data
+        if headers:
+            kwargs['headers'] = headers
+        if timeout is not None:
+            kwargs['timeout'] = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+        return await client.request(method.upper(), endpoint, **kwargs)
+
+    async def aclose(self):
+        """Close the pool (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+transport = PostgrestTransport()
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """
+    Run a SupabaseClient coroutine from synchronous code (scripts, CLIs),
+    closing the pool opened for that one-off event loop afterwards.
+    """
+    async def _run() -> T:
+        try:
+            return await coro
+        finally:
+            await transport.aclose()
+    return asyncio.run(_run())
+
+def _content_range_total(content_range: str) -> Optional[int]:
+    """Total row count of a PostgREST Content-Range header ("0-999/5321"), None if unknown ("0-999/*")"""
+    total = content_range.rpartition('/')[2]
+    return int(total) if total.isdigit() else None
+
+def _in_list(values: List[str]) -> str:
+    """Format values for a PostgREST `in.(...)` filter, quoting each one"""
+    return ",".join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values)
+
+def _row_part_number(row: Dict) -> str:
+    """Part number of a MASTER_FILE / PARTS_BENCHMARKS row (column casing differs between tables)"""
+    return str(row.get('partnumber', row.get('PartNumber', '')))
+
+_BENCHMARK_SUPPLIER_COLUMN = re.compile(config.BENCHMARK_SUPPLIER_COLUMN_PATTERN)
+
+def benchmark_supplier_columns(row: Dict) -> List[str]:
+    """Supplier price columns of a PARTS_BENCHMARKS row: every column named like a supplier number"""
+    return [column for column in row if _BENCHMARK_SUPPLIER_COLUMN.fullmatch(column)]
+
+class TableLoadError(Exception):
+    """A page of a bulk table load failed"""
+
+def rows_to_columns(rows: List[Dict], columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Turn a page of rows into one NumPy array per column. `columns` maps a
+    column name to its dtype: float columns get NaN for missing values,
+    any other dtype is read as text with "" for missing values.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    for name, dtype in columns.items():
+        if np.dtype(dtype).kind in 'fc':
+            arrays[name] = np.array([row.get(name) for row in rows], dtype=dtype).reshape(len(rows))
+        else:
+            arrays[name] = np.array(
+                ["" if row.get(name) is None else str(row.get(name)) for row in rows], dtype=str
+            ).reshape(len(rows))
+    return arrays
+
+class SupabaseClient:
+    def __init__(self, transport: PostgrestTransport = transport):
+        self.transport = transport
+
+    async def _make_request(self, method: str, endpoint: str, data: Dict | None = None, timeout: Optional[float] = None) -> Any:
         """Make a request to Supabase API"""
-        url = f"{self.supabase_url}/rest/v1/{endpoint}"
-        
+        if method.upper() not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=self.headers)
-            elif method.upper() == 'POST':
-                response = requests.post(url, headers=self.headers, json=data)
-            elif method.upper() == 'PUT':
-                response = requests.put(url, headers=self.headers, json=data)
-            elif method.upper() == 'DELETE':
-                response = requests.delete(url, headers=self.headers)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
+            response = await self.transport.request(method, endpoint, data=data, timeout=timeout)
             response.raise_for_status()
             return response.json()
-        
-        except requests.exceptions.RequestException as e:
+
+        except httpx.HTTPError as e:
             print(f"Supabase API error: {e}")
             return {}
-    
-    def get_part_info(self, part_number: str) -> Optional[Dict]:
+
+    async def _select_in(self, table: str, column: str, values: List[str]) -> List[Dict]:
+        """Rows of `table` whose `column` is one of `values`, in one request ([] on error)"""
+        endpoint = f'{table}?"{column}"=in.({_in_list(values)})'
+        result = await self._make_request('GET', endpoint)
+        return result if isinstance(result, list) else []
+
+    async def get_part_info(self, part_number: str) -> Optional[Dict]:
         """Get part information from MASTER_FILE table"""
         try:
             # Query MASTER_FILE table for the part (case-sensitive column name)
-            endpoint = f'MASTER_FILE?"PartNumber"=eq.{part_number}'
-            result = self._make_request('GET', endpoint)
-            
+            result = await self._select_in('MASTER_FILE', 'PartNumber', [str(part_number)])
+
             if result and len(result) > 0:
                 return result[0]  # Return first match
             return None
-            
+
         except Exception as e:
             print(f"Error getting part info: {e}")
             return None
-    
-    def get_benchmark_suppliers(self, part_number: str) -> List[Dict]:
+
+    async def get_parts_info(self, part_numbers: List[str]) -> Dict[str, Dict]:
+        """Get MASTER_FILE rows for several parts in one request, keyed by part number"""
+        unique_numbers = list(dict.fromkeys(str(n) for n in part_numbers if n))
+        if not unique_numbers:
+            return {}
+
+        try:
+            result = await self._select_in('MASTER_FILE', 'PartNumber', unique_numbers)
+
+            parts: Dict[str, Dict] = {}
+            for row in result or []:
+                parts.setdefault(_row_part_number(row), row)  # Keep first match, like get_part_info
+            return parts
+
+        except Exception as e:
+            print(f"Error getting part info: {e}")
+            return {}
+
+    async def get_benchmark_suppliers(
+        self,
+        part_number: str,
+        supplier_lookup: Optional[Callable[[List[str]], Dict[str, Dict]]] = None,
+        benchmark_lookup: Optional[Callable[[List[str]], Dict[str, Dict]]] = None
+    ) -> List[Dict]:
         """Get benchmark supplier information from PARTS_BENCHMARKS table"""
+        suppliers_by_part = await self.get_benchmark_suppliers_bulk([part_number], supplier_lookup, benchmark_lookup)
+        return suppliers_by_part.get(str(part_number), [])
+
+    async def get_benchmark_suppliers_bulk(
+        self,
+        part_numbers: List[str],
+        supplier_lookup: Optional[Callable[[List[str]], Dict[str, Dict]]] = None,
+        benchmark_lookup: Optional[Callable[[List[str]], Dict[str, Dict]]] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get benchmark suppliers for several parts: one PARTS_BENCHMARKS request
+        plus one SUPPLIER_PANEL_CATALOG request for every supplier involved.
+        `supplier_lookup` (e.g. SupplierCatalog.get_many) replaces the second
+        request with an in-memory lookup; `benchmark_lookup` (e.g.
+        BenchmarkIndex.benchmark_records) does the same for the first one,
+        and only parts it does not know are queried.
+        """
+        unique_numbers = list(dict.fromkeys(str(n) for n in part_numbers if n))
+        if not unique_numbers:
+            return {}
+
         try:
-            # Query PARTS_BENCHMARKS table (update column name if needed)
-            endpoint = f'PARTS_BENCHMARKS?"partnumber"=eq.{part_number}'
-            result = self._make_request('GET', endpoint)
-            
-            if not result or len(result) == 0:
-                return []
-            
-            benchmark_record = result[0]
-            suppliers = []
-            
-            # Get current supplier details
-            if benchmark_record.get('currentsuppliernumber'):
-                current_supplier = self.get_supplier_details(benchmark_record['currentsuppliernumber'])
-                if current_supplier:
-                    current_supplier['is_current_supplier'] = True
-                    current_supplier['is_panel_supplier'] = True
-                    suppliers.append(current_supplier)
-            
-            # Get benchmark supplier prices and details
-            # This is a simplified approach - you may need to adjust based on actual schema
-            supplier_columns = ['SUP999', 'SUP001', 'SUP017', 'SUP012']
-            
-            for col in supplier_columns:
-                if col in benchmark_record and benchmark_record[col] is not None:
-                    supplier = self.get_supplier_details(col)
-                    if supplier:
-                        supplier['price'] = benchmark_record[col]
-                        supplier['currency'] = benchmark_record.get('currency')
-                        supplier['is_panel_supplier'] = True
-                        suppliers.append(supplier)
-            
-            return suppliers
-            
+            benchmark_records: Dict[str, Dict] = benchmark_lookup(unique_numbers) if benchmark_lookup is not None else {}
+            missing = [n for n in unique_numbers if n not in benchmark_records]
+            if missing:
+                # Query PARTS_BENCHMARKS table (update column name if needed)
+                result = await self._select_in('PARTS_BENCHMARKS', 'partnumber', missing)
+                for row in result or []:
+                    benchmark_records.setdefault(_row_part_number(row), row)
+
+            if not benchmark_records:
+                return {}
+
+            # Fetch the current supplier and every quoting supplier in one request
+            wanted = []
+            for record in benchmark_records.values():
+                wanted.extend(self._benchmark_supplier_numbers(record))
+            if supplier_lookup is not None:
+                details = supplier_lookup(wanted)
+            else:
+                details = await self.get_suppliers_details(wanted)
+
+            return {
+                part_number: self._join_benchmark_suppliers(record, details)
+                for part_number, record in benchmark_records.items()
+            }
+
         except Exception as e:
             print(f"Error getting benchmark suppliers: {e}")
-            return []
-    
-    def get_supplier_details(self, supplier_number: str) -> Optional[Dict]:
+            return {}
+
+    def _quoted_columns(self, benchmark_record: Dict) -> List[str]:
+        """Supplier columns that carry a price for this benchmark row"""
+        return [col for col in benchmark_supplier_columns(benchmark_record) if benchmark_record[col] is not None]
+
+    def _benchmark_supplier_numbers(self, benchmark_record: Dict) -> List[str]:
+        """Current supplier plus every quoting supplier of a benchmark row"""
+        current_supplier_number = benchmark_record.get('currentsuppliernumber')
+        return ([current_supplier_number] if current_supplier_number else []) + self._quoted_columns(benchmark_record)
+
+    def _join_benchmark_suppliers(self, benchmark_record: Dict, details: Dict[str, Dict]) -> List[Dict]:
+        """Join a benchmark row with prefetched SUPPLIER_PANEL_CATALOG rows"""
+        suppliers = []
+
+        # Get current supplier details
+        current_supplier_number = benchmark_record.get('currentsuppliernumber')
+        if current_supplier_number and current_supplier_number in details:
+            current_supplier = dict(details[current_supplier_number])
+            current_supplier['is_current_supplier'] = True
+            current_supplier['is_panel_supplier'] = True
+            suppliers.append(current_supplier)
+
+        for col in self._quoted_columns(benchmark_record):
+            if col in details:
+                supplier = dict(details[col])
+                supplier['price'] = benchmark_record[col]
+                supplier['currency'] = benchmark_record.get('currency')
+                supplier['is_panel_supplier'] = True
+                suppliers.append(supplier)
+
+        return suppliers
+
+    async def get_supplier_details(self, supplier_number: str) -> Optional[Dict]:
         """Get supplier details from SUPPLIER_PANEL_CATALOG table"""
         try:
-            endpoint = f'SUPPLIER_PANEL_CATALOG?suppliernumber=eq.{supplier_number}'
-            result = self._make_request('GET', endpoint)
-            
+            result = await self._select_in('SUPPLIER_PANEL_CATALOG', 'suppliernumber', [str(supplier_number)])
+
             if result and len(result) > 0:
                 return result[0]
             return None
-            
+
+        except Exception as e:
+            print(f"Error getting supplier details: {e}")
+            return None
+
+    async def get_suppliers_details(self, supplier_numbers: List[str]) -> Dict[str, Dict]:
+        """Get several SUPPLIER_PANEL_CATALOG rows in one request, keyed by supplier number"""
+        unique_numbers = list(dict.fromkeys(str(n) for n in supplier_numbers if n))
+        if not unique_numbers:
+            return {}
+
+        try:
+            result = await self._select_in('SUPPLIER_PANEL_CATALOG', 'suppliernumber', unique_numbers)
+
+            return {str(row.get('suppliernumber')): row for row in result or []}
+
         except Exception as e:
             print(f"Error getting supplier details: {e}")
+            return {}
+
+    async def _get_page(self, endpoint: str, count: bool = False) -> Tuple[List[Dict], Optional[int]]:
+        """
+        One page of a bulk load and, with `count`, the table's total row count
+        from Content-Range (None if not reported). Raises TableLoadError
+        instead of returning an empty result.
+        """
+        try:
+            response = await self.transport.request('GET', endpoint, headers={'Prefer': 'count=exact'} if count else None)
+            response.raise_for_status()
+            result = response.json()
+        except httpx.HTTPStatusError as e:
+            raise TableLoadError(f"{endpoint}: HTTP {e.response.status_code}") from e
+        except (httpx.HTTPError, ValueError) as e:
+            raise TableLoadError(f"{endpoint}: {e!r}") from e
+        if not isinstance(result, list):
+            raise TableLoadError(f"{endpoint}: unexpected response")
+        total = _content_range_total(response.headers.get('content-range', '')) if count else None
+        return result, total
+
+    async def iter_table_pages(
+        self,
+        table: str,
+        order: str,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        select: Optional[str] = None,
+        filters: Optional[str] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Stream a whole table, `page_size` rows at a time in `order` (a
+        PostgREST order list that makes limit/offset paging stable).
+
+        The first page is requested with an exact row count; after it up to
+        `prefetch` page requests are kept in flight over the shared pool, so
+        the next pages download while the caller processes the current one,
+        and at most that many pages are held in memory. Pages are yielded in
+        table order until the counted rows are read (or, without a count, up
+        to the first empty page). A short page does not end the load: if the
+        server caps rows per request (PostgREST max-rows) below `page_size`,
+        paging continues in steps of what it returns.
+        `filters` is a PostgREST filter string ("col=gte.value") that
+        restricts the rows. Raises TableLoadError if a page fails.
+        """
+        page_size = page_size or config.SUPABASE_PAGE_SIZE
+        prefetch = max(1, prefetch or config.SUPABASE_PREFETCH_PAGES)
+        query = f'{table}?order={order}&limit={page_size}'
+        if select:
+            query += f'&select={select}'
+        if filters:
+            query += f'&{filters}'
+        page, total = await self._get_page(f'{query}&offset=0', count=True)
+        if not page:
+            return
+        step = min(page_size, len(page))
+        offset = len(page)
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            while True:
+                while len(pending) < prefetch and (total is None or offset < total):
+                    pending.append(asyncio.create_task(self._get_page(f'{query}&offset={offset}')))
+                    offset += step
+                yield page
+                if not pending:
+                    return
+                page, _ = await pending.popleft()
+                if not page:
+                    return
+        finally:
+            # Past the end of the table, or the caller stopped early
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def iter_table_rows(self, table: str, order: str, **kwargs) -> AsyncIterator[Dict]:
+        """Stream a whole table row by row (see iter_table_pages)"""
+        async for page in self.iter_table_pages(table, order, **kwargs):
+            for row in page:
+                yield row
+
+    async def iter_table_columns(
+        self,
+        table: str,
+        order: str,
+        columns: Dict[str, Any],
+        **kwargs
+    ) -> AsyncIterator[Dict[str, np.ndarray]]:
+        """
+        Stream a whole table as NumPy column chunks, one chunk per page (see
+        rows_to_columns for `columns`). Pages are converted off the event
+        loop while the following pages download.
+        """
+        async for page in self.iter_table_pages(table, order, **kwargs):
+            yield await asyncio.to_thread(rows_to_columns, page, columns)
+
+    async def get_table(self, table: str, order: str, page_size: Optional[int] = None) -> Optional[List[Dict]]:
+        """Get every row of a table as a list (see iter_table_pages); None if any page fails"""
+        rows: List[Dict] = []
+        try:
+            async for page in self.iter_table_pages(table, order, page_size):
+                rows.extend(page)
+        except TableLoadError as e:
+            print(f"Supabase API error: {e}")
             return None
-    
-    def test_connection(self) -> bool:
+        return rows
+
+    async def get_supplier_catalog(self, page_size: Optional[int] = None) -> Optional[List[Dict]]:
+        """Get every SUPPLIER_PANEL_CATALOG row; None if any page fails"""
+        return await self.get_table('SUPPLIER_PANEL_CATALOG', 'suppliernumber', page_size)
+
+    def iter_master_file_pages(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        """Stream MASTER_FILE page by page (see iter_table_pages)"""
+        return self.iter_table_pages('MASTER_FILE', '"PartNumber",suppliernumber', **kwargs)
+
+    def iter_parts_benchmarks_pages(self, **kwargs) -> AsyncIterator[List[Dict]]:
+        """Stream PARTS_BENCHMARKS page by page (see iter_table_pages)"""
+        return self.iter_table_pages('PARTS_BENCHMARKS', 'partnumber', **kwargs)
+
+    async def test_connection(self) -> bool:
         """Test the Supabase connection"""
         try:
             # Try to query a simple endpoint to test connection
             endpoint = 'MASTER_FILE?limit=1'
-            result = self._make_request('GET', endpoint)
+            result = await self._make_request('GET', endpoint)
             return True
         except Exception as e:
             print(f"Supabase connection test failed: {e}")
             return False
-    
-    def list_tables(self) -> List[str]:
+
+    async def list_tables(self) -> List[str]:
         """List available tables in the database"""
         try:
             # This is a simplified approach - you might need to adjust based on your Supabase setup
             tables = ['MASTER_FILE', 'PARTS_BENCHMARKS', 'SUPPLIER_PANEL_CATALOG']
-            available_tables = []
-            
-            for table in tables:
-                try:
-                    endpoint = f"{table}?limit=1"
-                    result = self._make_request('GET', endpoint)
-                    if result is not None:
-                        available_tables.append(table)
-                except:
-                    continue
-            
-            return available_tables
-            
+            results = await asyncio.gather(
+                *(self._make_request('GET', f"{table}?limit=1") for table in tables),
+                return_exceptions=True
+            )
+
+            return [
+                table for table, result in zip(tables, results)
+                if result is not None and not isinstance(result, Exception)
+            ]
+
         except Exception as e:
             print(f"Error listing tables: {e}")
-            return [] 
\ No newline at end of file
+            return []
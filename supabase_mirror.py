@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Local read replica of the Supabase tables the service reads (MASTER_FILE,
+PARTS_BENCHMARKS, SUPPLIER_PANEL_CATALOG), kept in one SQLite file.
+
+With DATA_SOURCE=mirror every read (part lookups, benchmark joins, the
+supplier catalog, analytics loads) is answered from the file instead of
+going over the network; a background job keeps it in sync. The file works
+without any network access, so it can be copied into CI or a load-test
+environment as is.
+
+Sync, inspect or seed the mirror with:
+
+    python supabase_mirror.py sync [--full] [--table MASTER_FILE]
+    python supabase_mirror.py status
+    python supabase_mirror.py import MASTER_FILE master_file.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+from config import config
+from background_refresh import BackgroundRefresher
+from supabase_client import SupabaseClient, TableLoadError, run_sync
+
+class MirroredTable(NamedTuple):
+    name: str
+    order: str                    # PostgREST order list that makes paging stable
+    key_columns: Tuple[str, ...]  # Primary key of a row
+    lookup_column: str            # Column the service looks rows up by
+
+MIRRORED_TABLES = {
+    "MASTER_FILE": MirroredTable("MASTER_FILE", '"PartNumber",suppliernumber', ("PartNumber", "suppliernumber"), "PartNumber"),
+    "PARTS_BENCHMARKS": MirroredTable("PARTS_BENCHMARKS", "partnumber", ("partnumber",), "partnumber"),
+    "SUPPLIER_PANEL_CATALOG": MirroredTable("SUPPLIER_PANEL_CATALOG", "suppliernumber", ("suppliernumber",), "suppliernumber"),
+}
+
+def _column(row: Dict, column: str) -> str:
+    """Column value as text; column casing differs between tables (PartNumber / partnumber)"""
+    value = row.get(column, row.get(column.lower()))
+    return "" if value is None else str(value)
+
+def _row_hash(row: Dict) -> str:
+    return hashlib.sha1(json.dumps(row, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def _filter_value(watermark: str) -> str:
+    """
+    Watermark as a PostgREST filter value. Timestamps are sent in UTC with a
+    "Z" suffix: a "+00:00" offset would reach the server as a space.
+    """
+    try:
+        moment = datetime.fromisoformat(watermark)
+    except ValueError:
+        return watermark
+    if moment.tzinfo is None:
+        return watermark
+    return moment.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+def _mirrored_table(name: str) -> MirroredTable:
+    try:
+        return MIRRORED_TABLES[name]
+    except KeyError:
+        raise TableLoadError(f"{name} is not mirrored") from None
+
+def _unique_row_key(table: MirroredTable, row: Dict, seen: Set[str]) -> str:
+    """
+    Key of a row from its key columns. Rows sharing the same key columns are
+    told apart by the order they arrive in: the n-th gets "#n" appended.
+    `seen` holds the keys handed out so far and is updated.
+    """
+    row_key = json.dumps([_column(row, column) for column in table.key_columns])
+    occurrence = 1
+    unique_key = row_key
+    while unique_key in seen:
+        occurrence += 1
+        unique_key = f"{row_key}#{occurrence}"
+    seen.add(unique_key)
+    return unique_key
+
+class _FullDiff:
+    """
+    One full-diff sync of a table. Rows are fed page by page in table order
+    and staged in a temporary table of the sync's own connection, which
+    takes no lock on the mirror, so slow downloads never hold up other
+    writers. finish() then applies the difference in one short write
+    transaction: rows that were not seen are deleted, only new or changed
+    rows are written, and unchanged rows that moved get their new position.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, table: MirroredTable, watermark_column: str):
+        self.conn = conn
+        self.table = table
+        self.watermark_column = watermark_column
+        self.watermark: Optional[str] = None
+        conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS staged_rows ("
+            "row_key TEXT PRIMARY KEY, lookup_key TEXT NOT NULL, position INTEGER NOT NULL, "
+            "row_hash TEXT NOT NULL, data TEXT NOT NULL)"
+        )
+        self.seen: Set[str] = set()
+        self.position = 0
+
+    def add_page(self, rows: List[Dict]):
+        staged = []
+        for row in rows:
+            row_key = _unique_row_key(self.table, row, self.seen)
+            staged.append((
+                row_key, _column(row, self.table.lookup_column), self.position, _row_hash(row), json.dumps(row, default=str)
+            ))
+            value = row.get(self.watermark_column)
+            if value is not None and (self.watermark is None or str(value) > self.watermark):
+                self.watermark = str(value)
+            self.position += 1
+        self.conn.executemany("INSERT INTO temp.staged_rows VALUES (?, ?, ?, ?, ?)", staged)
+
+    def finish(self) -> int:
+        """Apply the staged rows, record the sync and commit; returns the number of changed rows"""
+        name = self.table.name
+        self.conn.execute("BEGIN IMMEDIATE")
+        removed = self.conn.execute(
+            "DELETE FROM mirror_rows WHERE table_name = ? AND row_key NOT IN (SELECT row_key FROM temp.staged_rows)",
+            (name,)
+        ).rowcount
+        written = self.conn.execute(
+            "INSERT INTO mirror_rows (table_name, row_key, lookup_key, position, row_hash, data) "
+            "SELECT ?, s.row_key, s.lookup_key, s.position, s.row_hash, s.data FROM temp.staged_rows s "
+            "LEFT JOIN mirror_rows m ON m.table_name = ? AND m.row_key = s.row_key "
+            "WHERE m.row_hash IS NOT s.row_hash "
+            "ON CONFLICT (table_name, row_key) DO UPDATE SET lookup_key = excluded.lookup_key, "
+            "position = excluded.position, row_hash = excluded.row_hash, data = excluded.data",
+            (name, name)
+        ).rowcount
+        self.conn.execute(
+            "UPDATE mirror_rows SET position = (SELECT position FROM temp.staged_rows WHERE row_key = mirror_rows.row_key) "
+            "WHERE table_name = ? AND position != (SELECT position FROM temp.staged_rows WHERE row_key = mirror_rows.row_key)",
+            (name,)
+        )
+        changes = removed + written
+        _record_sync(self.conn, name, self.watermark, len(self.seen), "full", changes, full=True, now=time.time())
+        self.conn.execute("COMMIT")
+        return changes
+
+    def abort(self):
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+def _upsert(conn: sqlite3.Connection, rows: List[Tuple], keep_position: bool = False):
+    """Insert or update (table_name, row_key, lookup_key, position, row_hash, data) rows"""
+    conn.executemany(
+        "INSERT INTO mirror_rows (table_name, row_key, lookup_key, position, row_hash, data) "
+        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (table_name, row_key) DO UPDATE SET "
+        "lookup_key = excluded.lookup_key, row_hash = excluded.row_hash, data = excluded.data"
+        + ("" if keep_position else ", position = excluded.position"),
+        rows
+    )
+
+def _record_sync(
+    conn: sqlite3.Connection,
+    table_name: str,
+    watermark: Optional[str],
+    row_count: int,
+    mode: str,
+    changes: int,
+    full: bool,
+    now: float
+):
+    conn.execute(
+        "INSERT INTO mirror_state (table_name, watermark, row_count, synced_at, full_synced_at, last_mode, last_changes) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (table_name) DO UPDATE SET "
+        "watermark = excluded.watermark, row_count = excluded.row_count, synced_at = excluded.synced_at, "
+        "full_synced_at = COALESCE(excluded.full_synced_at, mirror_state.full_synced_at), "
+        "last_mode = excluded.last_mode, last_changes = excluded.last_changes",
+        (table_name, watermark, row_count, now, now if full else None, mode, changes)
+    )
+
+class SupabaseMirror:
+    """
+    The mirror file: every row of every mirrored table as JSON, indexed by
+    lookup column and by upstream order, plus per-table sync state.
+
+    Lookups share one connection and a bulk read runs in one read
+    transaction on its own; each sync writes through its own connection
+    in a single short transaction once its rows are fetched, and WAL mode
+    lets readers keep using the last committed state until it commits.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or config.SUPABASE_MIRROR_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mirror_rows ("
+            "table_name TEXT NOT NULL, row_key TEXT NOT NULL, lookup_key TEXT NOT NULL, "
+            "position INTEGER NOT NULL, row_hash TEXT NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (table_name, row_key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS mirror_rows_lookup ON mirror_rows(table_name, lookup_key, position)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS mirror_rows_position ON mirror_rows(table_name, position)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS mirror_state ("
+            "table_name TEXT PRIMARY KEY, watermark TEXT, row_count INTEGER, synced_at REAL, "
+            "full_synced_at REAL, last_mode TEXT, last_changes INTEGER)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def select_in(self, table_name: str, column: str, values: List[str]) -> List[Dict]:
+        """Rows whose lookup column is one of `values`, in upstream order"""
+        table = _mirrored_table(table_name)
+        if column.lower() != table.lookup_column.lower():
+            raise ValueError(f"{table_name} is only indexed by {table.lookup_column}")
+        values = list(dict.fromkeys(str(v) for v in values))
+        rows: List[Dict] = []
+        with self._lock:
+            for i in range(0, len(values), 500):  # Stay under SQLite's bound parameter limit
+                batch = values[i:i + 500]
+                rows.extend(
+                    (position, json.loads(data)) for position, data in self._conn.execute(
+                        f"SELECT position, data FROM mirror_rows WHERE table_name = ? "
+                        f"AND lookup_key IN ({','.join('?' * len(batch))})",
+                        (table_name, *batch)
+                    )
+                )
+        rows.sort(key=lambda item: item[0])
+        return [row for _, row in rows]
+
+    def read_pages(self, table_name: str, page_size: int) -> Iterator[List[Dict]]:
+        """
+        Every row of a table in upstream order, `page_size` rows at a time.
+        All pages come from one read transaction on a dedicated connection,
+        so a sync that commits mid-load cannot move rows between pages; the
+        transaction ends when the generator is exhausted or closed.
+        """
+        _mirrored_table(table_name)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.execute(
+                "SELECT data FROM mirror_rows WHERE table_name = ? ORDER BY position", (table_name,)
+            )
+            while True:
+                rows = cursor.fetchmany(page_size)
+                if not rows:
+                    break
+                yield [json.loads(data) for data, in rows]
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def state(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """Sync state of a table, or None if it was never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark, row_count, synced_at, full_synced_at, last_mode, last_changes "
+                "FROM mirror_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("watermark", "row_count", "synced_at", "full_synced_at", "last_mode", "last_changes")
+        return dict(zip(keys, row))
+
+    def is_complete(self) -> bool:
+        """True once every mirrored table has been synced at least once"""
+        return all(self.state(name) is not None for name in MIRRORED_TABLES)
+
+    def full_diff(self, table_name: str, watermark_column: Optional[str] = None) -> _FullDiff:
+        """Start a full-diff sync of a table on a fresh write connection"""
+        return _FullDiff(self._connect(), _mirrored_table(table_name), watermark_column or config.SUPABASE_MIRROR_WATERMARK_COLUMN)
+
+    def apply_incremental(self, table_name: str, rows: List[Dict], watermark_column: str) -> int:
+        """
+        Upsert rows changed since the watermark (new rows go to the end of
+        the table order) and advance the watermark; returns the rows written.
+        Rows are keyed like a full diff does, so a changed row replaces its
+        mirrored copy instead of being added again.
+        """
+        table = _mirrored_table(table_name)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            state = conn.execute(
+                "SELECT watermark, full_synced_at FROM mirror_state WHERE table_name = ?", (table_name,)
+            ).fetchone()
+            watermark = state[0] if state else None
+            position = conn.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM mirror_rows WHERE table_name = ?", (table_name,)
+            ).fetchone()[0]
+            upserts = []
+            seen: Set[str] = set()
+            for row in rows:
+                position += 1
+                row_key = _unique_row_key(table, row, seen)
+                upserts.append((table_name, row_key, _column(row, table.lookup_column), position, _row_hash(row), json.dumps(row, default=str)))
+                value = row.get(watermark_column)
+                if value is not None and (watermark is None or str(value) > watermark):
+                    watermark = str(value)
+            _upsert(conn, upserts, keep_position=True)
+            row_count = conn.execute("SELECT COUNT(*) FROM mirror_rows WHERE table_name = ?", (table_name,)).fetchone()[0]
+            _record_sync(conn, table_name, watermark, row_count, "incremental", len(upserts), full=False, now=time.time())
+            conn.execute("COMMIT")
+            return len(upserts)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def status(self) -> Dict[str, Any]:
+        def iso(timestamp: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp else None
+
+        tables = {}
+        for name in MIRRORED_TABLES:
+            state = self.state(name)
+            tables[name] = {
+                "synced": state is not None,
+                "rows": state["row_count"] if state else 0,
+                "watermark": state["watermark"] if state else None,
+                "synced_at": iso(state["synced_at"]) if state else None,
+                "full_synced_at": iso(state["full_synced_at"]) if state else None,
+                "last_mode": state["last_mode"] if state else None,
+                "last_changes": state["last_changes"] if state else None,
+            }
+        return {"path": str(self.path), "tables": tables}
+
+class MirrorSupabaseClient(SupabaseClient):
+    """
+    SupabaseClient whose reads are answered from a SupabaseMirror. Only
+    the query primitives are replaced, so joins and row handling are the
+    same code as against Supabase.
+    """
+
+    def __init__(self, mirror: Optional[SupabaseMirror] = None):
+        super().__init__()
+        self.mirror = mirror or SupabaseMirror()
+
+    async def _select_in(self, table: str, column: str, values: List[str]) -> List[Dict]:
+        return await asyncio.to_thread(self.mirror.select_in, table, column, values)
+
+    async def iter_table_pages(
+        self,
+        table: str,
+        order: str,
+        page_size: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        select: Optional[str] = None,
+        filters: Optional[str] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Stream a mirrored table in upstream order, every page from the same
+        committed state (`order`, `prefetch` and `select` do not apply locally)
+        """
+        if filters:
+            raise TableLoadError(f"{table}: filters are not supported by the local mirror")
+        if self.mirror.state(table) is None:
+            raise TableLoadError(f"{table} has not been mirrored yet")
+        pages = self.mirror.read_pages(table, page_size or config.SUPABASE_PAGE_SIZE)
+        try:
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    return
+                yield page
+        finally:
+            await asyncio.to_thread(pages.close)
+
+    async def test_connection(self) -> bool:
+        return self.mirror.is_complete()
+
+    async def list_tables(self) -> List[str]:
+        return [name for name in MIRRORED_TABLES if self.mirror.state(name) is not None]
+
+class MirrorSync(BackgroundRefresher):
+    """
+    Keeps a SupabaseMirror in step with Supabase as a BackgroundRefresher
+    that syncs every `refresh_interval` seconds. Tables that carry the
+    watermark column (SUPABASE_MIRROR_WATERMARK_COLUMN) are synced
+    incrementally, fetching only rows updated since the last sync; a full diff, which also catches
+    deleted rows, runs for tables without one, on the first sync and every
+    SUPABASE_MIRROR_FULL_SYNC_INTERVAL seconds.
+    """
+
+    refresh_label = "Supabase mirror"
+
+    def __init__(
+        self,
+        remote: SupabaseClient,
+        mirror: SupabaseMirror,
+        interval: Optional[float] = None,
+        full_interval: Optional[float] = None,
+        watermark_column: Optional[str] = None
+    ):
+        super().__init__(config.SUPABASE_MIRROR_SYNC_INTERVAL if interval is None else interval)
+        self.remote = remote
+        self.mirror = mirror
+        self.full_interval = config.SUPABASE_MIRROR_FULL_SYNC_INTERVAL if full_interval is None else full_interval
+        self.watermark_column = watermark_column or config.SUPABASE_MIRROR_WATERMARK_COLUMN
+        self.last_sync: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    def _needs_full_diff(self, table_name: str) -> bool:
+        state = self.mirror.state(table_name)
+        if state is None or state["watermark"] is None or not state["full_synced_at"]:
+            return True
+        return time.time() - state["full_synced_at"] >= self.full_interval
+
+    async def sync_table(self, table_name: str, full: bool = False) -> Dict[str, Any]:
+        """Sync one table; raises TableLoadError (leaving the mirror unchanged) if a page fails"""
+        table = _mirrored_table(table_name)
+        start = time.perf_counter()
+        if full or self._needs_full_diff(table_name):
+            mode = "full"
+            diff = await asyncio.to_thread(self.mirror.full_diff, table_name, self.watermark_column)
+            try:
+                async for page in self.remote.iter_table_pages(table.name, table.order):
+                    await asyncio.to_thread(diff.add_page, page)
+                changes = await asyncio.to_thread(diff.finish)
+            except BaseException:
+                diff.abort()
+                raise
+            finally:
+                diff.conn.close()
+        else:
+            mode = "incremental"
+            watermark = self.mirror.state(table_name)["watermark"]
+            rows: List[Dict] = []
+            async for page in self.remote.iter_table_pages(
+                table.name,
+                f"{self.watermark_column},{table.order}",
+                filters=f"{self.watermark_column}=gte.{_filter_value(watermark)}"
+            ):
+                rows.extend(page)
+            changes = await asyncio.to_thread(self.mirror.apply_incremental, table_name, rows, self.watermark_column)
+        return {"table": table_name, "mode": mode, "changes": changes, "seconds": round(time.perf_counter() - start, 2)}
+
+    async def sync(self, full: bool = False, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Sync every mirrored table (or `tables`); a failed table keeps its previous contents"""
+        async with self._lock:
+            results = []
+            errors = []
+            for table_name in tables or list(MIRRORED_TABLES):
+                try:
+                    result = await self.sync_table(table_name, full)
+                    print(f"Mirror sync {table_name}: {result['mode']}, {result['changes']} rows changed in {result['seconds']}s")
+                except TableLoadError as e:
+                    result = {"table": table_name, "error": str(e)}
+                    errors.append(str(e))
+                    print(f"⚠️  Mirror sync of {table_name} failed: {e}")
+                results.append(result)
+            self.last_error = "; ".join(errors) or None
+            self.last_sync = {"at": datetime.now(timezone.utc).isoformat(), "tables": results}
+            return results
+
+    async def refresh(self) -> List[Dict[str, Any]]:
+        """One background sync round (see sync)"""
+        return await self.sync()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.is_running,
+            "interval_seconds": self.refresh_interval,
+            "full_interval_seconds": self.full_interval,
+            "watermark_column": self.watermark_column,
+            "last_sync": self.last_sync,
+            "last_error": self.last_error
+        }
+
+def _import_rows(mirror: SupabaseMirror, table_name: str, rows: List[Dict]) -> int:
+    diff = mirror.full_diff(table_name)
+    try:
+        page_size = config.SUPABASE_PAGE_SIZE
+        for i in range(0, len(rows), page_size):
+            diff.add_page(rows[i:i + page_size])
+        return diff.finish()
+    except BaseException:
+        diff.abort()
+        raise
+    finally:
+        diff.conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SQLite mirror of the Supabase tables")
+    parser.add_argument("--path", default=None, help="Mirror file (default SUPABASE_MIRROR_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync_parser = commands.add_parser("sync", help="Sync the mirror from Supabase")
+    sync_parser.add_argument("--full", action="store_true", help="Full diff even where a watermark allows an incremental sync")
+    sync_parser.add_argument("--table", action="append", choices=list(MIRRORED_TABLES), help="Only this table (repeatable)")
+    commands.add_parser("status", help="Show what the mirror holds")
+    import_parser = commands.add_parser("import", help="Replace a table with rows from a JSON array (offline seeding)")
+    import_parser.add_argument("table", choices=list(MIRRORED_TABLES))
+    import_parser.add_argument("file", help="JSON file with a list of rows, e.g. a Supabase export")
+    args = parser.parse_args()
+
+    mirror = SupabaseMirror(args.path)
+    if args.command == "status":
+        print(json.dumps(mirror.status(), indent=2))
+    elif args.command == "import":
+        with open(args.file, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+        if not isinstance(rows, list):
+            print(f"❌ {args.file} does not contain a JSON array of rows")
+            sys.exit(1)
+        changes = _import_rows(mirror, args.table, rows)
+        print(f"✅ {args.table}: {len(rows)} rows imported, {changes} changed")
+    else:
+        if not config.SUPABASE_URL:
+            print("❌ SUPABASE_URL is not set")
+            sys.exit(1)
+        results = run_sync(MirrorSync(SupabaseClient(), mirror).sync(args.full, args.table))
+        if any("error" in result for result in results):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
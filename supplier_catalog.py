@@ -0,0 +1,62 @@
+import asyncio
+import time
+from typing import List, Dict, Any, Optional
+from config import config
+from background_refresh import BackgroundRefresher
+from supabase_client import SupabaseClient
+
+class SupplierCatalog(BackgroundRefresher):
+    """
+    In-process snapshot of SUPPLIER_PANEL_CATALOG indexed by supplier number.
+
+    The table is small and rarely changes, so it is loaded once at startup
+    and refreshed in the background every `refresh_interval` seconds (or on
+    demand). A refresh builds a new index and swaps it in, so readers never
+    see a half-loaded catalog; a failed refresh keeps the previous snapshot.
+    """
+
+    refresh_label = "supplier catalog"
+
+    def __init__(self, supabase: SupabaseClient, refresh_interval: Optional[float] = None):
+        super().__init__(refresh_interval or config.SUPPLIER_CATALOG_REFRESH_INTERVAL)
+        self.supabase = supabase
+        self._suppliers: Dict[str, Dict] = {}
+        self._refresh_lock = asyncio.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def get(self, supplier_number: str) -> Optional[Dict]:
+        """Supplier row from the snapshot (a copy, safe to modify)"""
+        supplier = self._suppliers.get(str(supplier_number))
+        return dict(supplier) if supplier else None
+
+    def get_many(self, supplier_numbers: List[str]) -> Dict[str, Dict]:
+        """Supplier rows for several numbers, keyed by supplier number; unknown numbers are skipped"""
+        suppliers = self._suppliers
+        return {
+            str(n): dict(suppliers[str(n)])
+            for n in supplier_numbers if n and str(n) in suppliers
+        }
+
+    async def refresh(self) -> bool:
+        """Reload the whole catalog; returns False (keeping the old snapshot) on failure"""
+        async with self._refresh_lock:
+            rows = await self.supabase.get_supplier_catalog()
+            if rows is None:
+                self.last_error = "Failed to load SUPPLIER_PANEL_CATALOG"
+                print(f"⚠️  {self.last_error} - keeping previous snapshot")
+                return False
+            self._suppliers = {str(row.get('suppliernumber')): row for row in rows}
+            self.loaded_at = time.time()
+            self.last_error = None
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        """Snapshot size and age for the status endpoint"""
+        return {
+            "loaded": self.is_loaded,
+            "supplier_count": len(self._suppliers),
+            **self.refresh_status()
+        }
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from background_refresh import BackgroundRefresher
+
+class Counter(BackgroundRefresher):
+    refresh_label = "counter"
+
+    def __init__(self, fail_first=False):
+        super().__init__(0.01)
+        self.calls = 0
+        self.fail_first = fail_first
+
+    async def refresh(self):
+        self.calls += 1
+        if self.fail_first and self.calls == 1:
+            raise RuntimeError("boom")
+        self.last_error = None
+
+def test_refresh_must_be_implemented():
+    class Incomplete(BackgroundRefresher):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(60)
+
+def test_background_loop_survives_errors_and_stops():
+    async def run():
+        counter = Counter(fail_first=True)
+        counter.start()
+        counter.start()  # Already running: no second loop
+        await asyncio.sleep(0.001)
+        assert counter.calls == 1 and counter.last_error == "boom"
+        while counter.calls < 3:
+            await asyncio.sleep(0.01)
+        assert counter.is_running and counter.last_error is None
+        await counter.stop()
+        assert not counter.is_running
+        calls = counter.calls
+        await asyncio.sleep(0.03)
+        assert counter.calls == calls
+        await counter.stop()  # Stopping twice is harmless
+    asyncio.run(run())
+
+def test_refresh_status_reports_age():
+    counter = Counter()
+    assert counter.refresh_status() == {
+        "loaded_at": None, "age_seconds": None, "refresh_interval_seconds": 0.01, "last_error": None
+    }
+    counter.loaded_at = 1.0
+    assert counter.refresh_status()["loaded_at"] == "1970-01-01T00:00:01+00:00"
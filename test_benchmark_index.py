@@ -0,0 +1,76 @@
+import asyncio
+
+import numpy as np
+
+from benchmark_index import BenchmarkIndexBuilder, PartsBenchmarks
+from supabase_client import TableLoadError
+
+ROWS = [
+    {"partnumber": "PA-1", "partname": "Gear", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": 2.0, "SUP2": 1.5, "SUP3": None},
+    {"partnumber": "PA-2", "partname": "Cover", "currency": "EUR", "currentsuppliernumber": "SUP2", "SUP1": 0.9, "SUP2": 1.1, "SUP3": 0.0},
+    {"partnumber": "PA-3", "partname": "Clip", "currency": "USD", "currentsuppliernumber": "", "SUP1": None, "SUP2": 3.0, "SUP3": None},
+    {"partnumber": "PA-1", "partname": "Duplicate", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": 0.1, "SUP2": None, "SUP3": None},
+]
+
+def test_paged_build_keeps_first_row_per_part():
+    builder = BenchmarkIndexBuilder()
+    builder.add(ROWS[:2])
+    builder.add(ROWS[2:])
+    index = builder.build()
+    assert index.part_numbers == ["PA-1", "PA-2", "PA-3"]
+    assert index.supplier_columns == ["SUP1", "SUP2", "SUP3"]
+    assert index.fingerprint == BenchmarkIndexBuilder.from_rows(ROWS).fingerprint
+    np.testing.assert_array_equal(index.best_price, [1.5, 0.9, 3.0])  # 0.0 is not a quote
+
+def test_quotes_and_benchmark_records():
+    index = BenchmarkIndexBuilder.from_rows(ROWS)
+    assert index.quotes("PA-2") == [
+        {"supplier_number": "SUP3", "price": 0.0},
+        {"supplier_number": "SUP1", "price": 0.9},
+        {"supplier_number": "SUP2", "price": 1.1},
+    ]
+    assert index.quotes("PA-9") == []
+    assert index.benchmark_record("PA-1") == {
+        "partnumber": "PA-1", "partname": "Gear", "currency": "EUR", "currentsuppliernumber": "SUP1",
+        "currentsuppliername": None, "SUP1": 2.0, "SUP2": 1.5
+    }
+    assert list(index.benchmark_records(["PA-3", "PA-9", ""])) == ["PA-3"]
+    assert index.supplier_quote_counts() == {"SUP1": 2, "SUP2": 3, "SUP3": 1}
+
+def test_supplier_parts_cheapest_first():
+    index = BenchmarkIndexBuilder.from_rows(ROWS)
+    parts, total = index.supplier_parts("SUP2")
+    assert total == 3
+    assert [(p["part_number"], p["price"], p["is_best_quote"]) for p in parts] == [
+        ("PA-2", 1.1, False), ("PA-1", 1.5, True), ("PA-3", 3.0, True)
+    ]
+    assert parts[0]["is_current_supplier"] and not parts[1]["is_current_supplier"]
+    parts, total = index.supplier_parts("SUP2", limit=1, offset=2)
+    assert [p["part_number"] for p in parts] == ["PA-3"] and total == 3
+    assert index.supplier_parts("SUP9") is None
+
+class FakeSupabase:
+    def __init__(self, pages):
+        self.pages = pages
+        self.fail = False
+
+    async def iter_parts_benchmarks_pages(self):
+        for page in self.pages:
+            yield page
+        if self.fail:
+            raise TableLoadError("PARTS_BENCHMARKS: HTTP 500")
+
+def test_failed_refresh_keeps_previous_index():
+    supabase = FakeSupabase([ROWS[:2], ROWS[2:]])
+    benchmarks = PartsBenchmarks(supabase, refresh_interval=60)
+    assert asyncio.run(benchmarks.refresh())
+    index = benchmarks.index
+    assert asyncio.run(benchmarks.refresh())
+    assert benchmarks.index is index
+    supabase.fail = True
+    assert not asyncio.run(benchmarks.refresh())
+    assert benchmarks.index is index
+    status = benchmarks.status()
+    assert (status["loaded"], status["part_count"], status["quote_count"]) == (True, 3, 6)
+    assert status["refresh_interval_seconds"] == 60
+    assert "HTTP 500" in status["last_error"]
@@ -0,0 +1,85 @@
+import cache_store
+from cache_store import SQLiteCache
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def frozen_clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_store.time, "time", clock)
+    return clock
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    cache = SQLiteCache("search", ttl=60, max_entries=10)
+    cache.set("q", [{"title": "Acme Plastics"}])
+    clock.now += 59
+    assert cache.get("q") == [{"title": "Acme Plastics"}]
+    clock.now += 2
+    assert cache.get("q") is None
+    assert cache.count() == 0
+
+def test_negative_result_uses_its_own_ttl(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    cache = SQLiteCache("search", ttl=3600, max_entries=10)
+    cache.set("found", [{"title": "Acme Plastics"}])
+    cache.set("empty", [], ttl=30)
+    clock.now += 31
+    assert cache.get("empty") is None
+    assert cache.get("found") == [{"title": "Acme Plastics"}]
+
+def test_eviction_runs_every_evict_every_writes(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    cache = SQLiteCache("search", ttl=3600, max_entries=10)
+    for i in range(63):
+        clock.now += 1
+        cache.set(f"q{i}", i)
+    assert cache.count() == 63
+    # Touch an old entry so it survives as recently used
+    clock.now += 1
+    assert cache.get("q0") == 0
+    clock.now += 1
+    cache.set("q63", 63)
+    assert cache.count() == 10
+    assert cache.get("q0") == 0
+    assert cache.get("q1") is None
+    assert cache.get("q63") == 63
+
+def test_eviction_drops_expired_entries_first(monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    cache = SQLiteCache("search", ttl=3600, max_entries=10, evict_every=4)
+    cache.set("stale", [], ttl=5)
+    for i in range(3):
+        cache.set(f"q{i}", i)
+    # The 4th write triggered eviction before "stale" expired
+    assert cache.count() == 4
+    clock.now += 10
+    for i in range(3, 7):
+        cache.set(f"q{i}", i)
+    assert cache.count() == 7
+    assert cache.get("stale") is None
+
+def test_reopening_keeps_entries_and_trims_to_max_entries(tmp_path, monkeypatch):
+    clock = frozen_clock(monkeypatch)
+    path = tmp_path / "shared.sqlite3"
+    cache = SQLiteCache("search", ttl=3600, max_entries=10, path=str(path))
+    for i in range(5):
+        clock.now += 1
+        cache.set(f"q{i}", {"rank": i})
+    cache.set("short", [], ttl=2)
+    clock.now += 5
+
+    reopened = SQLiteCache("search", ttl=3600, max_entries=3, path=str(path))
+    assert reopened.count() == 3
+    assert reopened.get("short") is None
+    assert [reopened.get(f"q{i}") for i in range(5)] == [None, None, {"rank": 2}, {"rank": 3}, {"rank": 4}]
+
+def test_default_path_is_under_cache_directory(isolated_cache_directory):
+    cache = SQLiteCache("search", ttl=60, max_entries=10)
+    cache.set("q", 1)
+    assert cache.path == isolated_cache_directory / "search.sqlite3"
+    assert SQLiteCache("search", ttl=60, max_entries=10).get("q") == 1
@@ -0,0 +1,97 @@
+import os
+from email.utils import formatdate
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from file_responses import RangeNotSatisfiable, conditional_file_response, file_etag, is_not_modified, parse_range
+
+CONTENT = bytes(range(256)) * 4  # 1024 bytes
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=-100", (924, 1023)),
+    ("bytes=-5000", (0, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=500-100", None),
+    ("bytes=0-1,5-9", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1024) == expected
+
+@pytest.mark.parametrize("header, size", [("bytes=1024-", 1024), ("bytes=-0", 1024), ("bytes=-10", 0)])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+def test_is_not_modified_prefers_if_none_match():
+    etag = '"400-1"'
+    assert is_not_modified({"if-none-match": 'W/"400-1", "other"'}, etag, 100.0)
+    assert is_not_modified({"if-none-match": "*"}, etag, 100.0)
+    assert not is_not_modified({"if-none-match": '"other"', "if-modified-since": formatdate(200, usegmt=True)}, etag, 100.0)
+    assert is_not_modified({"if-modified-since": formatdate(200, usegmt=True)}, etag, 100.0)
+    assert not is_not_modified({"if-modified-since": formatdate(50, usegmt=True)}, etag, 100.0)
+    assert not is_not_modified({"if-modified-since": "garbage"}, etag, 100.0)
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "PA-1 spec.pdf"
+    path.write_bytes(CONTENT)
+    os.utime(path, (1_700_000_000, 1_700_000_000))
+
+    async def download(request):
+        return conditional_file_response(request.headers, str(path), path.name, "application/pdf", request.method)
+
+    app = Starlette(routes=[Route("/file", download, methods=["GET", "HEAD"])])
+    with TestClient(app) as test_client:
+        test_client.etag = file_etag(os.stat(path))
+        yield test_client
+
+def test_full_download_carries_validators(client):
+    response = client.get("/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["etag"] == client.etag
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-length"] == "1024"
+    assert response.headers["last-modified"] == formatdate(1_700_000_000, usegmt=True)
+
+def test_conditional_get_returns_304(client):
+    response = client.get("/file", headers={"If-None-Match": client.etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == client.etag
+    assert client.get("/file", headers={"If-Modified-Since": formatdate(1_700_000_000, usegmt=True)}).status_code == 304
+
+def test_range_returns_206(client):
+    response = client.get("/file", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == CONTENT[10:20]
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.headers["content-length"] == "10"
+    suffix = client.get("/file", headers={"Range": "bytes=-4"})
+    assert suffix.content == CONTENT[-4:]
+
+def test_out_of_bounds_range_returns_416(client):
+    response = client.get("/file", headers={"Range": "bytes=2048-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */1024"
+
+def test_stale_if_range_gets_the_full_file(client):
+    current = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": client.etag})
+    assert current.status_code == 206
+    stale = client.get("/file", headers={"Range": "bytes=0-9", "If-Range": '"0-0"'})
+    assert stale.status_code == 200
+    assert stale.content == CONTENT
+
+def test_head_sends_headers_only(client):
+    response = client.head("/file", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == b""
+    assert response.headers["content-length"] == "10"
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from keyword_extractor import KEYWORD_FIELDS, _legacy_extract_keywords, extract_keywords, extract_keywords_from_pages
+from spec_text_cache import read_spec_text
+
+SPECS = Path(__file__).parent / "SPECS"
+GOLDEN = json.loads((Path(__file__).parent / "test_keyword_extractor_golden.json").read_text(encoding="utf-8"))
+
+@pytest.mark.parametrize("filename", sorted(GOLDEN))
+def test_golden_keywords(filename):
+    text = read_spec_text(str(SPECS / filename), max_pages=0)
+    assert extract_keywords(text) == GOLDEN[filename]["expected"]
+
+@pytest.mark.parametrize("filename", sorted(GOLDEN))
+def test_agrees_with_legacy_except_documented_differences(filename):
+    golden = GOLDEN[filename]
+    text = read_spec_text(str(SPECS / filename), max_pages=0)
+    legacy = _legacy_extract_keywords(text)
+    assert legacy == golden["legacy"]
+    differences = golden.get("differences", {})
+    for field in KEYWORD_FIELDS:
+        if legacy[field] and legacy[field] != golden["expected"][field]:
+            assert field in differences, f"{filename}: {field} {legacy[field]!r} -> {golden['expected'][field]!r} is unexplained"
+        else:
+            assert field not in differences
+
+def test_labelled_line_beats_earlier_bare_hit():
+    text = "Overgrip (TPE overmold zone)\n- Material: PA66 15%GF"
+    keywords = extract_keywords(text)
+    assert keywords["material"] == "PA66"
+    assert keywords["grade"] == "GF15"
+
+def test_own_label_beats_other_labelled_lines():
+    text = "Note: housing in PC\nMaterial: POM\nProcess: injection molded PBT insert"
+    keywords = extract_keywords(text)
+    assert keywords["material"] == "POM"
+    assert keywords["process"] == "injection molded"
+
+@pytest.mark.parametrize("process", ["injection molded", "Injection Moulded", "overmolded", "extruded", "thermoformed"])
+def test_process_inflections(process):
+    assert extract_keywords(f"Part is {process} in PA6")["process"] == process
+
+def test_grade_normalization():
+    assert extract_keywords("PPS + 40% Carbon Fiber")["grade"] == "CF40"
+    assert extract_keywords("Durethan BKV35H2.0")["grade"] == "BKV35"
+
+def test_stops_pulling_pages_once_every_field_is_settled():
+    pulled = []
+
+    def pages():
+        for page in ["Material: PA6 30%GF, injection molding, automotive housing", "Material: PEEK"]:
+            pulled.append(page)
+            yield page
+
+    keywords = extract_keywords_from_pages(pages())
+    assert keywords == {"material": "PA6", "grade": "GF30", "process": "injection molding", "application": "automotive"}
+    assert len(pulled) == 1
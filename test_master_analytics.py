@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+
+from data_service import DataService
+from master_analytics import MONTHS, MasterFileAnalytics, MasterFileBuilder, MasterFileSnapshot
+from supabase_client import TableLoadError
+
+def master_row(part_number, volumes, prices, **text):
+    """A MASTER_FILE row; volumes/prices map (year, month index) -> value"""
+    row = {"partnumber": part_number, "partname": f"Part {part_number}", "currency": "EUR", **text}
+    for year in (2023, 2024):
+        for month, name in enumerate(MONTHS):
+            row[f"vol{name}{year}"] = volumes.get((year, month))
+            row[f"price{name}{year}"] = prices.get((year, month))
+    return row
+
+ROWS = [
+    master_row(
+        "PA-1",
+        {**{(2023, m): 5.0 for m in range(12)}, **{(2024, m): 10.0 for m in range(12)}},
+        {(2024, m): 2.0 + m * 0.1 for m in range(12)},
+        material="PA66 GF30", suppliername="Acme", suppliernumber="S1"
+    ),
+    master_row("PA-2", {(2024, 0): 100.0}, {(2024, 0): 1.0, (2024, 1): 3.0}, material="PC", suppliername="Beta", currency="USD"),
+    master_row("PA-3", {(2024, 5): 1.0}, {}, material="PP", material2="PA66", suppliername="Acme"),
+    master_row("PA-1", {(2024, 0): 999.0}, {(2024, 0): 999.0}),  # Duplicate: the first row wins
+]
+
+def test_paged_build_matches_single_page():
+    builder = MasterFileBuilder()
+    builder.add(ROWS[:1])
+    builder.add([])
+    builder.add(ROWS[1:])
+    paged = builder.build()
+    whole = MasterFileSnapshot.from_rows(ROWS)
+    assert paged.part_numbers == whole.part_numbers == ["PA-1", "PA-2", "PA-3"]
+    assert paged.fingerprint == whole.fingerprint
+    assert whole.months[0] == (2023, 0) and len(whole.months) == 24
+
+def test_metrics_match_hand_computed_values():
+    snapshot = MasterFileSnapshot.from_rows(ROWS)
+    assert snapshot.year == 2024
+    one = snapshot.get("PA-1")
+    prices = [2.0 + m * 0.1 for m in range(12)]
+    assert one["annual_volume"] == 120.0
+    assert one["previous_annual_volume"] == 60.0
+    assert one["volume_yoy_growth"] == pytest.approx(1.0)
+    assert one["average_price"] == pytest.approx(sum(prices) / 12)
+    assert one["annual_spend"] == pytest.approx(120.0 * sum(prices) / 12)
+    assert one["actual_spend"] == pytest.approx(sum(10.0 * p for p in prices))
+    assert one["last_price"] == pytest.approx(3.1)
+    assert one["rolling_3m_volume"] == 30.0
+    assert one["rolling_3m_yoy_growth"] == pytest.approx(1.0)
+    assert one["volume_trend_pct"] == pytest.approx(0.0)
+    assert one["price_trend_pct"] == pytest.approx(0.1 / (sum(prices) / 12) * 100.0)
+    assert one["series"]["rolling_3m_volume"][:3] == [None, None, 15.0]
+
+    two = snapshot.get("PA-2")
+    assert two["annual_volume"] == 100.0
+    assert two["average_price"] == pytest.approx(2.0)
+    assert two["volume_weighted_price"] == pytest.approx(1.0)  # February has a price but no volume
+    assert two["actual_spend"] == pytest.approx(100.0)
+    assert two["volume_yoy_growth"] is None
+
+    three = snapshot.get("PA-3")
+    assert three["average_price"] is None and three["actual_spend"] is None
+    assert snapshot.get("PA-9") is None
+
+def test_part_info_uses_zero_price_when_unpriced():
+    snapshot = MasterFileSnapshot.from_rows(ROWS)
+    info = snapshot.part_info("PA-3")
+    assert (info.current_price, info.annual_volume, info.annual_total_spend) == (0.0, 1.0, 0.0)
+    assert info.material2 == "PA66"
+    assert snapshot.part_info("PA-2").current_supplier == "Beta"
+
+def test_ranking_filters_and_puts_undefined_last():
+    snapshot = MasterFileSnapshot.from_rows(ROWS)
+    for descending in (True, False):
+        ranked, total = snapshot.ranking("average_price", descending)
+        assert total == 3
+        assert ranked[-1]["part_number"] == "PA-3"
+    ranked, total = snapshot.ranking("annual_volume", supplier="acme")
+    assert [r["part_number"] for r in ranked] == ["PA-1", "PA-3"] and total == 2
+    ranked, _ = snapshot.ranking("annual_volume", material="pa66")
+    assert [r["part_number"] for r in ranked] == ["PA-1", "PA-3"]
+    ranked, total = snapshot.ranking("annual_volume", currency="usd", limit=1, offset=0)
+    assert [r["part_number"] for r in ranked] == ["PA-2"] and total == 1
+
+def test_summary_groups_by_currency():
+    summary = MasterFileSnapshot.from_rows(ROWS).summary(top=1)
+    assert summary["months"] == ["2023-01", "2024-12"]
+    assert summary["priced_parts"] == 2
+    assert summary["totals_by_currency"]["EUR"]["parts"] == 2
+    assert summary["totals_by_currency"]["USD"]["annual_spend"] == 200.0
+    assert [p["part_number"] for p in summary["top_parts"]] == ["PA-1"]
+
+def test_requested_year_is_used_when_present():
+    snapshot = MasterFileSnapshot.from_rows(ROWS, year=2023)
+    assert snapshot.year == 2023
+    assert snapshot.get("PA-1")["annual_volume"] == 60.0
+    assert MasterFileSnapshot.from_rows(ROWS, year=1999).year == 2024
+    empty = MasterFileSnapshot.from_rows([])
+    assert empty.count() == 0 and empty.summary()["part_count"] == 0
+
+class FakeSupabase:
+    def __init__(self, pages, fail=False):
+        self.pages = pages
+        self.fail = fail
+
+    async def iter_master_file_pages(self):
+        for page in self.pages:
+            yield page
+        if self.fail:
+            raise TableLoadError("page 2 failed")
+
+def test_failed_refresh_keeps_previous_snapshot():
+    supabase = FakeSupabase([ROWS[:2], ROWS[2:]])
+    analytics = MasterFileAnalytics(supabase, refresh_interval=60, year=0)
+    assert asyncio.run(analytics.refresh())
+    snapshot = analytics.snapshot
+    assert snapshot.count() == 3
+    # Unchanged data keeps the same object, so caches keyed on it stay valid
+    assert asyncio.run(analytics.refresh())
+    assert analytics.snapshot is snapshot
+    supabase.fail = True
+    assert not asyncio.run(analytics.refresh())
+    assert analytics.snapshot is snapshot
+    status = analytics.status()
+    assert status["loaded"] and status["part_count"] == 3
+    assert "page 2 failed" in status["last_error"]
+
+class LoadedAnalytics:
+    """Stands in for MasterFileAnalytics with a loaded snapshot"""
+
+    def __init__(self, snapshot, year=0):
+        self.snapshot = snapshot
+        self.year = year
+
+class RowSupabase:
+    """Answers single-part MASTER_FILE lookups from a list of rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def get_part_info(self, part_number):
+        return next((row for row in self.rows if row["partnumber"] == part_number), None)
+
+def test_part_info_outside_the_snapshot_uses_the_portfolio_year():
+    # PA-7 is only priced in 2023 while the portfolio's latest priced year is 2024
+    late = master_row("PA-7", {(2023, 0): 3.0, (2024, 0): 7.0}, {(2023, 0): 4.0})
+    rows = ROWS + [late]
+    with_part = DataService(RowSupabase(rows), master_analytics=LoadedAnalytics(MasterFileSnapshot.from_rows(rows)))
+    without_part = DataService(RowSupabase(rows), master_analytics=LoadedAnalytics(MasterFileSnapshot.from_rows(ROWS)))
+    from_snapshot = asyncio.run(with_part.get_part_info("PA-7"))
+    from_row = asyncio.run(without_part.get_part_info("PA-7"))
+    assert from_row == from_snapshot
+    assert (from_row.current_price, from_row.annual_volume) == (0.0, 7.0)
+    assert asyncio.run(without_part.get_part_analytics("PA-7"))["year"] == 2024
+    # Before the first load the configured year applies
+    not_loaded = DataService(RowSupabase(rows), master_analytics=LoadedAnalytics(None, year=2023))
+    assert asyncio.run(not_loaded.get_part_info("PA-7")).current_price == 4.0
@@ -0,0 +1,110 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from ai_agent import AIAgent
+from benchmark_index import BenchmarkIndexBuilder
+from data_service import DataService
+from master_analytics import MONTHS, MasterFileSnapshot
+from portfolio_savings import PortfolioSavings, SavingsTable
+from supabase_client import SupabaseClient
+
+def master_row(part_number, volume, price, currency="EUR", supplier="Acme", material="PA66"):
+    """A MASTER_FILE row with the same monthly volume and price all through 2024"""
+    row = {
+        "partnumber": part_number, "partname": f"Part {part_number}", "currency": currency,
+        "suppliername": supplier, "material": material
+    }
+    for name in MONTHS:
+        row[f"vol{name}2024"] = volume
+        row[f"price{name}2024"] = price
+    return row
+
+MASTER_ROWS = [
+    master_row("PA-1", 100.0, 2.0),
+    master_row("PA-2", 10.0, 5.0, currency="USD", supplier="Beta", material="PC"),
+    master_row("PA-3", 50.0, 1.0),
+    master_row("PA-4", 20.0, None),  # Never priced
+    master_row("PA-5", 30.0, 4.0),
+]
+BENCHMARK_ROWS = [
+    {"partnumber": "PA-1", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": 2.0, "SUP2": 1.5, "SUP3": 1.8},
+    {"partnumber": "PA-2", "currency": "USD", "currentsuppliernumber": "SUP2", "SUP1": 4.0, "SUP2": None, "SUP3": 0.0},
+    {"partnumber": "PA-3", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": None, "SUP2": 0.7, "SUP3": None},
+    {"partnumber": "PA-4", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": None, "SUP2": 3.0, "SUP3": None},
+    {"partnumber": "PA-5", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": None, "SUP2": None, "SUP3": None},
+    {"partnumber": "PA-9", "currency": "EUR", "currentsuppliernumber": "SUP1", "SUP1": 1.0, "SUP2": None, "SUP3": None},
+]
+CATALOG = {f"SUP{i}": {"suppliernumber": f"SUP{i}", "suppliername": f"Supplier {i}"} for i in (1, 2, 3)}
+
+@pytest.fixture
+def table():
+    return SavingsTable(MasterFileSnapshot.from_rows(MASTER_ROWS), BenchmarkIndexBuilder.from_rows(BENCHMARK_ROWS))
+
+def per_part_savings(part_number):
+    """Savings of one part the way the single-part analysis computes them"""
+    data_service = DataService(SupabaseClient())
+    record = next(row for row in MASTER_ROWS if row["partnumber"] == part_number)
+    part_info = data_service._part_info_from_record(record)
+    benchmark = next(row for row in BENCHMARK_ROWS if row["partnumber"] == part_number)
+    suppliers = [
+        data_service._supplier_info_from_record(s)
+        for s in data_service.supabase._join_benchmark_suppliers(benchmark, CATALOG)
+    ]
+    summary = AIAgent.__new__(AIAgent)._generate_fallback_analysis(part_info, suppliers)
+    return summary.potential_savings, summary.savings_percentage
+
+def test_vectorized_savings_match_per_part_analysis(table):
+    # PA-5 has no quotes, PA-9 no MASTER_FILE row
+    records, total, _ = table.opportunities(min_savings=-np.inf)
+    by_part = {record["part_number"]: record for record in records}
+    assert sorted(by_part) == ["PA-1", "PA-2", "PA-3", "PA-4"] and total == 4
+    for part_number in ("PA-1", "PA-2", "PA-3"):
+        savings, percentage = per_part_savings(part_number)
+        assert by_part[part_number]["potential_savings"] == pytest.approx(savings, abs=0.01)
+        assert by_part[part_number]["savings_percentage"] == pytest.approx(percentage, abs=1e-4)
+    # A zero quote is not a price
+    assert by_part["PA-2"]["best_price"] == 4.0 and by_part["PA-2"]["quote_count"] == 1
+    # Unpriced parts count as price 0, like PartInfo, with no percentage
+    assert by_part["PA-4"]["potential_savings"] == -720.0
+    assert by_part["PA-4"]["savings_percentage"] is None
+
+def test_opportunities_sort_filter_and_totals(table):
+    records, total, totals = table.opportunities()
+    assert [r["part_number"] for r in records] == ["PA-1", "PA-3", "PA-2"] and total == 3
+    assert records[0]["best_supplier_number"] == "SUP2"
+    assert totals["EUR"] == {"parts": 2, "potential_savings": 780.0, "annual_spend": 3000.0}
+    assert totals["USD"]["potential_savings"] == 120.0
+
+    records, _, _ = table.opportunities(sort_by="savings_percentage")
+    assert [r["part_number"] for r in records] == ["PA-3", "PA-1", "PA-2"]
+    records, total, _ = table.opportunities(currency="usd")
+    assert [r["part_number"] for r in records] == ["PA-2"] and total == 1
+    records, _, _ = table.opportunities(alternative_supplier="SUP2", min_savings_percentage=26)
+    assert [r["part_number"] for r in records] == ["PA-3"]
+    records, total, _ = table.opportunities(limit=1, offset=1)
+    assert [r["part_number"] for r in records] == ["PA-3"] and total == 3
+
+class Loaded:
+    """Stands in for MasterFileAnalytics / PartsBenchmarks once loaded"""
+
+    def __init__(self, **attributes):
+        self.last_error = None
+        self.is_loaded = True
+        self.__dict__.update(attributes)
+
+def test_table_is_recomputed_only_when_data_changes():
+    master = Loaded(snapshot=None)
+    benchmarks = Loaded(index=BenchmarkIndexBuilder.from_rows(BENCHMARK_ROWS))
+    portfolio = PortfolioSavings(master, benchmarks)
+    assert portfolio.table() is None
+    master.snapshot = MasterFileSnapshot.from_rows(MASTER_ROWS)
+    first = portfolio.table()
+    assert portfolio.table() is first
+    # A rebuilt but identical snapshot keeps the cached table
+    master.snapshot = MasterFileSnapshot.from_rows(MASTER_ROWS)
+    assert portfolio.table() is first
+    benchmarks.index = BenchmarkIndexBuilder.from_rows(BENCHMARK_ROWS[:1])
+    assert portfolio.table() is not first
+    assert portfolio.status()["parts_with_quotes"] == 1
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from ai_agent import AIAgent, SUMMARY_SECTIONS, SectionStreamParser
+
+ANSWERS = [
+    """**1. Supplier Comparison**
+Supplier A quotes 1.50 EUR, 25% below the current price.
+Supplier B quotes 1.80 EUR.
+
+**2. Geographic Risk Assessment**
+Both alternatives are in the EU.
+
+**3. Strategic Recommendation**
+Request a quote from Supplier A.
+**4. Potential Savings**
+600 EUR per year.""",
+    # No risk section, a trailing section with no end keyword and no final newline
+    "Intro\nSupplier Comparison:\n- A is cheaper\n\nStrategic Recommendation:\nSwitch to A\nthen re-benchmark",
+    # A section ended by a keyword line, later mentions of a name do not restart it
+    "Supplier Comparison\nline one\nKey considerations\nmore\nsupplier comparison again\nSummary",
+    "",
+]
+
+def parse_streamed(answer, chunk_sizes):
+    parser = SectionStreamParser(list(SUMMARY_SECTIONS))
+    completed = []
+    position = 0
+    for size in chunk_sizes:
+        completed.extend(parser.feed(answer[position:position + size]))
+        position += size
+    completed.extend(parser.feed(answer[position:]))
+    completed.extend(parser.close())
+    assert dict(completed) == parser.sections
+    return parser.sections
+
+@pytest.mark.parametrize("answer", ANSWERS)
+def test_streamed_sections_match_extract_section(answer):
+    agent = AIAgent.__new__(AIAgent)
+    rng = random.Random(7)
+    for _ in range(20):
+        chunk_sizes = [rng.randint(1, 12) for _ in range(len(answer) // 4 + 1)]
+        sections = parse_streamed(answer, chunk_sizes)
+        for name in SUMMARY_SECTIONS:
+            expected = agent._extract_section(answer, name)
+            assert sections.get(name, "Analysis not available") == expected
+
+def test_section_is_returned_as_soon_as_the_next_header_arrives():
+    parser = SectionStreamParser(list(SUMMARY_SECTIONS))
+    assert parser.feed("Supplier Comparison\nA is cheaper\n") == []
+    assert parser.feed("Geographic Risk Assess") == []
+    assert parser.feed("ment\n") == [("Supplier Comparison", "A is cheaper")]
@@ -0,0 +1,106 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import similar_parts
+from similar_parts import SimilarPartsIndex, SimilarPartsNotReady, files_signature
+from spec_attributes import SpecAttributeTable
+
+def attribute_table(tmp_path, drawings):
+    table = SpecAttributeTable(str(tmp_path / "attributes.npz"))
+    files = {f"{part} dwg.txt": (1, 1) for part in drawings}
+    table.refresh(files, lambda name: name.split()[0], lambda name: drawings[name.split()[0]])
+    return table
+
+DRAWINGS = {
+    "PA-1": "Gear\n\nDIMENSIONS:\n- 40x40x10mm\n- 3x ribs\n- Material: PA66 15%GF",
+    "PA-2": "Gear\n\nDIMENSIONS:\n- 42x40x10mm\n- 3x ribs\n- Material: PA66 15%GF",
+    "PA-3": "Lens Cover\n\nDIMENSIONS:\n- 200x150x3mm\n- Material: PC",
+}
+TERMS = [["gear", "pa66", "gf15", "rib"], ["gear", "pa66", "gf15", "rib"], ["len", "cover", "pc"]]
+
+def test_files_signature_tracks_names_sizes_and_mtimes():
+    base = files_signature({"a": (1, 1), "b": (2, 2)})
+    assert base == files_signature({"b": (2, 2), "a": (1, 1)})
+    assert base != files_signature({"a": (1, 2), "b": (2, 2)})
+
+def test_similar_ranks_closest_part_first(tmp_path):
+    index = SimilarPartsIndex(str(tmp_path / "similar"), text_weight=0.5)
+    index.build("sig", sorted(DRAWINGS), TERMS, attribute_table(tmp_path, DRAWINGS))
+    hits = index.similar("PA-1", k=2)
+    assert hits[0][0] == "PA-2"
+    assert hits[0][1] > 0.9
+    assert all(part != "PA-1" for part, _ in hits)
+    assert index.similar("PA-9") is None
+
+def test_build_is_published_as_one_unit_and_reloaded(tmp_path):
+    directory = tmp_path / "similar"
+    index = SimilarPartsIndex(str(directory))
+    table = attribute_table(tmp_path, DRAWINGS)
+    index.build("first", sorted(DRAWINGS), TERMS, table)
+    index.build("second", ["PA-1", "PA-2"], TERMS[:2], table)
+    meta = json.loads((directory / "meta.json").read_text())
+    assert meta["signature"] == "second"
+    assert [p.name for p in directory.glob("matrix*.npy")] == [meta["matrix"]]
+    reloaded = SimilarPartsIndex(str(directory))
+    assert reloaded.is_current("second")
+    assert reloaded.similar("PA-1")[0][0] == "PA-2"
+
+def test_meta_pointing_at_missing_matrix_is_ignored(tmp_path):
+    directory = tmp_path / "similar"
+    directory.mkdir()
+    (directory / "meta.json").write_text(json.dumps({
+        "version": similar_parts.INDEX_VERSION, "signature": "x", "matrix": "matrix-gone.npy", "part_numbers": ["PA-1"]
+    }))
+    index = SimilarPartsIndex(str(directory))
+    assert not index.is_built
+
+class BackgroundBuildHarness:
+    """A FileService whose similar-parts rebuild blocks until `release` is set"""
+
+    def __init__(self, tmp_path):
+        from file_service import FileService
+        self.service = FileService.__new__(FileService)
+        self.service.similar_parts = SimilarPartsIndex(str(tmp_path / "similar"))
+        self.service._similar_parts_lock = threading.Lock()
+        self.service._similar_parts_schedule_lock = threading.Lock()
+        self.service._similar_parts_thread = None
+        self.release = threading.Event()
+        self.builds = []
+        table = attribute_table(tmp_path, DRAWINGS)
+
+        def refresh():
+            with self.service._similar_parts_lock:
+                self.release.wait(5)
+                self.builds.append(1)
+                self.service.similar_parts.build(files_signature(self.files), sorted(DRAWINGS), TERMS, table)
+
+        self.files = {"PA-1 dwg.txt": (1, 1)}
+        self.service._similar_parts_files = lambda: dict(self.files)
+        self.service.refresh_similar_parts = refresh
+
+def test_request_path_never_builds_inline(tmp_path):
+    fake = BackgroundBuildHarness(tmp_path)
+    service = fake.service
+    with pytest.raises(SimilarPartsNotReady):
+        service.current_similar_parts()
+    # Concurrent requests while the build runs share the one background rebuild
+    assert not service.schedule_similar_parts_refresh()
+    with pytest.raises(SimilarPartsNotReady):
+        service.current_similar_parts()
+    fake.release.set()
+    service._similar_parts_thread.join(5)
+    assert fake.builds == [1]
+    assert service.current_similar_parts().similar("PA-1")[0][0] == "PA-2"
+    assert service._similar_parts_thread.is_alive() is False
+
+    # Specs changed: the last good build is served while the rebuild runs
+    fake.release.clear()
+    fake.files["PA-2 dwg.txt"] = (1, 1)
+    assert service.current_similar_parts().similar("PA-1")[0][0] == "PA-2"
+    assert service._similar_parts_thread.is_alive()
+    fake.release.set()
+    service._similar_parts_thread.join(5)
+    assert fake.builds == [1, 1]
@@ -0,0 +1,85 @@
+import math
+from pathlib import Path
+
+import numpy as np
+
+from spec_attributes import FEATURES, SpecAttributeTable, parse_drawing
+
+SPECS = Path(__file__).parent / "SPECS"
+
+def drawing(part_number):
+    return (SPECS / f"{part_number} dwg.txt").read_text(encoding="utf-8")
+
+def test_parse_box_dimensions_material_and_features():
+    attributes = parse_drawing(drawing("PA-10183"))
+    assert attributes["title"] == "Control Module Base"
+    assert (attributes["length_mm"], attributes["width_mm"], attributes["height_mm"]) == (120.0, 60.0, 25.0)
+    assert math.isclose(attributes["bounding_volume_cm3"], 180.0)
+    assert attributes["material"] == "PPS"
+    assert (attributes["filler_type"], attributes["filler_pct"]) == ("CF", 40.0)
+    assert {"snap_fit", "channel"} <= set(attributes["features"])
+
+def test_parse_counted_items():
+    attributes = parse_drawing(drawing("PA-10185"))
+    assert attributes["rib_count"] == 3
+    assert attributes["material"] == "PA66"
+    assert (attributes["filler_type"], attributes["filler_pct"]) == ("GF", 15.0)
+
+def test_parse_length_and_diameter():
+    attributes = parse_drawing(drawing("PA-10178"))
+    assert (attributes["length_mm"], attributes["width_mm"], attributes["height_mm"]) == (150.0, 12.0, 12.0)
+    assert "overmold" in attributes["features"]
+
+def test_unstated_values_stay_missing():
+    attributes = parse_drawing("Plain Clip\n\nDIMENSIONS:\n- Material: PP unfilled")
+    assert attributes["title"] == "Plain Clip"
+    assert np.isnan(attributes["length_mm"]) and np.isnan(attributes["bounding_volume_cm3"])
+    assert attributes["filler_type"] == "" and attributes["filler_pct"] == 0.0
+    assert attributes["features"] == []  # "Clip" is only in the title
+
+def test_refresh_parses_only_changed_drawings_and_persists(tmp_path):
+    texts = {
+        "PA-1 dwg.txt": "Gear\n\nDIMENSIONS:\n- 10x10x10mm\n- Material: POM",
+        "PA-2 dwg.txt": "Cover\n\nDIMENSIONS:\n- 20x10x5mm\n- 4x M3 threaded inserts\n- Material: PA6 30%GF",
+    }
+    reads = []
+
+    def read_text(name):
+        reads.append(name)
+        return texts[name]
+
+    path = str(tmp_path / "attributes.npz")
+    table = SpecAttributeTable(path)
+    files = {"PA-1 dwg.txt": (1, 1), "PA-2 dwg.txt": (1, 1)}
+    assert table.refresh(files, lambda name: name.split()[0], read_text) == 2
+    assert table.is_current(files)
+    cover = table.get("PA-2")
+    assert cover["insert_count"] == 4 and cover["threaded_count"] == 4 and cover["max_thread_m"] == 3.0
+    assert cover["features"] == ["threaded", "molded_in_inserts"]
+
+    texts["PA-1 dwg.txt"] = "Gear\n\nDIMENSIONS:\n- 10x10x20mm\n- Material: PEEK"
+    files["PA-1 dwg.txt"] = (1, 2)
+    assert table.refresh(files, lambda name: name.split()[0], read_text) == 1
+    assert reads == ["PA-1 dwg.txt", "PA-2 dwg.txt", "PA-1 dwg.txt"]
+
+    reloaded = SpecAttributeTable(path)
+    assert reloaded.is_current(files)
+    assert reloaded.get("PA-1")["material"] == "PEEK"
+    assert reloaded.get("PA-1")["bounding_volume_cm3"] == 2.0
+    assert reloaded.features.shape == (2, len(FEATURES))
+    assert reloaded.get("PA-3") is None
+
+def test_long_names_are_stored_whole(tmp_path):
+    long_name = "PA-7 " + "housing assembly revision " * 8 + "dwg.txt"
+    title = "Very Long Housing Assembly Title " * 3
+    files = {long_name: (1, 1)}
+    table = SpecAttributeTable(str(tmp_path / "attributes.npz"))
+    parsed = table.refresh(files, lambda name: "PA-7", lambda name: f"{title.strip()}\n\nDIMENSIONS:\n- Material: PA66")
+    assert parsed == 1
+    assert table.is_current(files)
+    assert table.refresh(files, lambda name: "PA-7", lambda name: "") == 0
+    reloaded = SpecAttributeTable(str(tmp_path / "attributes.npz"))
+    assert reloaded.is_current(files)
+    record = reloaded.get("PA-7")
+    assert record["filename"] == long_name and record["title"] == title.strip()
+    assert isinstance(record["title"], str) and isinstance(record["source_size"], int)
@@ -0,0 +1,34 @@
+import io
+import os
+import zipfile
+
+from spec_bundle import iter_zip_bundle
+
+def test_bundle_is_a_valid_zip(tmp_path):
+    drawing = tmp_path / "PA-1 dwg.txt"
+    drawing.write_text("Material: PA66 15%GF\n" * 2000)
+    datasheet = tmp_path / "PA-1 spec.pdf"
+    datasheet.write_bytes(os.urandom(200_000))
+    entries = [("PA-1/PA-1 dwg.txt", drawing), ("PA-1/PA-1 spec.pdf", datasheet), ("PA-2/PA-1 spec.pdf", datasheet)]
+
+    chunks = list(iter_zip_bundle(entries, chunk_size=16 * 1024))
+    assert len(chunks) > 3  # Emitted while it was built, not as one blob
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [name for name, _ in entries]
+        assert archive.read("PA-1/PA-1 dwg.txt") == drawing.read_bytes()
+        assert archive.read("PA-2/PA-1 spec.pdf") == datasheet.read_bytes()
+        assert archive.getinfo("PA-1/PA-1 dwg.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo("PA-1/PA-1 spec.pdf").compress_type == zipfile.ZIP_STORED
+
+def test_missing_files_are_skipped(tmp_path):
+    present = tmp_path / "PA-1 dwg.txt"
+    present.write_text("Gear")
+    entries = [("PA-9/PA-9 dwg.txt", tmp_path / "PA-9 dwg.txt"), ("PA-1/PA-1 dwg.txt", present)]
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_zip_bundle(entries)))) as archive:
+        assert archive.namelist() == ["PA-1/PA-1 dwg.txt"]
+
+def test_empty_bundle_is_a_valid_zip():
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_zip_bundle([])))) as archive:
+        assert archive.namelist() == []
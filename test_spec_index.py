@@ -0,0 +1,74 @@
+import os
+
+from spec_index import SpecIndex
+
+def make_index(tmp_path, **kwargs):
+    specs = tmp_path / "SPECS"
+    specs.mkdir(exist_ok=True)
+    return specs, SpecIndex(specs, index_path=str(tmp_path / "index.json"), **kwargs)
+
+def test_part_numbers_in_respects_token_boundaries(tmp_path):
+    _, index = make_index(tmp_path)
+    assert index.part_numbers_in("PA-1017 dwg.txt") == ["PA-1017"]
+    assert index.part_numbers_in("PA-10170 spec.pdf") == ["PA-10170"]
+    assert index.part_numbers_in("xPA-1017.pdf") == []
+    assert index.part_numbers_in("PA-1017_PA-1018 PA-1017.pdf") == ["PA-1017", "PA-1018"]
+
+def test_files_for_part_is_exact(tmp_path):
+    specs, index = make_index(tmp_path)
+    (specs / "PA-1017 dwg.txt").write_text("a")
+    (specs / "PA-10170 dwg.txt").write_text("b")
+    assert [name for name, _, _ in index.files_for_part("PA-1017")] == ["PA-1017 dwg.txt"]
+    assert [name for name, _, _ in index.files_for_part("PA-10170")] == ["PA-10170 dwg.txt"]
+
+def test_detects_added_and_removed_files(tmp_path):
+    specs, index = make_index(tmp_path)
+    index.ensure_current()
+    (specs / "PA-1 dwg.txt").write_text("a")
+    os.utime(specs, ns=(1, 1))
+    changes = index.ensure_current()
+    assert changes.added == ["PA-1 dwg.txt"]
+    (specs / "PA-1 dwg.txt").unlink()
+    os.utime(specs, ns=(2, 2))
+    assert index.ensure_current().removed == ["PA-1 dwg.txt"]
+
+def test_in_place_overwrite_is_detected_after_restat_interval(tmp_path):
+    specs, index = make_index(tmp_path, restat_interval=0)
+    path = specs / "PA-1 dwg.txt"
+    path.write_text("old")
+    index.ensure_current()
+    dir_stat = specs.stat()
+    path.write_text("new content")
+    os.utime(path, ns=(10**18, 10**18))
+    os.utime(specs, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    # The re-stat runs off the lookup path; the lookup itself does not wait for it
+    assert index.ensure_current() is None
+    index._restat_thread.join(5)
+    assert index._files["PA-1 dwg.txt"][0] == len("new content")
+
+def test_unchanged_directory_is_not_rescanned_within_interval(tmp_path):
+    specs, index = make_index(tmp_path, restat_interval=3600)
+    (specs / "PA-1 dwg.txt").write_text("a")
+    index.ensure_current()
+    assert index.ensure_current() is None
+
+def test_index_is_persisted(tmp_path):
+    specs, index = make_index(tmp_path)
+    (specs / "PA-1 dwg.txt").write_text("a")
+    index.ensure_current()
+    reloaded = SpecIndex(specs, index_path=str(tmp_path / "index.json"), restat_interval=3600)
+    assert reloaded._files == index._files
+    assert reloaded._parts == {"PA-1": ["PA-1 dwg.txt"]}
+
+def test_restart_with_unchanged_directory_needs_no_scan(tmp_path, monkeypatch):
+    specs, index = make_index(tmp_path)
+    (specs / "PA-1 dwg.txt").write_text("a")
+    index.ensure_current()
+
+    def no_scan(path):
+        raise AssertionError("directory was scanned")
+
+    monkeypatch.setattr(os, "scandir", no_scan)
+    reloaded = SpecIndex(specs, index_path=str(tmp_path / "index.json"), restat_interval=3600)
+    assert [name for name, _, _ in reloaded.files_for_part("PA-1")] == ["PA-1 dwg.txt"]
+    assert reloaded._restat_thread is None
@@ -0,0 +1,33 @@
+import spec_text_cache
+from spec_ingest import SpecIngestor, extract_spec
+
+def test_extract_spec_hashes_and_extracts(tmp_path):
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: PA66")
+    result = extract_spec(str(spec), max_pages=0, timeout=5)
+    assert result["sha256"] == spec_text_cache.file_sha256(str(spec))
+    assert "PA66" in result["text"]
+
+def test_extract_spec_keywords_only_skips_text(tmp_path):
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: PA66")
+    assert extract_spec(str(spec), max_pages=0, timeout=5, keywords_only=True)["text"] is None
+
+def test_ingest_files_extracts_in_workers_and_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(spec_text_cache, "_spec_text_cache", None)
+    for i in range(3):
+        (tmp_path / f"PA-{i} dwg.txt").write_text(f"Material: PA6 part {i}")
+    (tmp_path / "notes.doc").write_text("ignored")
+    ingestor = SpecIngestor(max_workers=1, timeout=30)
+    try:
+        paths = sorted(str(path) for path in tmp_path.iterdir() if path.is_file())
+        assert ingestor.ingest_files(paths) == {"files": 3, "cached": 0, "extracted": 3, "failed": 0}
+        assert ingestor.ingest_files(paths) == {"files": 3, "cached": 3, "extracted": 0, "failed": 0}
+    finally:
+        ingestor.shutdown()
+    assert "part 2" in ingestor.cache.lookup(str(tmp_path / "PA-2 dwg.txt"))["text"]
+
+def test_missing_file_counts_as_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(spec_text_cache, "_spec_text_cache", None)
+    ingestor = SpecIngestor(max_workers=1)
+    assert ingestor.ingest_files([str(tmp_path / "PA-9 missing.txt")])["failed"] == 1
@@ -0,0 +1,81 @@
+from spec_search import SpecSearchIndex, tokenize
+
+TEXTS = {
+    "PA-1 dwg.txt": "Connector housing, Material: PA66 + 15% GF, injection molded",
+    "PA-2 dwg.txt": "Gear in POM, 4x M3 threaded inserts",
+    "PA-3 dwg.txt": "Bracket, Material: PA 6 30% glass fibers",
+    "PA-4 dwg.txt": "Sensor housing in PPS carbon filled",
+}
+
+def files_for(names, mtime=1):
+    return {name: (len(TEXTS[name]), mtime) for name in names}
+
+def ranked(index, query):
+    hits, total = index.search(query, limit=10)
+    return [(hit["filename"], hit["score"]) for hit in hits], total
+
+def test_tokenize_normalizes_fillers_and_polyamides():
+    terms = tokenize("PA 6 with 30% glass fibers, molded inserts")
+    assert {"pa6", "gf30", "mold", "insert"} <= set(terms)
+    assert "with" not in terms
+
+def test_search_ranks_by_bm25(tmp_path):
+    index = SpecSearchIndex(tmp_path / "search")
+    index.sync(files_for(TEXTS), TEXTS.get)
+    hits, total = index.search("housing gf15")
+    assert total == 2
+    assert hits[0]["filename"] == "PA-1 dwg.txt"
+    assert set(hits[0]["matched_terms"]) == {"hous", "gf15"}
+    assert index.search("pa6 gf30")[0][0]["filename"] == "PA-3 dwg.txt"
+
+def test_files_without_text_stay_pending(tmp_path):
+    index = SpecSearchIndex(tmp_path / "search")
+    files = files_for(TEXTS)
+    available = {name: text for name, text in TEXTS.items() if name != "PA-2 dwg.txt"}
+    stats = index.sync(files, available.get)
+    assert stats["indexed"] == 3 and stats["pending"] == 1
+    assert index.missing(files) == ["PA-2 dwg.txt"]
+    assert not index.is_current(files)
+    stats = index.sync(files, TEXTS.get)
+    assert stats["indexed"] == 1 and stats["pending"] == 0
+    assert index.is_current(files)
+    assert index.search("gear")[0][0]["filename"] == "PA-2 dwg.txt"
+
+def test_sync_is_incremental_and_drops_removed_files(tmp_path):
+    index = SpecSearchIndex(tmp_path / "search")
+    index.sync(files_for(TEXTS), TEXTS.get)
+    assert index.sync(files_for(TEXTS), TEXTS.get)["indexed"] == 0
+    remaining = files_for(["PA-1 dwg.txt", "PA-3 dwg.txt"])
+    assert index.sync(remaining, TEXTS.get)["removed"] == 2
+    assert index.search("gear") == ([], 0)
+    assert index.is_current(remaining)
+
+def only(*names):
+    """text_for that knows only these files, so a merge that re-reads text would fail"""
+    texts = {**TEXTS, "PA-5 dwg.txt": "clip"}
+    return lambda name: texts[name] if name in names else None
+
+def test_merge_rebuilds_from_postings_and_keeps_scores(tmp_path):
+    merged = SpecSearchIndex(tmp_path / "merged", max_segments=2)
+    incremental = SpecSearchIndex(tmp_path / "incremental", max_segments=100)
+    steps = [
+        ({"PA-1 dwg.txt": 1}, only("PA-1 dwg.txt")),
+        ({"PA-1 dwg.txt": 1, "PA-2 dwg.txt": 1}, only("PA-2 dwg.txt")),
+        ({"PA-1 dwg.txt": 1, "PA-2 dwg.txt": 1, "PA-3 dwg.txt": 1}, only("PA-3 dwg.txt")),
+        # PA-1 is replaced, leaving a dead copy in the merged segment
+        ({"PA-1 dwg.txt": 2, "PA-2 dwg.txt": 1, "PA-3 dwg.txt": 1, "PA-4 dwg.txt": 1}, only("PA-1 dwg.txt", "PA-4 dwg.txt")),
+        ({"PA-1 dwg.txt": 2, "PA-2 dwg.txt": 1, "PA-3 dwg.txt": 1, "PA-4 dwg.txt": 1, "PA-5 dwg.txt": 1}, only("PA-5 dwg.txt")),
+    ]
+    merges = []
+    for mtimes, text_for in steps:
+        files = {name: (10, mtime) for name, mtime in mtimes.items()}
+        merges.append(merged.sync(files, text_for)["merged"])
+        incremental.sync(files, text_for)
+    assert merges == [0, 0, 3, 0, 5]
+    assert len(merged._segments) == 1
+    assert len(incremental._segments) == 4  # the first PA-1 segment died when it was replaced
+    assert merged.is_current(files)
+    reopened = SpecSearchIndex(tmp_path / "merged")
+    for query in ("housing", "pa66 gf15 injection molding", "threaded inserts", "carbon", "clip"):
+        assert ranked(reopened, query) == ranked(incremental, query)
+        assert ranked(reopened, query)[1] > 0
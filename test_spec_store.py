@@ -0,0 +1,87 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+import spec_text_cache
+from config import config
+from file_service import FileService
+from spec_store import SpecBlobStore, SpecUploadEmpty, SpecUploadTooLarge
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+def write(store, *parts):
+    return asyncio.run(store.write_stream(chunks(*parts)))
+
+def test_identical_uploads_are_stored_once_and_read_only(tmp_path):
+    store = SpecBlobStore(str(tmp_path / "blobs"))
+    content_hash, size, created = write(store, b"Material: ", b"PA66")
+    assert (size, created) == (14, True)
+    assert write(store, b"Material: PA66") == (content_hash, 14, False)
+    blob = store.blob_path(content_hash)
+    assert blob.read_bytes() == b"Material: PA66"
+    assert stat.S_IMODE(os.stat(blob).st_mode) == 0o444
+    assert list((tmp_path / "blobs" / "tmp").iterdir()) == []
+
+def test_upload_over_the_limit_is_rejected(tmp_path):
+    store = SpecBlobStore(str(tmp_path / "blobs"), max_bytes=8)
+    with pytest.raises(SpecUploadTooLarge):
+        write(store, b"12345", b"67890")
+    assert list((tmp_path / "blobs" / "tmp").iterdir()) == []
+
+def test_replacing_a_spec_leaves_other_names_alone(tmp_path):
+    store = SpecBlobStore(str(tmp_path / "blobs"))
+    specs = tmp_path / "SPECS"
+    specs.mkdir()
+    shared, _, _ = write(store, b"shared datasheet")
+    assert store.link(shared, specs / "PA-1 spec.pdf") == "hardlink"
+    store.link(shared, specs / "PA-2 spec.pdf")
+    replacement, _, _ = write(store, b"revised datasheet")
+    store.link(replacement, specs / "PA-1 spec.pdf")
+    assert (specs / "PA-1 spec.pdf").read_bytes() == b"revised datasheet"
+    assert (specs / "PA-2 spec.pdf").read_bytes() == b"shared datasheet"
+    assert sorted(p.name for p in specs.iterdir()) == ["PA-1 spec.pdf", "PA-2 spec.pdf"]
+
+def test_empty_upload_leaves_nothing_behind(tmp_path):
+    store = SpecBlobStore(str(tmp_path / "blobs"))
+    with pytest.raises(SpecUploadEmpty):
+        write(store, b"", b"")
+    assert sorted(p.name for p in (tmp_path / "blobs").iterdir()) == ["tmp"]
+    assert list((tmp_path / "blobs" / "tmp").iterdir()) == []
+
+@pytest.fixture
+def file_service(tmp_path, monkeypatch):
+    specs = tmp_path / "SPECS"
+    specs.mkdir()
+    monkeypatch.setattr(config, "SPECS_DIRECTORY", str(specs))
+    monkeypatch.setattr(spec_text_cache, "_spec_text_cache", None)
+    return FileService()
+
+def test_blob_store_is_outside_specs_by_default(file_service):
+    blobs = os.path.abspath(file_service.spec_blobs.directory)
+    assert not blobs.startswith(os.path.abspath(file_service.specs_directory) + os.sep)
+
+def test_downloads_cannot_reach_hidden_entries(file_service):
+    specs = file_service.specs_directory
+    (specs / "PA-1 dwg.txt").write_text("Gear")
+    (specs / ".blobs" / "ab").mkdir(parents=True)
+    (specs / ".blobs" / "ab" / "abcd").write_text("blob")
+    (specs / ".PA-1 dwg.txt.tmp").write_text("in flight")
+    assert file_service.get_file_path("PA-1 dwg.txt") == specs / "PA-1 dwg.txt"
+    assert file_service.get_file_path(".blobs/ab/abcd") is None
+    assert file_service.get_file_path(".PA-1 dwg.txt.tmp") is None
+    assert file_service.get_file_path("../SPECS/PA-1 dwg.txt") is None
+    assert file_service.spec_index.filenames() == ["PA-1 dwg.txt"]
+
+def test_uploaded_spec_is_linked_and_indexed(file_service):
+    content_hash, _, _ = write(file_service.spec_blobs, b"Material: PA66 15%GF")
+    name = file_service.upload_filename("PA-7", "drawing.txt")
+    assert name == "PA-7 drawing.txt"
+    stored = file_service.add_uploaded_spec(name, content_hash)
+    assert stored["size"] == 20
+    assert [spec.filename for spec in file_service.find_technical_specs("PA-7")] == [name]
+    assert file_service.upload_filename("PA-7", "../evil.txt") is None
+    assert file_service.upload_filename("PA-7", ".hidden.txt") is None
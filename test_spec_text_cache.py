@@ -0,0 +1,63 @@
+import os
+
+import spec_text_cache
+from spec_text_cache import SpecTextCache
+
+def count_extractions(monkeypatch):
+    calls = []
+    real_extract = spec_text_cache.extract_spec_content
+
+    def extract(spec_path, keywords_only=False, max_pages=None):
+        calls.append((os.path.basename(spec_path), keywords_only))
+        return real_extract(spec_path, keywords_only, max_pages)
+
+    monkeypatch.setattr(spec_text_cache, "extract_spec_content", extract)
+    return calls
+
+def test_unchanged_file_is_extracted_once(tmp_path, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: PA66 GF30\nProcess: injection molding")
+    cache = SpecTextCache()
+    first = cache.get(str(spec))
+    second = cache.get(str(spec))
+    assert first == second
+    assert "PA66" in first["text"]
+    assert calls == [("PA-1 dwg.txt", False)]
+
+def test_touched_or_copied_file_reuses_content_entry(tmp_path, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: POM")
+    cache = SpecTextCache()
+    cache.get(str(spec))
+    os.utime(spec, ns=(10**18, 10**18))
+    copy = tmp_path / "PA-2 dwg.txt"
+    copy.write_text("Material: POM")
+    assert cache.lookup(str(spec)) is None
+    cache.get(str(spec))
+    cache.get(str(copy))
+    assert calls == [("PA-1 dwg.txt", False)]
+
+def test_keywords_only_entry_is_completed_when_text_is_needed(tmp_path, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: PBT")
+    cache = SpecTextCache()
+    partial = cache.get(str(spec), need_text=False)
+    assert partial["text"] is None
+    assert cache.lookup(str(spec), need_text=False) is not None
+    assert cache.lookup(str(spec)) is None
+    full = cache.get(str(spec))
+    assert "PBT" in full["text"]
+    assert calls == [("PA-1 dwg.txt", True), ("PA-1 dwg.txt", False)]
+
+def test_changed_content_is_re_extracted(tmp_path, monkeypatch):
+    calls = count_extractions(monkeypatch)
+    spec = tmp_path / "PA-1 dwg.txt"
+    spec.write_text("Material: PBT")
+    cache = SpecTextCache()
+    cache.get(str(spec))
+    spec.write_text("Material: PEEK, a longer description")
+    assert "PEEK" in cache.get(str(spec))["text"]
+    assert len(calls) == 2
@@ -0,0 +1,137 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from supabase_client import TableLoadError
+from supabase_mirror import MirrorSupabaseClient, MirrorSync, SupabaseMirror, _import_rows
+
+def benchmark(part_number, price, updated_at="2024-01-01T00:00:00+00:00"):
+    return {"partnumber": part_number, "SUP1": price, "updated_at": updated_at}
+
+def mirrored(mirror, table="PARTS_BENCHMARKS"):
+    return [row for page in mirror.read_pages(table, 1000) for row in page]
+
+def test_full_diff_inserts_updates_moves_and_deletes(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    rows = [benchmark("PA-1", 1.0), benchmark("PA-2", 2.0), benchmark("PA-3", 3.0)]
+    assert _import_rows(mirror, "PARTS_BENCHMARKS", rows) == 3
+    assert mirrored(mirror) == rows
+    # Unchanged data writes nothing
+    assert _import_rows(mirror, "PARTS_BENCHMARKS", rows) == 0
+
+    # PA-1 deleted, PA-3 updated, PA-4 inserted, PA-2 moves up without being rewritten
+    rows = [benchmark("PA-2", 2.0), benchmark("PA-3", 3.5), benchmark("PA-4", 4.0)]
+    assert _import_rows(mirror, "PARTS_BENCHMARKS", rows) == 3
+    assert mirrored(mirror) == rows
+    assert mirror.select_in("PARTS_BENCHMARKS", "partnumber", ["PA-1", "PA-3"]) == [rows[1]]
+    state = mirror.state("PARTS_BENCHMARKS")
+    assert (state["row_count"], state["last_mode"], state["last_changes"]) == (3, "full", 3)
+    assert state["watermark"] == "2024-01-01T00:00:00+00:00"
+
+def test_duplicate_keys_are_kept_apart(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    rows = [benchmark("PA-1", 1.0), benchmark("PA-1", 1.1)]
+    _import_rows(mirror, "PARTS_BENCHMARKS", rows)
+    assert mirrored(mirror) == rows
+
+def test_incremental_update_replaces_the_mirrored_row(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    _import_rows(mirror, "PARTS_BENCHMARKS", [benchmark("PA-1", 1.0), benchmark("PA-1", 1.1), benchmark("PA-2", 2.0)])
+    changed = [benchmark("PA-1", 0.9, "2024-02-01"), benchmark("PA-1", 1.2, "2024-02-01"), benchmark("PA-5", 5.0, "2024-02-01")]
+    assert mirror.apply_incremental("PARTS_BENCHMARKS", changed, "updated_at") == 3
+    # Changed rows keep their place; new rows go to the end
+    assert mirrored(mirror) == [changed[0], changed[1], benchmark("PA-2", 2.0), changed[2]]
+    assert mirror.state("PARTS_BENCHMARKS")["watermark"] == "2024-02-01"
+    # A later full diff of the same data finds nothing to change
+    assert _import_rows(mirror, "PARTS_BENCHMARKS", mirrored(mirror)) == 0
+
+class FakeRemote:
+    """Pages of PARTS_BENCHMARKS; `before_page` runs before each page is handed out"""
+
+    def __init__(self, rows, page_size=2, fail_after=None, before_page=None):
+        self.rows = rows
+        self.page_size = page_size
+        self.fail_after = fail_after
+        self.before_page = before_page
+        self.filters = []
+
+    async def iter_table_pages(self, table, order, filters=None, **kwargs):
+        self.filters.append(filters)
+        for i in range(0, len(self.rows), self.page_size):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise TableLoadError(f"{table}: HTTP 500")
+            if self.before_page:
+                self.before_page()
+            yield self.rows[i:i + self.page_size]
+
+def test_full_sync_holds_no_write_lock_while_downloading(tmp_path):
+    path = str(tmp_path / "mirror.sqlite3")
+    mirror = SupabaseMirror(path)
+    writes = []
+
+    def write_elsewhere():
+        # Another writer must get in while the sync is still fetching pages
+        conn = sqlite3.connect(path, timeout=0, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("ROLLBACK")
+        conn.close()
+        writes.append(1)
+
+    rows = [benchmark(f"PA-{i}", float(i)) for i in range(5)]
+    sync = MirrorSync(FakeRemote(rows, before_page=write_elsewhere), mirror, watermark_column="updated_at")
+    result = asyncio.run(sync.sync_table("PARTS_BENCHMARKS"))
+    assert (result["mode"], result["changes"]) == ("full", 5)
+    assert len(writes) == 3
+    assert mirrored(mirror) == rows
+
+def test_failed_sync_leaves_the_mirror_unchanged(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    rows = [benchmark("PA-1", 1.0), benchmark("PA-2", 2.0)]
+    _import_rows(mirror, "PARTS_BENCHMARKS", rows)
+    remote = FakeRemote([benchmark("PA-1", 9.0), benchmark("PA-2", 9.0), benchmark("PA-3", 9.0)], fail_after=2)
+    sync = MirrorSync(remote, mirror, watermark_column="updated_at")
+    results = asyncio.run(sync.sync(full=True, tables=["PARTS_BENCHMARKS"]))
+    assert "HTTP 500" in results[0]["error"]
+    assert mirrored(mirror) == rows
+
+def test_incremental_sync_filters_on_the_watermark(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    _import_rows(mirror, "PARTS_BENCHMARKS", [benchmark("PA-1", 1.0)])
+    remote = FakeRemote([benchmark("PA-1", 0.5, "2024-03-01T00:00:00+00:00")])
+    sync = MirrorSync(remote, mirror, full_interval=3600, watermark_column="updated_at")
+    result = asyncio.run(sync.sync_table("PARTS_BENCHMARKS"))
+    assert (result["mode"], result["changes"]) == ("incremental", 1)
+    assert remote.filters == ["updated_at=gte.2024-01-01T00:00:00Z"]
+    assert mirrored(mirror) == [benchmark("PA-1", 0.5, "2024-03-01T00:00:00+00:00")]
+
+def test_mirror_client_streams_tables_in_order(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    rows = [benchmark(f"PA-{i}", float(i)) for i in range(5)]
+    _import_rows(mirror, "PARTS_BENCHMARKS", rows)
+    client = MirrorSupabaseClient(mirror)
+
+    async def collect(table):
+        return [page async for page in client.iter_table_pages(table, "partnumber", page_size=2)]
+
+    assert [len(page) for page in asyncio.run(collect("PARTS_BENCHMARKS"))] == [2, 2, 1]
+    with pytest.raises(TableLoadError):
+        asyncio.run(collect("MASTER_FILE"))
+
+def test_bulk_read_is_not_shifted_by_a_sync_mid_load(tmp_path):
+    mirror = SupabaseMirror(str(tmp_path / "mirror.sqlite3"))
+    rows = [benchmark(f"PA-{i}", float(i)) for i in range(6)]
+    _import_rows(mirror, "PARTS_BENCHMARKS", rows)
+    client = MirrorSupabaseClient(mirror)
+
+    async def collect():
+        pages = []
+        async for page in client.iter_table_pages("PARTS_BENCHMARKS", "partnumber", page_size=2):
+            pages.append(page)
+            if len(pages) == 1:
+                # A full diff that deletes a row and moves the rest commits between pages
+                await asyncio.to_thread(_import_rows, mirror, "PARTS_BENCHMARKS", [benchmark("PA-9", 9.0)] + rows[1:])
+        return pages
+
+    assert [row for page in asyncio.run(collect()) for row in page] == rows
+    assert mirrored(mirror) == [benchmark("PA-9", 9.0)] + rows[1:]
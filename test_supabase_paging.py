@@ -0,0 +1,73 @@
+import asyncio
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+import pytest
+
+from supabase_client import SupabaseClient, TableLoadError, _content_range_total
+
+class FakeTransport:
+    """Serves `rows` with PostgREST limit/offset semantics, capped at `max_rows` per request"""
+
+    def __init__(self, rows, max_rows=None, count=True, fail_offset=None):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.count = count
+        self.fail_offset = fail_offset
+        self.requests = []
+
+    async def request(self, method, endpoint, data=None, timeout=None, headers=None):
+        query = parse_qs(urlsplit(endpoint).query)
+        offset, limit = int(query["offset"][0]), int(query["limit"][0])
+        self.requests.append((offset, headers))
+        request = httpx.Request(method, f"http://supabase.test/rest/v1/{endpoint}")
+        if offset == self.fail_offset:
+            return httpx.Response(500, request=request)
+        if self.max_rows:
+            limit = min(limit, self.max_rows)
+        page = self.rows[offset:offset + limit]
+        response_headers = {}
+        if headers and headers.get("Prefer") == "count=exact":
+            total = str(len(self.rows)) if self.count else "*"
+            response_headers["Content-Range"] = f"{offset}-{offset + len(page) - 1}/{total}"
+        return httpx.Response(200, json=page, headers=response_headers, request=request)
+
+ROWS = [{"partnumber": f"PA-{i:03d}"} for i in range(23)]
+
+def load(transport, **kwargs):
+    async def collect():
+        return [page async for page in SupabaseClient(transport).iter_table_pages("MASTER_FILE", "partnumber", **kwargs)]
+    return asyncio.run(collect())
+
+def test_content_range_total():
+    assert _content_range_total("0-999/5321") == 5321
+    assert _content_range_total("*/0") == 0
+    assert _content_range_total("0-999/*") is None
+    assert _content_range_total("") is None
+
+def test_pages_until_counted_rows_are_read():
+    transport = FakeTransport(ROWS)
+    pages = load(transport, page_size=5, prefetch=3)
+    assert [row for page in pages for row in page] == ROWS
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    # Only the first request asks for a count, and nothing is requested past the end
+    assert [offset for offset, _ in transport.requests] == [0, 5, 10, 15, 20]
+    assert transport.requests[0][1] == {"Prefer": "count=exact"}
+    assert all(headers is None for _, headers in transport.requests[1:])
+
+def test_server_row_cap_below_page_size_loses_no_rows():
+    transport = FakeTransport(ROWS, max_rows=4)
+    pages = load(transport, page_size=10, prefetch=2)
+    assert [row for page in pages for row in page] == ROWS
+    assert [offset for offset, _ in transport.requests] == [0, 4, 8, 12, 16, 20]
+
+def test_without_a_count_pages_until_an_empty_page():
+    transport = FakeTransport(ROWS, max_rows=4, count=False)
+    pages = load(transport, page_size=10, prefetch=2)
+    assert [row for page in pages for row in page] == ROWS
+    assert len(pages) == 6
+
+def test_empty_table_and_failed_page():
+    assert load(FakeTransport([])) == []
+    with pytest.raises(TableLoadError):
+        load(FakeTransport(ROWS, fail_offset=10), page_size=5, prefetch=2)
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from schemas import SupplierInfo
+from web_scraper import WebScraper
+
+def supplier(name):
+    return SupplierInfo(supplier_number=name, supplier_name=name, is_web_found=True)
+
+class FakeScraper(WebScraper):
+    """Answers each query after its own delay with canned suppliers"""
+
+    def __init__(self, answers, max_suppliers):
+        super().__init__()
+        self.answers = answers
+        self.max_suppliers = max_suppliers
+        self.search_concurrency = len(answers)
+
+    async def _search_google(self, query, log=None):
+        delay, names = self.answers[query]
+        await asyncio.sleep(delay)
+        if names is None:
+            raise RuntimeError("search failed")
+        return [supplier(name) for name in names]
+
+def run_queries(answers, max_suppliers):
+    scraper = FakeScraper(answers, max_suppliers)
+    streamed = []
+    result = asyncio.run(scraper._run_queries(list(answers), {"queries": [], "sources": []}, streamed.append))
+    assert [s.supplier_name for s in streamed] == [s.supplier_name for s in result]
+    return [s.supplier_name for s in result]
+
+@pytest.mark.parametrize("delays", [(0.03, 0.0, 0.01), (0.0, 0.02, 0.01), (0.01, 0.01, 0.0)])
+def test_results_follow_query_order_not_completion_order(delays):
+    answers = {
+        "q1": (delays[0], ["Acme Plastics", "Beta Polymer"]),
+        "q2": (delays[1], ["beta polymer", "Gamma Manufacturing"]),
+        "q3": (delays[2], ["Delta Components"]),
+    }
+    assert run_queries(answers, max_suppliers=3) == ["Acme Plastics", "Beta Polymer", "Gamma Manufacturing"]
+    assert run_queries(answers, max_suppliers=10) == ["Acme Plastics", "Beta Polymer", "Gamma Manufacturing", "Delta Components"]
+
+def test_failed_query_counts_as_answered():
+    answers = {"q1": (0.01, None), "q2": (0.0, ["Acme Plastics"])}
+    assert run_queries(answers, max_suppliers=5) == ["Acme Plastics"]
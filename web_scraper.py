@@ -1,3 +1,5 @@
+import asyncio
+import httpx
 import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -6,13 +8,15 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Callable
 import time
 import re
 from config import config
 from schemas import SupplierInfo
+from cache_store import SQLiteCache
 import os
-import PyPDF2
+from spec_text_cache import get_spec_text_cache, empty_keywords, SPEC_EXTENSIONS
+from spec_ingest import get_spec_ingestor
 
 B2B_SITES = [
     "alibaba.com", "thomasnet.com", "europages.com", "kompass.com", "made-in-china.com", "campusplastics.com"
@@ -22,54 +26,69 @@ class WebScraper:
     def __init__(self):
         self.max_suppliers = config.MAX_ALTERNATIVE_SUPPLIERS
         self.timeout = config.WEB_SCRAPING_TIMEOUT
+        self.search_concurrency = config.WEB_SEARCH_CONCURRENCY
+        self.user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': self.user_agent
         })
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.search_cache = SQLiteCache(
+            "web_search",
+            ttl=config.WEB_SEARCH_CACHE_TTL,
+            max_entries=config.WEB_SEARCH_CACHE_MAX_ENTRIES
+        ) if config.WEB_SEARCH_CACHE_ENABLED else None
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Pooled async client for search API calls, bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = httpx.AsyncClient(
+                headers={'User-Agent': self.user_agent},
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.search_concurrency)
+            )
+            self._async_loop = loop
+        return self._async_client
+
+    async def aclose(self):
+        """Close the async search client (called on app shutdown)"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_loop = None
 
     def extract_keywords_from_spec(self, spec_path: str) -> Dict[str, str]:
-        # Extract material, grade, process, and application from spec
-        keywords = {"material": "", "grade": "", "process": "", "application": ""}
+        # Extract material, grade, process, and application from spec (cached per file, see spec_text_cache)
+        keywords = empty_keywords()
         if not spec_path or not os.path.exists(spec_path):
             return keywords
-        ext = os.path.splitext(spec_path)[1].lower()
-        text = ""
-        try:
-            if ext == '.txt':
-                with open(spec_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    text = f.read()
-            elif ext == '.pdf':
-                with open(spec_path, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    text = " ".join(page.extract_text() or '' for page in reader.pages)
-            else:
-                return keywords
-            # Material (look for PPS, PA6, Celstran, etc.)
-            material_match = re.search(r'(PPS|PA6|PA-6|Polyamide|Polypropylene|Polycarbonate|Celstran|Celanese|[A-Z]{2,10}-[A-Z0-9\-]+)', text)
-            if material_match:
-                keywords["material"] = material_match.group(0)
-            # Grade (look for e.g. "CF40", "BKV30", "GF30", "PPS-CF40-01")
-            grade_match = re.search(r'([A-Z]{2,10}-[A-Z0-9\-]+|CF\d{2}|GF\d{2}|BKV\d{2})', text)
-            if grade_match:
-                keywords["grade"] = grade_match.group(0)
-            # Process (look for "injection molding", "extrusion", etc.)
-            process_match = re.search(r'(injection molding|extrusion|blow molding|compression molding)', text, re.I)
-            if process_match:
-                keywords["process"] = process_match.group(0)
-            # Application (look for "automotive", "electrical", etc.)
-            app_match = re.search(r'(automotive|electrical|connector|housing|base|module|gear|bearing)', text, re.I)
-            if app_match:
-                keywords["application"] = app_match.group(0)
+        if os.path.splitext(spec_path)[1].lower() not in SPEC_EXTENSIONS:
             return keywords
+        try:
+            return get_spec_text_cache().get(spec_path, need_text=False)["keywords"]
         except Exception as e:
             print(f"[WebScraper] Error extracting keywords from spec: {e}")
             return keywords
 
-    def search_alternative_suppliers(self, part_number: str, part_name: str, material: Optional[str] = None, spec_path: Optional[str] = None, region: str = "Europe") -> List[SupplierInfo]:
+    async def extract_keywords_from_spec_async(self, spec_path: str) -> Dict[str, str]:
+        # Same as extract_keywords_from_spec, but cache misses are parsed in the spec ingest process pool
+        keywords = empty_keywords()
+        if not spec_path or not os.path.exists(spec_path):
+            return keywords
+        if os.path.splitext(spec_path)[1].lower() not in SPEC_EXTENSIONS:
+            return keywords
+        try:
+            return (await get_spec_ingestor().extract(spec_path, keywords_only=True))["keywords"]
+        except Exception as e:
+            print(f"[WebScraper] Error extracting keywords from spec: {e!r}")
+            return keywords
+
+    async def search_alternative_suppliers(self, part_number: str, part_name: str, material: Optional[str] = None, spec_path: Optional[str] = None, region: str = "Europe", on_supplier: Optional[Callable[[SupplierInfo], None]] = None) -> List[SupplierInfo]:
         log = {"queries": [], "sources": []}
-        suppliers = []
-        # Extract keywords from spec
-        spec_keywords = self.extract_keywords_from_spec(spec_path) if spec_path else {"material": material or "", "grade": "", "process": "", "application": ""}
+        # Extract keywords from spec (PDF parsing runs in worker processes, off the event loop)
+        spec_keywords = await self.extract_keywords_from_spec_async(spec_path) if spec_path else {"material": material or "", "grade": "", "process": "", "application": ""}
         material_kw = spec_keywords.get("material") or material or ""
         grade_kw = spec_keywords.get("grade", "")
         process_kw = spec_keywords.get("process", "injection molding")
@@ -88,22 +107,94 @@ class WebScraper:
             queries.append(f"{material_kw} {grade_kw} {process_kw} site:{site}")
         # Remove duplicates
         queries = [q.strip() for q in list(dict.fromkeys(queries)) if q.strip()]
-        # Search Google and B2B
-        for query in queries:
-            log["queries"].append(query)
-            print(f"[WebScraper] Searching Google for: {query}")
-            results = self._search_google(query, log)
-            print(f"[WebScraper] Found {len(results)} suppliers for query: {query}")
-            suppliers.extend(results)
-            if len(suppliers) >= self.max_suppliers:
-                break
-        unique_suppliers = self._remove_duplicates(suppliers)
+        # Search Google and B2B with bounded concurrency, stopping once enough unique suppliers are in
+        unique_suppliers = await self._run_queries(queries, log, on_supplier)
         print(f"[WebScraper] Returning {len(unique_suppliers)} unique web suppliers.")
         # Return only SupplierInfo objects (not dicts)
         return unique_suppliers[:self.max_suppliers]
 
-    def _search_google(self, query: str, log: Optional[Dict] = None) -> List[SupplierInfo]:
+    async def _run_queries(self, queries: List[str], log: Dict, on_supplier: Optional[Callable[[SupplierInfo], None]] = None) -> List[SupplierInfo]:
+        """
+        Run search queries concurrently (at most `search_concurrency` in flight)
+        and cancel the rest as soon as `max_suppliers` unique suppliers are
+        collected. Results are merged in query order: a query's suppliers are
+        taken once every earlier query has answered, so the list does not
+        depend on which request finishes first. Each new supplier is passed
+        to `on_supplier` as soon as it is taken, so streaming clients see
+        exactly the list that is finally returned.
+        """
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def run(index: int, query: str):
+            async with semaphore:
+                log["queries"].append(query)
+                print(f"[WebScraper] Searching Google for: {query}")
+                try:
+                    results = await self._search_google(query, log)
+                except Exception as e:
+                    # One failing query must not cancel the others
+                    print(f"[WebScraper] Query failed: {query}: {e!r}")
+                    return index, []
+                print(f"[WebScraper] Found {len(results)} suppliers for query: {query}")
+                return index, results
+
+        tasks = [asyncio.create_task(run(i, q)) for i, q in enumerate(queries)]
+        unique_suppliers: List[SupplierInfo] = []
+        answered: Dict[int, List[SupplierInfo]] = {}
+        next_index = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, results = await next_done
+                answered[index] = results
+                # Merge every query whose predecessors have all answered
+                while next_index in answered and len(unique_suppliers) < self.max_suppliers:
+                    results = answered.pop(next_index)
+                    next_index += 1
+                    for supplier in self._remove_duplicates(unique_suppliers + results)[len(unique_suppliers):]:
+                        if len(unique_suppliers) >= self.max_suppliers:
+                            break
+                        unique_suppliers.append(supplier)
+                        if on_supplier:
+                            on_supplier(supplier)
+                if len(unique_suppliers) >= self.max_suppliers:
+                    break
+        finally:
+            cancelled = sum(1 for t in tasks if not t.done())
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if cancelled:
+                print(f"[WebScraper] Cancelled {cancelled} remaining queries.")
+        return unique_suppliers
+
+    async def _search_google(self, query: str, log: Optional[Dict] = None) -> List[SupplierInfo]:
         suppliers = []
+        items = await self._get_search_items(query)
+        for item in items or []:
+            try:
+                title = item.get("title")
+                link = item.get("link")
+                desc = item.get("snippet") or ""
+                if not title or not link:
+                    continue
+                if self._is_supplier_website(title, link):
+                    suppliers.append(SupplierInfo(
+                        supplier_number=f"WEB_{len(suppliers) + 1}",
+                        supplier_name=title,
+                        website=link,
+                        description=desc,
+                        is_web_found=True
+                    ))
+            except Exception as e:
+                print(f"[WebScraper] Skipping malformed search item: {e!r}")
+        return suppliers
+
+    async def _get_search_items(self, query: str) -> Optional[List[Dict]]:
+        """
+        Raw Custom Search result items for a query, served from the shared
+        disk cache when possible. Empty results are cached for a shorter
+        time; errors are not cached. Returns None on error.
+        """
         api_key = config.GOOGLE_API_KEY
         cse_id = config.GOOGLE_CSE_ID
         url = "https://www.googleapis.com/customsearch/v1"
@@ -113,27 +204,25 @@ class WebScraper:
             "q": query,
             "num": 8,
         }
+        cache_key = f"{cse_id}|{params['num']}|{' '.join(query.split()).lower()}"
+        if self.search_cache is not None:
+            cached_items = await asyncio.to_thread(self.search_cache.get, cache_key)
+            if cached_items is not None:
+                return cached_items
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            response = await self._get_async_client().get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
-                for item in data.get("items", []):
-                    title = item.get("title")
-                    link = item.get("link")
-                    desc = item.get("snippet", "")
-                    if self._is_supplier_website(title, link):
-                        suppliers.append(SupplierInfo(
-                            supplier_number=f"WEB_{len(suppliers) + 1}",
-                            supplier_name=title,
-                            website=link,
-                            description=desc,
-                            is_web_found=True
-                        ))
+                items = data.get("items", [])
+                if self.search_cache is not None:
+                    ttl = config.WEB_SEARCH_CACHE_TTL if items else config.WEB_SEARCH_NEGATIVE_CACHE_TTL
+                    await asyncio.to_thread(self.search_cache.set, cache_key, items, ttl=ttl)
+                return items
             else:
                 print(f"[WebScraper] Google API error: {response.status_code} {response.text}")
         except Exception as e:
             print(f"[WebScraper] Error in Google Custom Search API: {e}")
-        return suppliers
+        return None
 
     def _is_supplier_website(self, title: str, url: str) -> bool:
         supplier_keywords = [